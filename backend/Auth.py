@@ -1,12 +1,23 @@
-import requests, base64, os, secrets, hashlib, json
-from dotenv import load_dotenv
+import base64, os, secrets, hashlib, json, time
+from backend.endpoints import accounts_url, load_env
+from backend.file_lock import atomic_write_json, file_lock
+from backend.profiler import span
+
+# Refresh the access token this many seconds before it actually expires
+REFRESH_MARGIN = 60
+
+# held while a process refreshes (tokens.json.lock), the others wait and reuse its token
+TOKEN_FILE = "tokens.json"
 
-load_dotenv()
 
 # The Authorization Code Flow with PKCE 
 class Auth:
     
-    def __init__(self):
+    def __init__(self, session=None):
+        # imported here, `import backend` must stay cheap for the daemon client
+        from backend.transport.session import SpotifySession
+        from backend.transport.single_flight import SingleFlight
+        load_env()
         self.client_id = os.getenv('CLIENT_ID')
         self.client_secret = os.getenv('CLIENT_SECRET')
         self.redirect_uri = os.getenv('REDIRECT_URI')
@@ -14,6 +25,17 @@ class Auth:
         self.code_challenge = self.generate_code_challenge()
         self.token = None
         self.refresh_token = None
+        self.expires_in = None
+        self.expires_at = None
+        # why the last refresh failed: "invalid_grant" (login again), "http_503", "network"...
+        self.refresh_error = None
+        self.token_path = TOKEN_FILE
+        # threads that find the token expired at the same time share one refresh
+        self.refresh_flight = SingleFlight()
+        # shared pooled transport, bearer token is read back from this Auth on every request
+        self.session = session if session is not None else SpotifySession(auth=self)
+        if session is not None and session.auth is None:
+            session.auth = self
         self.load_token()
 
 
@@ -46,7 +68,7 @@ class Auth:
     ### PURPOSE:     Get the authorization URL for the user to log in with Spotify
     ###############################################################
     def get_authorization_url(self):  
-        url = 'https://accounts.spotify.com/authorize'
+        url = accounts_url('/authorize')
         
         params = {
             'client_id': self.client_id,
@@ -57,6 +79,7 @@ class Auth:
             'scope': 'user-read-playback-state user-modify-playback-state'
         }
         
+        import requests
         request_url = requests.Request('GET', url, params=params).prepare().url
         return request_url
 
@@ -68,7 +91,7 @@ class Auth:
     ### PURPOSE:     Exchange the authorization code for an access token
     ###############################################################
     def get_token(self, code):      
-        url = 'https://accounts.spotify.com/api/token'
+        url = accounts_url('/api/token')
         headers = {
             "Content-Type": "application/x-www-form-urlencoded"
         }
@@ -81,18 +104,20 @@ class Auth:
             'code_verifier': self.code_verifier
         }
         
-        response = requests.post(url, headers=headers, data=data)
+        response = self.session.post(url, headers=headers, data=data)
         response_data = response.json()
         
         if 'access_token' in response_data and 'refresh_token' in response_data:
             self.token = response_data.get('access_token')
             self.refresh_token = response_data.get('refresh_token')
+            self.set_expiry(response_data.get('expires_in'))
             self.save_token()
             return self.token
         else:
             print(f"Error retrieving tokens from URL{ response_data }")
             self.token = None
             self.refresh_token = None
+            self.expires_at = None
             return None
 
     
@@ -100,14 +125,62 @@ class Auth:
     ###############################################################
     ### PARAMETERS:  None
     ### RETURN:      Refreshed access token (string) or None
-    ### PURPOSE:     Refresh the access token using the refresh token
+    ### PURPOSE:     Refresh the access token using the refresh token.
+    ###              One refresh at a time: threads join the refresh in flight,
+    ###              other processes wait on the token file lock and pick up the
+    ###              token it wrote instead of refreshing again
     ###############################################################
     def refresh_access_token(self):
         if not self.refresh_token:
             print("No refresh token available on file!")
             return None
-        
-        url = 'https://accounts.spotify.com/api/token'
+        return self.refresh_flight.do("refresh", self._refresh_locked)
+
+
+    # the token this process has is the stale one, unless tokens.json says otherwise
+    def _refresh_locked(self):
+        stale = self.token
+        with span("auth.refresh") as attrs, file_lock(self.token_path):
+            if self._adopt_stored_token(stale):
+                attrs["cache"] = "adopted"
+                return self.token
+            attrs["cache"] = "miss"
+            return self._request_refresh()
+
+
+    ###############################################################
+    ### PARAMETERS:  stale (the access token that needs replacing)
+    ### RETURN:      True if tokens.json holds a newer, unexpired token (now in use)
+    ### PURPOSE:     Another process refreshed while this one waited for the lock.
+    ###              Its refresh token is taken either way, spotify may rotate them
+    ###############################################################
+    def _adopt_stored_token(self, stale):
+        token_data = self._read_token_file()
+        if not token_data:
+            return False
+        self.refresh_token = token_data.get("refresh_token") or self.refresh_token
+        access_token = token_data.get("access_token")
+        expires_at = token_data.get("expires_at")
+        if not access_token or access_token == stale:
+            return False
+        if expires_at is not None and time.time() + REFRESH_MARGIN >= expires_at:
+            return False
+        self.token = access_token
+        self.expires_in = token_data.get("expires_in")
+        self.expires_at = expires_at
+        return True
+
+
+    ###############################################################
+    ### PARAMETERS:  None
+    ### RETURN:      new access token (string) or None
+    ### PURPOSE:     The /api/token call itself. A failure leaves tokens.json alone
+    ###              and says why in self.refresh_error, only "invalid_grant"
+    ###              (refresh token revoked / expired) means logging in again
+    ###############################################################
+    def _request_refresh(self):
+        import requests
+        url = accounts_url('/api/token')
         
         data = {
             'grant_type': 'refresh_token',
@@ -115,16 +188,28 @@ class Auth:
             'client_id': self.client_id,   
         }
         
-        response = requests.post(url, data=data)
-        response_data = response.json()
+        self.refresh_error = None
+        try:
+            response = self.session.post(url, data=data)
+        except requests.exceptions.RequestException as e:
+            print(f"Failed to refresh Token: {e}")
+            self.refresh_error = "network"
+            return None
+        try:
+            response_data = response.json()
+        except ValueError:
+            response_data = {}
         
-        if 'access_token' in response_data:
+        if response.status_code == 200 and 'access_token' in response_data:
             self.token = response_data.get('access_token')
             self.refresh_token = response_data.get('refresh_token', self.refresh_token)
+            self.set_expiry(response_data.get('expires_in'))
             self.save_token()
             return self.token 
         else:
-            print("Failed to refresh Token")
+            error = response_data.get('error') if isinstance(response_data, dict) else None
+            self.refresh_error = error if isinstance(error, str) else f"http_{response.status_code}"
+            print(f"Failed to refresh Token ({self.refresh_error})")
             return None
     
     
@@ -137,10 +222,12 @@ class Auth:
         if self.token and self.refresh_token:
             token_data = {
                 "access_token": self.token,
-                "refresh_token": self.refresh_token
+                "refresh_token": self.refresh_token,
+                "expires_in": self.expires_in,
+                "expires_at": self.expires_at
             }
-            with open("tokens.json", "w") as file:
-                json.dump(token_data, file)
+            # a reader never sees a half written tokens.json
+            atomic_write_json(self.token_path, token_data)
         else:
             print("No token to save.")
          
@@ -148,25 +235,29 @@ class Auth:
     ###############################################################
     ### PARAMETERS:  None
     ### RETURN:      True if token is loaded, False if not
-    ### PURPOSE:     Load tokens from a file and validate them
+    ### PURPOSE:     Load tokens from a file, trusting the stored expiry instead of
+    ###              asking the api. A token close to expiry is refreshed ahead of time,
+    ###              a token without a stored expiry (older tokens.json) is trusted and
+    ###              only re-checked when a request comes back 401 (handle_unauthorized)
     ###############################################################
     def load_token(self):
         try:
-            with open("tokens.json", "r") as file:
+            with open(self.token_path, "r") as file:
                 token_data = json.load(file)
                 self.token = token_data.get("access_token")
                 self.refresh_token = token_data.get("refresh_token")
+                self.expires_in = token_data.get("expires_in")
+                self.expires_at = token_data.get("expires_at")
                 print("** Login Token Loaded! **\n")
                 
-                # Check if the token is valid before proceeding 
-                #Edge case first, token is loaded and is valid
-                if self.token and self.is_token_valid():
+                #Edge case first, token is loaded and is not about to expire
+                if self.token and not self.is_token_expiring():
                     print("** Access Token is valid **")
                     return True
                 
-                #Edge Case two: Token is loaded, but is expired
+                #Edge Case two: Token is missing or (about to be) expired
                                 # We can use the refresh token
-                elif self.token and not self.is_token_valid() and self.refresh_token:
+                elif self.refresh_token:
                     print("** Access Token is Expired! **")
                     print("Attempting To Refresh Access Token...")
                     new_token = self.refresh_access_token()
@@ -174,20 +265,94 @@ class Auth:
                     if new_token:
                         print("** Token Is Refreshed! **\n")
                         return True
-                    else:
+                    elif self.refresh_error == "invalid_grant":
                         print("** Refreshing Access Token Failed! **\n")
                         print("Login Required")
                         self.clear_tokens()
                         return False
+                    else:
+                        # spotify down, timeout...: keep tokens.json, the next request tries again
+                        print("** Refreshing Access Token Failed, will retry on the next request **\n")
+                        return False
                 else:
                     print("No valid tokens available, login required.")
                     self.clear_tokens()
+                    return False
                     
-        except (FileNotFoundError, json.JSONDecodeError):
-            # File is missing or empty, prompt login
+        except FileNotFoundError:
+            # File is missing, prompt login
             print("No valid token file found, user must log in.")
             self.clear_tokens()
             return False
+        except json.JSONDecodeError:
+            # unreadable, but never delete it: the refresh token may still be
+            # recoverable and another process may be about to rewrite it
+            print("Token file could not be read, user must log in.")
+            self.token = None
+            self.refresh_token = None
+            self.expires_at = None
+            return False
+
+
+    # tokens.json as a dict, None when it is missing or unreadable
+    def _read_token_file(self):
+        try:
+            with open(self.token_path, "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+
+    ###############################################################
+    ### PARAMETERS:  expires_in (seconds, from the token response)
+    ### RETURN:      None
+    ### PURPOSE:     Turn the relative expires_in into an absolute timestamp
+    ###############################################################
+    def set_expiry(self, expires_in):
+        self.expires_in = expires_in
+        self.expires_at = time.time() + expires_in if expires_in else None
+
+
+    ###############################################################
+    ### PARAMETERS:  margin (seconds)
+    ### RETURN:      True if the token is gone or expires within margin
+    ### PURPOSE:     Local expiry check, no network request.
+    ###              Unknown expiry counts as not expiring (checked lazily on 401)
+    ###############################################################
+    def is_token_expiring(self, margin=REFRESH_MARGIN):
+        if not self.token:
+            return True
+        if self.expires_at is None:
+            return False
+        return time.time() + margin >= self.expires_at
+
+
+    ###############################################################
+    ### PARAMETERS:  None
+    ### RETURN:      access token (string) or None
+    ### PURPOSE:     Return a token that is good for at least REFRESH_MARGIN seconds,
+    ###              refreshing ahead of time when needed
+    ###############################################################
+    def ensure_fresh_token(self):
+        if self.is_token_expiring() and self.refresh_token:
+            return self.refresh_access_token()
+        return self.token
+
+
+    ###############################################################
+    ### PARAMETERS:  rejected (the access token that got the 401, optional)
+    ### RETURN:      new access token (string) or None
+    ### PURPOSE:     Called when a real request got a 401, the token was
+    ###              revoked or expired early, so refresh it now. A request
+    ###              that raced a refresh another thread already finished
+    ###              just retries with the new token
+    ###############################################################
+    def handle_unauthorized(self, rejected=None):
+        if rejected is not None and self.token and self.token != rejected:
+            return self.token
+        print("Access token is expired or invalid")
+        self.expires_at = 0
+        return self.refresh_access_token()
         
         
     ###############################################################
@@ -196,16 +361,16 @@ class Auth:
     ### PURPOSE:     Verify if the current token is still valid by making a simple API request
     ###############################################################
     def is_token_valid(self):
-        url = 'https://api.spotify.com/v1/me/player/devices'
-        headers = {
-            "Authorization": f"Bearer {self.token}"
-        }
-        
-        response = requests.get(url, headers=headers)
+        response = self.session.get('/me/player/devices', retry_unauthorized=False)
         if response.status_code == 401:
             print("Access token is expired or invalid")
             return False;
-        return response.status_code == 200
+        if response.status_code != 200:
+            return False
+        # the check already listed the devices, Player on this session reuses them
+        from backend.playback.devices import registry_for
+        registry_for(self.session).store(response.json().get('devices', []))
+        return True
     
     
     ###############################################################
@@ -216,5 +381,6 @@ class Auth:
     def clear_tokens(self):
         self.token = None
         self.refresh_token = None
-        if os.path.exists("tokens.json"):
-            os.remove("tokens.json")
+        self.expires_at = None
+        if os.path.exists(self.token_path):
+            os.remove(self.token_path)
@@ -0,0 +1,442 @@
+import requests
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.endpoints import api_url
+from backend.transport.session import SpotifySession
+from backend.search.id_index import IdIndex, normalize_name
+from backend.transport.single_flight import SingleFlight
+from backend.transport.revalidation import default_revalidator
+from backend import metrics
+from backend.profiler import span
+from backend.playback.devices import registry_for, is_device_error
+
+"""
+Search (artist / discography / top tracks / track ids) and Player, the api the cli is built on
+Re-exported lazily from backend.py: backend.Search, backend.Player
+"""
+
+# spotify's page / batch ceilings for the discography endpoints
+ALBUM_PAGE_SIZE = 50        # /artists/{id}/albums
+ALBUM_BATCH_SIZE = 20       # /albums?ids=
+
+
+# a discography stream lost album pages / batches, raised once every album that did arrive was yielded
+class IncompleteDiscography(Exception):
+    def __init__(self, artist_name, failed):
+        super().__init__(f"{failed} album request(s) failed, the discography of {artist_name} is incomplete")
+        self.artist_name = artist_name
+        self.failed = failed
+
+
+class Search:
+    def __init__(self, token, session=None, id_index=None, revalidator=None):
+        self.token = token
+        self.session = session if session is not None else SpotifySession(token)
+        # persistent name --> id index, so names resolved before skip the /search round trip
+        self.id_index = id_index if id_index is not None else IdIndex()
+        # catalogue reads are conditional GETs, an unchanged answer comes back as a bodiless 304
+        self.revalidator = revalidator if revalidator is not None else default_revalidator()
+        # callers resolving the same name at the same time share one lookup
+        self.inflight = SingleFlight()
+
+# SEARCHING ARTIOST INFORMATION
+
+    # https://developer.spotify.com/documentation/web-api/reference/search
+    # Finds artist metadata from artist name
+        # @param Type = Artist is very important
+    # @Returns a list of artist metadata
+        # [ artists 
+        #       ...
+        #       ...
+        #       "items": [  <---- List of artists
+        #           "id"
+        #           "name"
+        #           ...]
+        #    ...    ]
+    def get_artist_MetaData(self, artist_name):
+        url = api_url('/search')
+        params = {
+            "q": artist_name,
+            "type": "artist",
+            "limit": 1
+        }
+        
+        try:
+            res, artists = self.revalidator.get(self.session, url, params,
+                                                normalize=lambda res: res.json()['artists']['items'])
+        except requests.exceptions.RequestException as e:
+            print(e)
+            return None
+        if artists is None:
+            print(f"Error searching artist: {res.status_code}")
+            return None
+        return artists
+
+    # Resolves the artist name through the local id index first,
+    # only unknown or stale (older than the index ttl) names cost a /search request
+    def get_artist_id(self, artist_name):
+        with span("resolve", artist=artist_name) as attrs:
+            cached_id, fresh = self.id_index.lookup_artist(artist_name)
+            attrs["cache"] = "hit" if cached_id and fresh else "miss"
+            metrics.registry().record_cache("ids", bool(cached_id and fresh))
+            if cached_id and fresh:
+                return cached_id
+            return self.inflight.do(("artist", normalize_name(artist_name)), lambda: self.resolve_artist_id(artist_name))
+
+    def resolve_artist_id(self, artist_name):
+        # a flight that finished while we were queued may have resolved it already,
+        # not counted again: get_artist_id recorded this lookup
+        cached_id, fresh = self.id_index.lookup_artist(artist_name, count=False)
+        if cached_id and fresh:
+            return cached_id
+
+        artist_data = self.get_artist_MetaData(artist_name)
+        if not artist_data:
+            # api unreachable / no match, a stale id is still better than nothing
+            return cached_id
+        id = artist_data[0]['id']
+        self.id_index.put_artist(artist_name, id)
+        return id
+
+    # Bulk preload of the id index, unknown names are resolved concurrently
+        # @Returns {artist name: artist id} for every name that could be resolved
+    def preload_artist_ids(self, artist_names, max_workers=4):
+        resolved = {}
+        missing = []
+        for artist_name in artist_names:
+            cached_id, fresh = self.id_index.lookup_artist(artist_name)
+            if cached_id and fresh:
+                resolved[artist_name] = cached_id
+            else:
+                missing.append(artist_name)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for artist_name, artist_data in zip(missing, pool.map(self.get_artist_MetaData, missing)):
+                if artist_data:
+                    resolved[artist_name] = artist_data[0]['id']
+
+        self.id_index.preload(artists={name: resolved[name] for name in missing if name in resolved})
+        return resolved
+    
+    # https://developer.spotify.com/documentation/web-api/reference/get-an-artists-albums
+        # Finds artist id from artist name
+        # @Returns a list of the artist's whole discography (every page, not only the first 10)
+            # [ ...
+            #   {  <---- album
+            #      "name"
+            #      "release_date"
+            #      ...}
+            # ]
+        # (None when a page could not be fetched, never a partial list)
+    def get_artist_descography(self, artist_name, include_groups="album"):
+        try:
+            return list(self.iter_artist_descography(artist_name, include_groups, hydrate=False))
+        except IncompleteDiscography as e:
+            print(e)
+            return None
+
+    # Full discography engine
+        # 1. first page of /artists/{id}/albums tells us "total"
+        # 2. every other page is requested concurrently
+        # 3. (hydrate) full albums incl. tracks come from /albums?ids=, 20 ids per call,
+        #    batches are sent as soon as enough ids arrived
+        # @Returns a generator of albums, in discography order, streamed as batches complete
+        # @Raises IncompleteDiscography at the end when a page / batch request failed
+    def iter_artist_descography(self, artist_name, include_groups="album", hydrate=True, max_workers=4):
+        artist_id = self.get_artist_id(artist_name)
+        if not artist_id:
+            print("Artist not found")
+            return
+        first_page = self.get_artist_album_page(artist_id, 0, include_groups)
+        if first_page is None:
+            return
+
+        offsets = range(ALBUM_PAGE_SIZE, first_page.get("total", 0), ALBUM_PAGE_SIZE)
+        failed = 0
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            page_futures = [pool.submit(self.get_artist_album_page, artist_id, offset, include_groups) for offset in offsets]
+
+            def pages():
+                nonlocal failed
+                yield first_page
+                for future in page_futures:
+                    page = future.result()
+                    if page is None:
+                        failed += 1
+                    else:
+                        yield page
+
+            def batch(future):
+                nonlocal failed
+                albums = future.result()
+                if albums is None:
+                    failed += 1
+                return albums or []
+
+            if not hydrate:
+                for page in pages():
+                    yield from page["items"]
+                if failed:
+                    raise IncompleteDiscography(artist_name, failed)
+                return
+
+            pending = deque()
+            album_ids = []
+            for page in pages():
+                album_ids.extend(album["id"] for album in page["items"])
+                while len(album_ids) >= ALBUM_BATCH_SIZE:
+                    pending.append(pool.submit(self.get_albums, album_ids[:ALBUM_BATCH_SIZE]))
+                    del album_ids[:ALBUM_BATCH_SIZE]
+                # hand back whatever batches already finished, in order
+                while pending and pending[0].done():
+                    yield from batch(pending.popleft())
+            if album_ids:
+                pending.append(pool.submit(self.get_albums, album_ids))
+            while pending:
+                yield from batch(pending.popleft())
+        if failed:
+            raise IncompleteDiscography(artist_name, failed)
+
+    # One page of /artists/{id}/albums
+        # @Returns the raw page dict ("items", "total"...) or None
+    def get_artist_album_page(self, artist_id, offset=0, include_groups="album", limit=ALBUM_PAGE_SIZE):
+        url = api_url(f"/artists/{artist_id}/albums")
+        params = {
+            "include_groups": include_groups,
+            "limit": limit,
+            "offset": offset
+        }
+        try: 
+            res, page = self.revalidator.get(self.session, url, params)
+        except requests.exceptions.RequestException as e:
+            print(e)
+            return None
+        if page is None:
+            print(f"Error fetching albums: {res.status_code}")
+            return None
+        return page
+
+    # https://developer.spotify.com/documentation/web-api/reference/get-multiple-albums
+        # @Returns a list of full albums (incl. "tracks") for up to 20 album ids
+    def get_albums(self, album_ids):
+        url = api_url("/albums")
+        params = {
+            "ids": ",".join(album_ids[:ALBUM_BATCH_SIZE])
+        }
+        try:
+            res, albums = self.revalidator.get(self.session, url, params,
+                                               normalize=lambda res: [album for album in res.json().get('albums', []) if album])
+        except requests.exceptions.RequestException as e:
+            print(e)
+            return None
+        if albums is None:
+            print(f"Error fetching albums: {res.status_code}")
+            return None
+        return albums
+    
+    # https://developer.spotify.com/documentation/web-api/reference/get-an-albums-tracks
+        # @Returns the album's (simplified, no "album" key) tracks in order, or None
+    def get_album_tracks(self, album_id, limit=50):
+        url = api_url(f"/albums/{album_id}/tracks")
+        params = {
+            "limit": limit
+        }
+        try:
+            res, tracks = self.revalidator.get(self.session, url, params, normalize=lambda res: res.json().get('items', []))
+        except requests.exceptions.RequestException as e:
+            print(e)
+            return None
+        if tracks is None:
+            print(f"Error fetching album tracks: {res.status_code}")
+            return None
+        return tracks
+
+    def get_artist_top_tracks(self, artist_name):
+        artist_id = self.get_artist_id(artist_name)
+        if not artist_id:
+            print("Artist not found")
+            return None
+        return self.get_artist_top_tracks_by_id(artist_id)
+
+    # same as get_artist_top_tracks for an id that is already known (focus)
+    def get_artist_top_tracks_by_id(self, artist_id):
+        url = api_url(f"/artists/{artist_id}/top-tracks")
+        
+        try:
+            res, tracks = self.revalidator.get(self.session, url, normalize=lambda res: res.json()['tracks'])
+        except requests.exceptions.RequestException as e:
+            print(e)
+            return None
+        if tracks is None:
+            print(f"Error fetching top tracks: {res.status_code}")
+            return None
+        return tracks
+
+# SEARCHING TRACK INFORMATION
+    # https://developer.spotify.com/documentation/web-api/reference/search/search
+    # Finds track metadata from track name and artist name
+        # @param Type = Track is very important
+    # @Returns a list of track metadata
+        # [ tracks 
+        #       ...
+        #       ...
+        #       "items": [  <---- List of tracks
+        #           "id"
+        #           "name"
+        #           ...]
+        #    ...    ]
+    def get_track_id(self, artist_name, track_name):
+        cached_id, fresh = self.id_index.lookup_track(artist_name, track_name)
+        if cached_id and fresh:
+            return cached_id
+
+        url = api_url('/search')
+        param = {
+            "q": f"track:{track_name} artist:{artist_name}",
+            "type": "track",
+            "limit": 1
+        }
+        
+        try:
+            res, tracks = self.revalidator.get(self.session, url, param, normalize=lambda res: res.json()['tracks']['items'])
+        except requests.exceptions.RequestException as e:
+            print(e)
+            return cached_id
+        if tracks is None:
+            print(f"Error searching track: {res.status_code}")
+            return cached_id
+        if len(tracks) == 0:
+            print("Track not found")
+            return None
+        self.id_index.put_track(artist_name, track_name, tracks[0]['id'])
+        return tracks[0]['id']
+    
+# "abc" / "spotify:album:abc" --> "spotify:album:abc"
+def spotify_uri(ref, kind):
+    return ref if ref.startswith("spotify:") else f"spotify:{kind}:{ref}"
+
+
+class Player:
+    def __init__(self, token, session=None, devices=None):
+        self.token = token
+        self.session = session if session is not None else SpotifySession(token)
+        # devices list + remembered target device, shared with everything on this session
+        self.devices = devices if devices is not None else registry_for(self.session)
+        
+        # @refresh: ask spotify even when the cached list is still fresh
+    def get_devices(self, refresh=False):
+        try:
+            return self.devices.devices(refresh=refresh)
+        except requests.exceptions.RequestException as e: 
+            print(e)
+            return None
+
+    # https://developer.spotify.com/documentation/web-api/reference/start-a-users-playback
+        # track id or "spotify:track:..." uri
+        # @Returns True when spotify accepted the command
+    def play_track(self, track, shuffle=None):
+        if not track:
+            print("Nothing to play")
+            return False
+        return self.play(uris=[spotify_uri(track, "track")], shuffle=shuffle)
+
+        # a whole album as one context, spotify plays (and shuffles) it from there
+        # @offset: track number (0 based) or track uri to start at
+    def play_album(self, album, shuffle=None, offset=None):
+        if not album:
+            print("Nothing to play")
+            return False
+        return self.play(context_uri=spotify_uri(album, "album"), offset=offset, shuffle=shuffle)
+
+        # any number of tracks (ids or uris) in a single play call
+    def play_tracks(self, tracks, shuffle=None, offset=None):
+        uris = [spotify_uri(track, "track") for track in tracks or [] if track]
+        if not uris:
+            print("Nothing to play")
+            return False
+        return self.play(uris=uris, offset=offset, shuffle=shuffle)
+
+    # @context_uri: album / playlist / artist uri, or
+    # @uris: list of track uris
+    # @offset: where in the context / uris to start, position (int) or track uri
+    # @position_ms: where in that track to start
+    # @device_id: play there, otherwise on the remembered device
+    # @shuffle: True / False, shuffle state is its own endpoint and is set before
+    #           starting playback, None leaves it as it is
+    # The remembered device is targeted directly, a 404 (device gone / no active
+    # device) drops it and the command is retried once on a freshly listed device
+    def play(self, context_uri=None, uris=None, offset=None, position_ms=None, device_id=None, shuffle=None):
+        body = {}
+        if context_uri:
+            body["context_uri"] = context_uri
+        if uris:
+            body["uris"] = list(uris)
+        if offset is not None:
+            body["offset"] = {"position": offset} if isinstance(offset, int) else {"uri": offset}
+        if position_ms:
+            body["position_ms"] = position_ms
+
+        try:
+            target = device_id or self.devices.remembered()
+            res = self._play(body, target, shuffle)
+            # a device the caller picked is not second guessed
+            if is_device_error(res) and device_id is None:
+                self.devices.invalidate(target)
+                retry_id = self.devices.target_device_id()
+                if retry_id is not None:
+                    res = self._play(body, retry_id, shuffle)
+        except requests.exceptions.RequestException as e:
+            print(e)
+            return False
+        if res.status_code not in (200, 202, 204):
+            print(f"Error starting playback: {res.status_code}")
+            return False
+        return True
+
+
+    """
+    Function: add tracks to the user's queue, one POST /me/player/queue per track
+    Returns: number of tracks spotify accepted
+    Params:
+            @tracks: track ids / uris, queued in this order. Spotify appends in arrival
+                     order, so they are sent one after the other on the session's
+                     keep-alive connection (no new connection, no reordering)
+    """
+    def queue(self, tracks, device_id=None):
+        uris = [spotify_uri(track, "track") for track in tracks or [] if track]
+        target = device_id or self.devices.remembered()
+        params = {"device_id": target} if target else {}
+
+        def add(uri):
+            try:
+                res = self.session.post(api_url('/me/player/queue'), params={"uri": uri, **params})
+            except requests.exceptions.RequestException as e:
+                print(e)
+                return False
+            if res.status_code not in (200, 202, 204):
+                print(f"Error queueing {uri}: {res.status_code}")
+                return False
+            return True
+
+        return sum(add(uri) for uri in uris)
+
+
+    # Returns: a NowPlayingPoller on this player's session, .start() runs it in the background
+    #          and on_change(event) only hears about changes (track, play/pause, seek...)
+    def now_playing(self, on_change=None, **options):
+        from backend.playback.now_playing import NowPlayingPoller
+        return NowPlayingPoller(self.session, on_change=on_change, **options)
+
+
+    # shuffle (when asked for) then play, on `device_id` or wherever spotify is active
+    def _play(self, body, device_id, shuffle):
+        target = {"device_id": device_id} if device_id else {}
+        if shuffle is not None:
+            res = self.session.put(api_url('/me/player/shuffle'),
+                                   params={"state": "true" if shuffle else "false", **target})
+            if is_device_error(res):
+                return res
+            if res.status_code not in (200, 202, 204):
+                print(f"Error setting shuffle: {res.status_code}")
+        return self.session.put(api_url('/me/player/play'), params=target, json=body)
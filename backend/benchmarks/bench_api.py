@@ -0,0 +1,165 @@
+import argparse, contextlib, io, json, math, os, sys, tempfile, time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.testing.fake_spotify import FakeSpotify
+from backend.transport import scheduler
+
+
+"""
+Latency / throughput benchmarks for the client code paths, driven against the local fake api
+    python -m backend.benchmarks.bench_api --iterations 200 --latency 0.005
+Reports p50/p95/p99 latency (ms) and requests per second for each scenario
+"""
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(name, durations, wall_time, errors=0):
+    return {
+        "name": name,
+        "iterations": len(durations),
+        "errors": errors,
+        "p50_ms": percentile(durations, 50) * 1000,
+        "p95_ms": percentile(durations, 95) * 1000,
+        "p99_ms": percentile(durations, 99) * 1000,
+        "mean_ms": (sum(durations) / len(durations) * 1000) if durations else 0.0,
+        "rps": (len(durations) / wall_time) if wall_time > 0 else 0.0
+    }
+
+
+"""
+Function: time fn(i) for i in range(iterations), optionally from several threads
+Returns: summary dict (see summarize)
+         a call counts as an error if it raises or returns a falsy / {"success": False} result
+"""
+def run_benchmark(name, fn, iterations=100, concurrency=1, warmup=0):
+    for i in range(warmup):
+        fn(i)
+
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            result = fn(i)
+            ok = bool(result) and not (isinstance(result, dict) and result.get("success") is False)
+        except Exception:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    wall_start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(timed, range(iterations)))
+    else:
+        outcomes = [timed(i) for i in range(iterations)]
+    wall_time = time.perf_counter() - wall_start
+
+    durations = [duration for duration, _ in outcomes]
+    errors = sum(1 for _, ok in outcomes if not ok)
+    return summarize(name, durations, wall_time, errors)
+
+
+def format_report(results):
+    header = f"{'scenario':<28}{'n':>6}{'err':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r['name']:<28}{r['iterations']:>6}{r['errors']:>6}"
+            f"{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}{r['p99_ms']:>10.3f}{r['rps']:>10.1f}"
+        )
+    return "\n".join(lines)
+
+
+# the client code prints status lines (auth especially), keep them out of the report
+@contextlib.contextmanager
+def quiet():
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def run_suite(iterations=100, concurrency=1, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit_rate=0.0, rate=10000.0):
+    # imported here so the fake api env vars are in place before anything reads them
+    import backend
+    from backend.Auth import Auth
+    from backend.search.search_wrapper import Search
+    from backend.search.search_manager import SearchManager
+    from backend.search.search_cache import SearchCache
+    from backend.search.local_catalog import LocalCatalog
+
+    # the production rate limit would dominate every number against a local fake
+    scheduler.set_default_scheduler(scheduler.RequestScheduler(rate=rate, burst=rate))
+    results = []
+    workdir = tempfile.mkdtemp(prefix="tmfy-bench-")
+    previous_cwd = os.getcwd()
+    fake = FakeSpotify(latency=latency, jitter=jitter, error_rate=error_rate,
+                       rate_limit_rate=rate_limit_rate, retry_after=0, seed=1)
+    with fake, quiet():
+        os.chdir(workdir)
+        try:
+            token = fake.issue_token()
+            with open("tokens.json", "w") as file:
+                json.dump(token, file)
+            access_token = token["access_token"]
+
+            search = Search(access_token)
+            results.append(run_benchmark(
+                "Search.search", lambda i: search.search(f"artist {i % 50}", "artists", limit=10),
+                iterations, concurrency))
+
+            cold = SearchManager(access_token, cache=SearchCache(cache_dir=os.path.join(workdir, "cold")),
+                                 catalog=LocalCatalog(os.path.join(workdir, "catalog.sqlite3")))
+            results.append(run_benchmark(
+                "SearchManager.run (cold)", lambda i: cold.run(f"track {i}", "tracks", limit=10),
+                iterations, concurrency))
+
+            warm = SearchManager(access_token, cache=SearchCache(cache_dir=os.path.join(workdir, "warm")))
+            results.append(run_benchmark(
+                "SearchManager.run (warm)", lambda i: warm.run("track warm", "tracks", limit=10),
+                iterations, concurrency, warmup=1))
+
+            # cold searched `iterations` different queries, all of them are in its catalog now
+            results.append(run_benchmark(
+                "SearchManager.run_local", lambda i: cold.run_local(f"track {i}", "tracks", limit=10)["result"],
+                iterations, concurrency))
+
+            auth = Auth()
+            results.append(run_benchmark("Auth.load_token", lambda i: auth.load_token(), iterations, concurrency))
+
+            player = backend.Player(access_token)
+            results.append(run_benchmark(
+                "Player.get_devices", lambda i: player.get_devices(refresh=True) is not None, iterations, concurrency))
+        finally:
+            os.chdir(previous_cwd)
+
+    return results, fake
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="bench_api", description="Benchmark TermTify against a local fake Spotify api")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0, help="injected server latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of a 500 response")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="probability of a 429 response")
+    parser.add_argument("--rate", type=float, default=10000.0, help="client side rate limit (requests/s)")
+    parser.add_argument("--json", action="store_true", help="print raw results as json")
+    args = parser.parse_args(argv)
+
+    results, fake = run_suite(args.iterations, args.concurrency, args.latency, args.jitter,
+                              args.error_rate, args.rate_limit_rate, args.rate)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(format_report(results))
+        print(f"\nfake api requests served: {sum(fake.request_counts.values())}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+import argparse, sys, time, tracemalloc
+
+from backend.search.records import make_record, RECORD_TYPES
+from backend.testing.fake_spotify import make_search_item
+
+
+"""
+Memory + normalization time of the slotted result records vs the per-item dicts
+search_wrapper used to build
+    python -m backend.benchmarks.bench_records --items 20000
+"""
+
+
+# the per-item dict search_wrapper.Search.search built before records.py, kept as the baseline
+def legacy_normalize_item(item, search_type):
+    result_items = {
+        "id": item.get("id"),
+        "uri": item.get("uri"),
+        "name": item.get("name"),
+        "type": item.get("type"),
+        "spotify_url": item.get("external_urls", {}).get("spotify"),
+        "preview_url": item.get("preview_url"),
+        "popularity": item.get("popularity"),
+        "raw": item
+    }
+    if search_type == "tracks":
+        result_items.update({
+            "track_name": item.get("name"),
+            "artists": [{"name": a.get("name"), "id": a.get("id"), "uri": a.get("uri")} for a in item.get("artists", [])],
+            "artist_names": ", ".join([a.get("name", "") for a in item.get("artists", [])]),
+            "album": {
+                "name": item.get("album", {}).get("name"),
+                "id": item.get("album", {}).get("id"),
+                "uri": item.get("album", {}).get("uri"),
+                "release_date": item.get("album", {}).get("release_date")
+            },
+            "duration_ms": item.get("duration_ms"),
+            "explicit": item.get("explicit", True)
+        })
+    elif search_type == "albums":
+        result_items.update({
+            "album_name": item.get("name"),
+            "artists": [{"name": a.get("name"), "id": a.get("id"), "uri": a.get("uri")} for a in item.get("artists", [])],
+            "artist_names": ", ".join([a.get("name", "") for a in item.get("artists", [])]),
+            "release_date": item.get("release_date"),
+            "total_tracks": item.get("total_tracks"),
+            "images": item.get("images", [])
+        })
+    elif search_type == "artists":
+        result_items.update({
+            "artist_name": item.get("name"),
+            "genres": item.get("genres", []),
+            "followers": item.get("followers", {}).get("total", 0),
+            "images": item.get("images", [])
+        })
+    elif search_type == "playlists":
+        result_items.update({
+            "playlist_name": item.get("name"),
+            "owner": item.get("owner", {}).get("display_name"),
+            "owner_id": item.get("owner", {}).get("id"),
+            "track_count": item.get("tracks", {}).get("total", 0),
+            "public": item.get("public", False),
+            "images": item.get("images", [])
+        })
+    elif search_type == "shows":
+        result_items.update({
+            "show_name": item.get("name"),
+            "publisher": item.get("publisher"),
+            "description": item.get("description"),
+            "languages": item.get("languages", []),
+            "explicit": item.get("explicit", False),
+            "images": item.get("images", [])
+        })
+    elif search_type == "episodes":
+        result_items.update({
+            "episode_name": item.get("name"),
+            "description": item.get("description"),
+            "duration_ms": item.get("duration_ms"),
+            "release_date": item.get("release_date"),
+            "explicit": item.get("explicit", False),
+            "images": item.get("images", []),
+            "show": {
+                "name": item.get("show", {}).get("name"),
+                "id": item.get("show", {}).get("id")
+            }
+        })
+    return result_items
+
+
+def synthetic_items(search_type, count):
+    return [make_search_item(search_type, "benchmark", index) for index in range(count)]
+
+
+# Returns (seconds, bytes allocated) for normalizing every item
+# timing and allocation are separate passes, tracemalloc slows the timed loop down
+def measure(normalize, items, search_type):
+    start = time.perf_counter()
+    result = [normalize(item, search_type) for item in items]
+    elapsed = time.perf_counter() - start
+    del result
+
+    tracemalloc.start()
+    result = [normalize(item, search_type) for item in items]
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, allocated
+
+
+def run(count):
+    rows = []
+    for search_type in RECORD_TYPES:
+        items = synthetic_items(search_type, count)
+        legacy_time, legacy_bytes = measure(legacy_normalize_item, items, search_type)
+        record_time, record_bytes = measure(make_record, items, search_type)
+        rows.append({
+            "search_type": search_type,
+            "items": count,
+            "dict_ms": legacy_time * 1000,
+            "record_ms": record_time * 1000,
+            "dict_bytes_per_item": legacy_bytes / count,
+            "record_bytes_per_item": record_bytes / count
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="bench_records", description="Compare result records with per-item dicts")
+    parser.add_argument("--items", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    header = f"{'type':<12}{'dict ms':>10}{'record ms':>11}{'dict B/item':>13}{'record B/item':>15}"
+    print(header)
+    print("-" * len(header))
+    for row in run(args.items):
+        print(f"{row['search_type']:<12}{row['dict_ms']:>10.1f}{row['record_ms']:>11.1f}"
+              f"{row['dict_bytes_per_item']:>13.0f}{row['record_bytes_per_item']:>15.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
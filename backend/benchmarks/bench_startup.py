@@ -0,0 +1,114 @@
+import argparse, os, subprocess, sys
+
+
+"""
+Cold start import cost of the tmfy entry point, measured with `python -X importtime`
+in fresh interpreters, fails (exit 1) when it goes over the budget
+    python -m backend.benchmarks.bench_startup --budget-ms 30
+    python -m backend.benchmarks.bench_startup --module backend.commands --budget-ms 150
+Besides the time budget, a few heavy modules must not be loaded at all by the
+thin client path (--forbid, flask/requests by default)
+"""
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_MODULE = "backend.daemon.client"
+DEFAULT_FORBIDDEN = ("flask", "requests", "urllib3", "dotenv")
+# written to stderr right before the measured import, interpreter start up (site,
+# .pth files) is logged before it and not counted
+MARKER = "-- tmfy import start --"
+
+
+"""
+Function: parse the stderr of `python -X importtime`
+Returns: list of (module, self_us, cumulative_us, depth) in import order
+         depth 0 are the modules imported directly by the measured code
+         with a MARKER line in stderr only what follows it is parsed
+"""
+def parse_importtime(stderr):
+    if MARKER in stderr:
+        stderr = stderr.split(MARKER, 1)[1]
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # one space for top level imports, two more per nesting level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+# Returns the importtime rows for one fresh interpreter importing module
+def measure_once(module):
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c",
+         f"import sys; sys.stderr.write({MARKER!r} + '\\n'); sys.stderr.flush(); import {module}"],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+"""
+Function: import module in `runs` fresh interpreters
+Returns: {"module", "total_ms" (best run), "runs_ms", "heaviest": [(name, cumulative ms)], "loaded": set}
+         the best run is reported, the others mostly measure disk cache noise
+"""
+def measure(module, runs=5, top=10):
+    best = None
+    runs_ms = []
+    for _ in range(runs):
+        rows = measure_once(module)
+        total_us = sum(cumulative for name, _, cumulative, depth in rows if depth == 0)
+        runs_ms.append(total_us / 1000)
+        if best is None or total_us < best[0]:
+            best = (total_us, rows)
+
+    total_us, rows = best
+    heaviest = sorted(((name, cumulative / 1000) for name, _, cumulative, _ in rows), key=lambda row: -row[1])
+    return {
+        "module": module,
+        "total_ms": total_us / 1000,
+        "runs_ms": runs_ms,
+        "heaviest": heaviest[:top],
+        "loaded": {name for name, _, _, _ in rows}
+    }
+
+
+# top level packages of `forbidden` that ended up imported
+def forbidden_loaded(loaded, forbidden):
+    return sorted({name.split(".")[0] for name in loaded} & set(forbidden))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="bench_startup", description="Import time budget for the tmfy entry point")
+    parser.add_argument("--module", default=DEFAULT_MODULE, help="module to import cold")
+    parser.add_argument("--budget-ms", type=float, default=30.0, help="fail when the import takes longer")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="how many of the heaviest imports to list")
+    parser.add_argument("--forbid", default=",".join(DEFAULT_FORBIDDEN),
+                        help="comma separated packages that must not be imported ('' to allow everything)")
+    args = parser.parse_args(argv)
+
+    report = measure(args.module, args.runs, args.top)
+    print(f"import {report['module']}: {report['total_ms']:.1f} ms "
+          f"(best of {args.runs}, budget {args.budget_ms:.1f} ms)")
+    print(f"{'module':<48}{'cumulative ms':>14}")
+    print("-" * 62)
+    for name, cumulative_ms in report["heaviest"]:
+        print(f"{name:<48}{cumulative_ms:>14.2f}")
+
+    status = 0
+    forbidden = forbidden_loaded(report["loaded"], [name for name in args.forbid.split(",") if name])
+    if forbidden:
+        print(f"\nFAIL: {args.module} imports {', '.join(forbidden)}")
+        status = 1
+    if report["total_ms"] > args.budget_ms:
+        print(f"\nFAIL: {report['total_ms']:.1f} ms is over the {args.budget_ms:.1f} ms budget")
+        status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,478 @@
+import argparse, threading
+from functools import cached_property
+
+from backend import metrics, profiler
+from backend.profiler import span
+from backend.search.focus_session import parse_ref, parse_refs
+from backend.search.records import make_record
+
+
+"""
+The tmfy command set, shared by the one-shot cli (tmfy.py) and the daemon
+(backend/daemon/server.py). Commands write to the `out` stream they are given
+instead of stdout, so the daemon can send the output back over its socket
+"""
+
+
+class CommandExit(Exception):
+    def __init__(self, status=0):
+        super().__init__(status)
+        self.status = status
+
+
+# argparse prints usage/errors to sys.stdout/sys.stderr and calls sys.exit,
+# neither works for the daemon, so both go through `out` / CommandExit instead
+class CommandParser(argparse.ArgumentParser):
+    def __init__(self, out, **kwargs):
+        self.out = out
+        super().__init__(**kwargs)
+
+
+    def _print_message(self, message, file=None):
+        if message:
+            self.out.write(message)
+
+
+    def exit(self, status=0, message=None):
+        if message:
+            self._print_message(message)
+        raise CommandExit(status)
+
+
+class CommandContext:
+    """
+    Everything a command needs (auth, pooled session, search, player...)
+    Parts are built on first use, a one-shot `tmfy --help` never touches tokens.json
+    The daemon keeps one context alive, so tokens, warm connections, caches and the
+    search focus survive between commands
+    """
+    def __init__(self, auth=None):
+        if auth is not None:
+            self.auth = auth
+        self._lock = threading.Lock()
+
+
+    @cached_property
+    def auth(self):
+        with span("auth"):
+            from backend.Auth import Auth
+            return Auth()
+
+
+    @cached_property
+    def session(self):
+        return self.auth.session
+
+
+    @cached_property
+    def search(self):
+        with span("import", module="backend.api"):
+            from backend import Search
+        return Search(self.auth.token, session=self.session)
+
+
+    @cached_property
+    def player(self):
+        with span("import", module="backend.api"):
+            from backend import Player
+        return Player(self.auth.token, session=self.session)
+
+
+    @cached_property
+    def search_manager(self):
+        with span("import", module="backend.search.search_manager"):
+            from backend.search.search_manager import SearchManager
+        manager = SearchManager(self.auth.token, session=self.session)
+        manager.focus = self.focus_session.focus
+        return manager
+
+
+    # focus + last numbered result list, shared with other tmfy processes through the session file
+    @cached_property
+    def focus_session(self):
+        from backend.search.focus_session import FocusSession
+        return FocusSession().load()
+
+
+    # build every part up front (daemon start), cached_property is not thread safe
+    def warm(self):
+        with self._lock:
+            for name in ("auth", "session", "search", "player", "focus_session", "search_manager"):
+                getattr(self, name)
+
+
+    # a long lived context outlives access tokens, refresh ahead of time before each command
+    # and pick up a focus another tmfy process may have written meanwhile
+    def refresh(self):
+        if "auth" in self.__dict__ and self.auth.token:
+            self.auth.ensure_fresh_token()
+        if "focus_session" in self.__dict__:
+            self.focus_session.load()
+            if "search_manager" in self.__dict__:
+                self.search_manager.focus = self.focus_session.focus
+
+
+    # a one-shot command ends here: background work (catalog writes) lands before the process goes
+    def close(self):
+        if "search_manager" in self.__dict__:
+            self.search_manager.catalog.flush()
+
+
+def build_parser(out):
+    parser = CommandParser(
+        out,
+        prog="Tmfy",
+        description="Get an artist's discography",
+        epilog="source code: git@github.com:Jonathan03ant/TermTify.git")
+
+    # Defining the CLI Structure (see CLI.txt)
+    # Example: Tmfy search "Ariana Grande" "Albums"
+             # Tmfy search "Ariana Grande" "Recently_Played"
+             # Tmfy search -ar Jay-Z  -->  Tmfy search albums  -->  Tmfy play #1 -sf
+             # Tmfy -tr #1  -->  Tmfy play #3
+
+    parser.add_argument('action', type=str, nargs='?', help="The action to perform: search (sc), play (pl), stats")
+    parser.add_argument('artist_name', type=str, nargs='?', help="The name of artist to search for, albums / tracks of the focus, or #N (#1,3) to play")
+    parser.add_argument('explanation', type=str, nargs='?', help="The explanation of the action (Search Artist Albums, Search Artist recently...)")
+    parser.add_argument('-ar', '--artist', nargs='+', help="Focus an artist")
+    parser.add_argument('-al', '--album', nargs='+', help="Search albums (title and/or artist), the first one becomes the focus")
+    parser.add_argument('-tr', '--track', nargs='*', help="#N: tracks of album #N, otherwise search tracks")
+    parser.add_argument('-sf', '--shuffle', action='store_true', help="Shuffle when playing")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--local', dest='mode', action='store_const', const='local',
+                        help="Answer from the local catalog of everything fetched before, no request")
+    source.add_argument('--hybrid', dest='mode', action='store_const', const='hybrid',
+                        help="Print local hits right away, then the results from spotify")
+    parser.add_argument('--profile', action='store_true',
+                        help="Print where the time went: auth, name resolution, http calls, normalization, rendering")
+    parser.add_argument('--trace', metavar='FILE',
+                        help="With --profile: also write every span as a chrome trace (json) to FILE")
+    parser.add_argument('--prometheus', action='store_true',
+                        help="tmfy stats: dump the metrics in prometheus text format")
+    return parser
+
+
+"""
+Function: parse and run one tmfy command
+Returns: exit status (0 on success)
+Params:
+        @argv: command line arguments without the program name
+        @context: CommandContext holding auth / session / search / player
+        @out: text stream the command output goes to
+"""
+def run_command(argv, context, out):
+    parser = build_parser(out)
+    try:
+        # options may come after the positionals: tmfy search --local jay z, tmfy play #1 -sf
+        arguments = parser.parse_intermixed_args(argv)
+    except CommandExit as e:
+        return e.status
+    if not (arguments.profile or arguments.trace):
+        return execute(arguments, parser, context, out)
+
+    recorder = profiler.enable()
+    try:
+        return execute(arguments, parser, context, out)
+    finally:
+        profiler.disable()
+        recorder.report(out)
+        if arguments.trace:
+            recorder.write_trace(arguments.trace)
+            print(f"trace written to {arguments.trace}", file=out)
+
+
+def execute(arguments, parser, context, out):
+    try:
+        context.refresh()
+        dispatch(arguments, parser, context, out)
+    except CommandExit as e:
+        return e.status
+    finally:
+        # cumulative across runs, every command adds what it recorded
+        metrics.registry().flush()
+    return 0
+
+
+def fail(out, message):
+    print(message, file=out)
+    raise CommandExit(1)
+
+
+def dispatch(arguments, parser, context, out):
+    if arguments.action in ("search", "sc") or (arguments.action is None and arguments.track is not None):
+        if arguments.artist:
+            focus_artist(" ".join(arguments.artist), arguments.mode, context, out)
+        elif arguments.album:
+            search_albums(" ".join(arguments.album), arguments.mode, context, out)
+        elif arguments.track is not None:
+            search_tracks(arguments.track, arguments.artist_name, arguments.mode, context, out)
+        elif arguments.explanation is None and arguments.artist_name in ("albums", "al", "tracks", "tr"):
+            list_focus(arguments.artist_name, context, out)
+        elif arguments.mode == "local" and arguments.artist_name:
+            search_local(" ".join(filter(None, [arguments.artist_name, arguments.explanation])), context, out)
+
+        elif arguments.explanation == "Albums" or arguments.explanation == "dsc":
+            # streams the whole discography, albums are printed as their batch arrives
+            from backend.api import IncompleteDiscography
+            with span("discography"):
+                albums = 0
+                try:
+                    for album in context.search.iter_artist_descography(arguments.artist_name):
+                        albums += 1
+                        print(f"Album Name: {album['name']} | Release Date: {album['release_date']} | Tracks: {album.get('total_tracks')}", file=out)
+                except IncompleteDiscography as e:
+                    fail(out, str(e))
+            if not albums:
+                fail(out, f"No albums found for {arguments.artist_name}")
+
+        elif arguments.explanation == "Recently_Played" or arguments.explanation == "rp":
+            pass
+
+        elif arguments.explanation == "Top" or arguments.explanation == "tt":
+            top_track = context.search.get_artist_top_tracks(arguments.artist_name)
+            if top_track is None:
+                fail(out, f"Could not fetch top tracks for {arguments.artist_name}")
+            with span("render", items=len(top_track)):
+                for track in top_track:
+                    print(f"Track Name: {track['name']} | Artist: {track['artists'][0]['name']} | Album: {track['album']['name']} ", file=out)
+
+        elif arguments.explanation == "latest" or arguments.explanation == "lts":
+            pass
+
+        else:
+            parser.error("Invalid Explanation")
+    elif arguments.action == "play" or arguments.action == "pl":
+        refs = parse_refs(arguments.artist_name)
+        more = parse_refs(arguments.explanation) if arguments.explanation else []
+        if refs is not None and more is not None:
+            play_refs(refs + more, arguments.shuffle, context, out)
+        elif arguments.artist_name and arguments.explanation:
+            track_id = context.search.get_track_id(arguments.artist_name, arguments.explanation)
+            if not track_id:
+                fail(out, f"Track not found: {arguments.explanation} by {arguments.artist_name}")
+            if not context.player.play_track(track_id):
+                fail(out, f"Could not play {arguments.explanation}")
+            print(f"Playing {arguments.explanation}", file=out)
+        else:
+            parser.error("Please specify a track name using --track.")
+    elif arguments.action == "stats":
+        show_stats(arguments.artist_name, arguments.prometheus, out)
+    else:
+        parser.print_help()
+
+
+# FOCUS / NUMBERED RESULTS
+    # every numbered list printed here is remembered in the session file,
+    # `#N` afterwards resolves to the stored id / uri, no search by name again
+
+# remote (default), local catalog only, or local hits first while the request runs
+def run_search(query, search_type, limit, mode, context, out):
+    manager = context.search_manager
+    if mode == "local":
+        return manager.run_local(query, search_type, limit)
+    if mode == "hybrid":
+        return manager.run_hybrid(query, search_type, limit, on_local=lambda local: show_provisional(local, out))
+    return manager.run(query, search_type, limit=limit)
+
+
+def focus_artist(artist_name, mode, context, out):
+    result = run_search(artist_name, "artists", 1, mode, context, out)
+    if not result.get("success") or not result["result"]:
+        fail(out, result.get("error") or "Artist not found")
+    artist = result["result"][0]
+    context.search.id_index.put_artist(artist_name, artist.id)
+    set_focus(context, artist, "artist")
+    print(f"Focus: {artist.artist_name}", file=out)
+
+
+def search_albums(query, mode, context, out):
+    result = run_search(query, "albums", 10, mode, context, out)
+    if not result.get("success") or not result["result"]:
+        fail(out, result.get("error") or "Album not found")
+    albums = result["result"]
+    set_focus(context, albums[0], "album", save=False)
+    show_albums(albums, context, out)
+
+
+def search_tracks(words, artist_name, mode, context, out):
+    ref = words[0] if len(words) == 1 else None
+    if parse_ref(ref) is not None:
+        item = context.focus_session.resolve(ref)
+        if item is None:
+            fail(out, f"No {ref} in the last results, search first")
+        if item["type"] == "album":
+            set_focus(context, item, "album", save=False)
+            return show_album_tracks(item, context, out)
+        if item["type"] == "artist":
+            set_focus(context, item, "artist", save=False)
+            return show_top_tracks(item["id"], context, out)
+        fail(out, f"{ref} is a {item['type']}, pick an album or an artist")
+
+    if not words:
+        fail(out, "Which track? tmfy search -tr NAME")
+    query = " ".join(words)
+    if artist_name:
+        query, limit = f"track:{query} artist:{artist_name}", 5
+    else:
+        limit = 10
+    result = run_search(query, "tracks", limit, mode, context, out)
+    if not result.get("success") or not result["result"]:
+        fail(out, result.get("error") or "Track not found")
+    show_tracks(result["result"], context, out)
+
+
+# `tmfy search albums` / `tmfy search tracks`: drill down from the focus by id
+def list_focus(what, context, out):
+    focus = context.focus_session.focus
+    if not focus:
+        fail(out, "Nothing in focus, start with: tmfy search -ar NAME or tmfy search -al TITLE")
+    if what in ("albums", "al"):
+        if focus["type"] != "artist":
+            fail(out, f"Focus is the {focus['type']} {focus['name']}, albums need an artist focus")
+        page = context.search.get_artist_album_page(focus["id"], limit=10)
+        if page is None:
+            fail(out, "Could not fetch albums")
+        albums = [make_record(album, "albums") for album in page["items"]]
+        context.search_manager.catalog.upsert_later(albums)
+        return show_albums(albums, context, out)
+    if focus["type"] == "album":
+        return show_album_tracks(focus, context, out)
+    return show_top_tracks(focus["id"], context, out)
+
+
+# every type at once, answered by the local catalog
+def search_local(query, context, out):
+    result = context.search_manager.run_local(query, None, limit=10)
+    if not result.get("success") or not result["result"]:
+        fail(out, result.get("error") or "Nothing in the local catalog matches")
+    for number, record in enumerate(result["result"], 1):
+        print(f"#{number} [{record.search_type[:-1]}] {item_line(record)}", file=out)
+    context.focus_session.set_results("items", result["result"])
+
+
+# @album: compact album {"id", "uri", ...}, playing one of its tracks plays on through the album
+def show_album_tracks(album, context, out):
+    tracks = context.search.get_album_tracks(album["id"])
+    if tracks is None:
+        fail(out, "Could not fetch tracks")
+    records = [make_record(track, "tracks") for track in tracks]
+    context.search_manager.catalog.upsert_later(records)
+    show_tracks(records, context, out, context_uri=album.get("uri"))
+
+
+def show_top_tracks(artist_id, context, out):
+    tracks = context.search.get_artist_top_tracks_by_id(artist_id)
+    if tracks is None:
+        fail(out, "Could not fetch top tracks")
+    records = [make_record(track, "tracks") for track in tracks]
+    context.search_manager.catalog.upsert_later(records)
+    show_tracks(records, context, out)
+
+
+def show_albums(albums, context, out):
+    with span("render", items=len(albums)):
+        for number, album in enumerate(albums, 1):
+            print(f"#{number} {item_line(album)}", file=out)
+        context.focus_session.set_results("albums", albums)
+
+
+def show_tracks(tracks, context, out, context_uri=None):
+    with span("render", items=len(tracks)):
+        for number, track in enumerate(tracks, 1):
+            print(f"#{number} {item_line(track)}", file=out)
+        context.focus_session.set_results("tracks", tracks, context=context_uri)
+
+
+# hybrid mode: local hits are not numbered, the remote list that follows is what #N refers to
+def show_provisional(local, out):
+    for record in local.get("result", []):
+        print(f"~ {item_line(record)}", file=out)
+    if local.get("result"):
+        print("...", file=out)
+        out.flush()
+
+
+def item_line(record):
+    if record.search_type == "albums":
+        return f"{record.album_name}, {record.artist_names}, {record.release_date}"
+    if record.search_type == "tracks":
+        return f"{record.track_name}, {record.artist_names}, {format_duration(record.duration_ms)}"
+    if record.search_type == "artists":
+        return record.artist_name
+    if record.search_type == "playlists":
+        return f"{record.playlist_name}, {record.owner}"
+    if record.search_type == "shows":
+        return f"{record.show_name}, {record.publisher}"
+    return f"{record.name}, {record.show.get('name')}"
+
+
+def set_focus(context, item, item_type, save=True):
+    context.focus_session.set_focus(item, item_type, save=save)
+    context.search_manager.focus = context.focus_session.focus
+
+
+# `play #N`, `play #1,3,4` / `play #1 #3`: one play call whatever the count
+def play_refs(refs, shuffle, context, out):
+    items = []
+    for ref in refs:
+        item = context.focus_session.resolve(ref)
+        if item is None:
+            fail(out, f"No #{ref} in the last results, search first")
+        items.append(item)
+    player = context.player
+
+    if len(items) == 1 and items[0]["type"] != "track":
+        # album / artist / playlist: shuffle on or explicitly off
+        played = player.play(context_uri=items[0]["uri"], shuffle=shuffle)
+    elif any(item["type"] != "track" for item in items):
+        fail(out, "Only tracks can be played together")
+    elif len(items) == 1 and (context.focus_session.results or {}).get("context"):
+        # a track of a listed album: start there and play on through the album
+        played = player.play(context_uri=context.focus_session.results["context"], offset=items[0]["uri"],
+                             shuffle=shuffle or None)
+    else:
+        played = player.play_tracks([item["uri"] for item in items], shuffle=shuffle or None)
+
+    name = items[0]["name"] if len(items) == 1 else f"{len(items)} tracks"
+    if not played:
+        fail(out, f"Could not play {name}")
+    print(f"Playing {name}" + (" (shuffle)" if shuffle else ""), file=out)
+
+
+# `tmfy stats`, `tmfy stats --prometheus`, `tmfy stats reset`
+def show_stats(what, prometheus, out):
+    registry = metrics.registry()
+    if what == "reset":
+        registry.reset()
+        print("Metrics reset", file=out)
+        return
+    registry.flush()
+    total = registry.load()
+    if prometheus:
+        out.write(total.to_prometheus())
+        return
+
+    summary = total.summary()
+    print(f"{summary['requests']} requests recorded in {total.path}", file=out)
+    if summary["endpoints"]:
+        print(f"{'endpoint':<34} {'requests':>8} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'bytes':>10}",
+              file=out)
+        for row in summary["endpoints"]:
+            p50, p95, p99 = (f"{row[q] * 1000:.1f}" if row[q] is not None else "-" for q in ("p50", "p95", "p99"))
+            print(f"{row['endpoint'][:34]:<34} {row['requests']:>8} {row['errors']:>6} {p50:>8} {p95:>8} {p99:>8} "
+                  f"{row['bytes']:>10}", file=out)
+        print("status: " + " ".join(f"{status}={count}" for status, count in summary["statuses"].items()), file=out)
+    if summary["bytes_saved"]:
+        print(f"bytes saved by 304 revalidation: {summary['bytes_saved']}", file=out)
+    if summary["caches"]:
+        print("cache hit ratio: " + ", ".join(
+            f"{name} {cache['ratio']:.0%} ({cache['hit']}/{cache['hit'] + cache['miss']})"
+            for name, cache in sorted(summary["caches"].items())), file=out)
+    if summary["search_errors"]:
+        print("search errors: " + " ".join(f"{reason}={count}"
+                                           for reason, count in sorted(summary["search_errors"].items())), file=out)
+
+
+def format_duration(duration_ms):
+    seconds = (duration_ms or 0) // 1000
+    return f"{seconds // 60}:{seconds % 60:02d}"
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+from backend import metrics
+from backend.search.search_cache import SearchCache
+from backend.testing.fake_spotify import FakeSpotify
+from backend.transport import revalidation, scheduler
+
+
+# the fake api is local, don't let the production rate limit / backoff slow the suite down
+@pytest.fixture(autouse=True)
+def fast_scheduler():
+    previous = scheduler.default_scheduler()
+    scheduler.set_default_scheduler(scheduler.RequestScheduler(rate=10000, burst=10000, backoff_base=0.001))
+    yield
+    scheduler.set_default_scheduler(previous)
+
+
+# everything that defaults to .tmfy_cache (catalog, search cache, ids, device...) stays in tmp_path,
+# a test never writes into the checkout
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("TMFY_CACHE_DIR", str(tmp_path / "tmfy_cache"))
+
+
+# metrics recorded by a test stay in that test's own metrics.json
+@pytest.fixture(autouse=True)
+def isolated_metrics(tmp_path):
+    previous = metrics.registry()
+    metrics.set_registry(metrics.MetricsRegistry(str(tmp_path / "metrics.json")))
+    yield
+    metrics.set_registry(previous)
+
+
+# no etag / stored result leaks from one test into the next
+@pytest.fixture(autouse=True)
+def isolated_validators(tmp_path):
+    previous = revalidation.default_revalidator()
+    revalidation.set_default_revalidator(revalidation.Revalidator(SearchCache(cache_dir=str(tmp_path / "validators"))))
+    yield
+    revalidation.set_default_revalidator(previous)
+
+
+# the fake api, from the test's own working directory (tokens.json, session files... are relative to it)
+@pytest.fixture
+def fake(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with FakeSpotify() as fake:
+        yield fake
+
+
+# a valid tokens.json for `fake`, for everything that goes through Auth (commands, daemon)
+@pytest.fixture
+def logged_in(fake):
+    token_data = fake.issue_token()
+    with open("tokens.json", "w") as file:
+        json.dump(token_data, file)
+    return token_data
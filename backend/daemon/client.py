@@ -0,0 +1,67 @@
+import json, os, socket
+
+
+"""
+Thin client side of `tmfy daemon`, standard library only so it stays cheap to import
+
+Wire format, one json object per line:
+    client --> daemon    {"argv": ["search", "Jay-Z", "tt"]}
+    daemon --> client    {"out": "text"}     (any number, streamed as the command prints)
+                         {"exit": 0}         (last message)
+"""
+
+# the daemon has to be asked from the directory holding tokens.json / .tmfy_cache,
+# same as the one-shot cli, so the socket lives next to the cache by default
+def socket_path():
+    path = os.getenv("TMFY_SOCKET") or os.path.join(os.getenv("TMFY_CACHE_DIR", ".tmfy_cache"), "tmfy.sock")
+    return os.path.abspath(path)
+
+
+def encode(message):
+    return (json.dumps(message) + "\n").encode("utf-8")
+
+
+# Returns a connected socket, or None when no daemon is listening on path
+def connect(path=None, timeout=None):
+    path = path or socket_path()
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(path)
+    except (FileNotFoundError, ConnectionRefusedError, OSError):
+        sock.close()
+        return None
+    return sock
+
+
+"""
+Function: run a tmfy command inside the daemon
+Returns: the command's exit status, or None when there is no daemon to talk to
+         (the caller then runs the command itself)
+Params:
+        @argv: tmfy arguments without the program name
+        @out: text stream the command output is copied to as it arrives
+"""
+def send_command(argv, out, path=None, timeout=None):
+    sock = connect(path, timeout)
+    if sock is None:
+        return None
+    with sock, sock.makefile("rb") as replies:
+        sock.sendall(encode({"argv": list(argv)}))
+        for line in replies:
+            message = json.loads(line)
+            if "out" in message:
+                out.write(message["out"])
+                out.flush()
+            elif "exit" in message:
+                return message["exit"]
+    # daemon went away mid command
+    return 1
+
+
+def is_running(path=None):
+    sock = connect(path, timeout=1)
+    if sock is None:
+        return False
+    sock.close()
+    return True
@@ -0,0 +1,143 @@
+import json, os, socketserver, threading, time
+from contextlib import redirect_stdout
+
+from backend.commands import CommandContext, run_command
+from backend.daemon.client import connect, encode, socket_path
+
+
+class SocketWriter:
+    """
+    File like `out` for run_command, every write goes straight to the client
+    as an {"out": text} message, so long commands (dsc) stream
+    """
+    def __init__(self, wfile):
+        self.wfile = wfile
+        self.closed = False
+
+
+    def write(self, text):
+        if text and not self.closed:
+            try:
+                self.wfile.write(encode({"out": text}))
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                # client gave up (ctrl-c), let the command finish quietly
+                self.closed = True
+        return len(text)
+
+
+    def flush(self):
+        pass
+
+
+class CommandHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        out = SocketWriter(self.wfile)
+        try:
+            argv = json.loads(line).get("argv", [])
+            status = self.server.daemon.execute(argv, out)
+        except Exception as e:
+            out.write(f"tmfy daemon: {type(e).__name__}: {e}\n")
+            status = 1
+        if not out.closed:
+            self.wfile.write(encode({"exit": status}))
+
+
+class UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class TmfyDaemon:
+    """
+    Long running tmfy process listening on a unix socket (see client.py for the protocol)
+    Holds one CommandContext for its whole life: auth state, the pooled session,
+    search cache, id index and the current search focus stay warm between commands
+    Commands run one at a time (they share that context), clients connecting meanwhile
+    wait their turn, `daemon status` / `daemon stop` are answered right away
+        tmfy daemon            run in the foreground
+        tmfy daemon status     ask a running daemon for its stats
+        tmfy daemon stop       shut it down
+    """
+    def __init__(self, path=None, context=None):
+        self.path = path or socket_path()
+        self.context = context if context is not None else CommandContext()
+        self.started_at = None
+        self.commands = 0
+        self.server = None
+        self._lock = threading.Lock()
+        # one command at a time on the shared context
+        self._command_lock = threading.Lock()
+
+
+    # bind the socket, a leftover socket file from a dead daemon is replaced
+    def start(self):
+        if connect(self.path, timeout=1) is not None:
+            raise RuntimeError(f"tmfy daemon already running on {self.path}")
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        self.context.warm()
+        self.server = UnixServer(self.path, CommandHandler)
+        self.server.daemon = self
+        self.started_at = time.time()
+        return self
+
+
+    def serve_forever(self):
+        if self.server is None:
+            self.start()
+        try:
+            self.server.serve_forever(poll_interval=0.1)
+        finally:
+            self.server.server_close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+    def shutdown(self):
+        if self.server is not None:
+            self.server.shutdown()
+
+
+    """
+    Function: run one client request
+    Returns: exit status sent back to the client
+    """
+    def execute(self, argv, out):
+        with self._lock:
+            self.commands += 1
+        if argv[:1] == ["daemon"]:
+            return self.control(argv[1:], out)
+        # the library reports problems with print(), they belong to the client that asked,
+        # not the daemon's console (stdout is only swapped while the lock is held)
+        with self._command_lock, redirect_stdout(out):
+            return run_command(argv, self.context, out)
+
+
+    def control(self, argv, out):
+        action = argv[0] if argv else "status"
+        if action == "status":
+            out.write(json.dumps(self.status(), indent=2) + "\n")
+            return 0
+        if action == "stop":
+            out.write("tmfy daemon stopping\n")
+            # shutdown() waits for serve_forever, which cannot return while we are inside it
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return 0
+        out.write(f"unknown daemon command: {action}\n")
+        return 2
+
+
+    def status(self):
+        return {
+            "pid": os.getpid(),
+            "socket": self.path,
+            "uptime": time.time() - self.started_at if self.started_at else 0.0,
+            "commands": self.commands,
+            "session": self.context.session.pool_stats(),
+            "search_cache": self.context.search_manager.cached_result.stats()
+        }
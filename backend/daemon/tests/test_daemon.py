@@ -0,0 +1,100 @@
+import io, json, threading
+
+import pytest
+from backend.daemon import client
+from backend.daemon.server import TmfyDaemon
+from backend.testing.cli import tmfy
+from backend.testing.fake_spotify import FakeSpotify
+
+
+@pytest.fixture
+def daemon(logged_in, tmp_path):
+    server = TmfyDaemon(path=str(tmp_path / "tmfy.sock")).start()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    thread.join(5)
+
+
+def send(server, *argv):
+    out = io.StringIO()
+    status = client.send_command(list(argv), out, path=server.path)
+    return status, out.getvalue()
+
+
+def test_commands_run_on_warm_state(fake, daemon):
+    status, first = send(daemon, "search", "Jay-Z", "tt")
+    assert status == 0
+    assert first.count("Track Name:") == 10
+    fake.reset_counts()
+
+    status, second = send(daemon, "search", "Jay-Z", "tt")
+    assert second == first
+    # the artist id is still known and the connection is still open
+    assert sum(fake.request_counts.values()) == 1
+    assert daemon.context.session.pool_stats()["connections_opened"] == 1
+
+
+def test_output_streams_and_errors_come_back(daemon):
+    status, output = send(daemon, "search", "Jay-Z", "dsc")
+    assert status == 0 and output.count("Album Name:") == 35
+    status, output = send(daemon, "search", "Jay-Z", "nope")
+    assert status == 2 and "Invalid Explanation" in output
+
+
+def test_status_and_stop(daemon):
+    status, output = send(daemon, "daemon", "status")
+    assert status == 0 and json.loads(output)["socket"] == daemon.path
+    assert send(daemon, "daemon", "stop")[0] == 0
+
+
+def test_no_daemon_means_local_fallback(tmp_path, fake, logged_in):
+    assert client.send_command(["search", "Jay-Z", "tt"], io.StringIO(), path=str(tmp_path / "none.sock")) is None
+    status, lines = tmfy("search", "Jay-Z", "tt")
+    assert status == 0
+    assert sum(line.count("Track Name:") for line in lines) == 10
+
+
+def test_second_daemon_refuses_to_start(daemon):
+    with pytest.raises(RuntimeError):
+        TmfyDaemon(path=daemon.path).start()
+
+
+def test_failures_reach_the_client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # no tokens.json: every api call is a 401
+    with FakeSpotify():
+        server = TmfyDaemon(path=str(tmp_path / "tmfy.sock")).start()
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            status, output = send(server, "search", "Jay-Z", "tt")
+            assert status == 1
+            assert "Error searching artist: 401" in output and "Could not fetch top tracks" in output
+            status, output = send(server, "play", "Jay-Z", "Song")
+            assert status == 1 and "Track not found" in output
+        finally:
+            server.shutdown()
+            thread.join(5)
+
+
+def test_commands_are_serialized(daemon, monkeypatch):
+    running, overlaps = [], []
+    original = daemon.context.refresh
+
+    def refresh():
+        if running:
+            overlaps.append(1)
+        running.append(1)
+        threading.Event().wait(0.05)
+        original()
+        running.pop()
+
+    monkeypatch.setattr(daemon.context, "refresh", refresh)
+    threads = [threading.Thread(target=send, args=(daemon, "search", "Jay-Z", "tt")) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    assert overlaps == []
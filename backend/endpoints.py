@@ -0,0 +1,49 @@
+import os, threading
+
+# Base urls for the Spotify Web API and the accounts service.
+# Both can be overridden from the environment (or .env), e.g. to point the
+# client at the local stand-in in backend/testing/fake_spotify.py
+DEFAULT_API_URL = "https://api.spotify.com/v1"
+DEFAULT_ACCOUNTS_URL = "https://accounts.spotify.com"
+
+_env_loaded = False
+_env_lock = threading.Lock()
+
+
+# .env is read once, on first use instead of at import time (python-dotenv costs ~10ms to import)
+def load_env():
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _env_lock:
+        if not _env_loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            _env_loaded = True
+
+
+def api_url(path=""):
+    load_env()
+    return os.getenv("SPOTIFY_API_URL", DEFAULT_API_URL).rstrip("/") + path
+
+
+def accounts_url(path=""):
+    load_env()
+    return os.getenv("SPOTIFY_ACCOUNTS_URL", DEFAULT_ACCOUNTS_URL).rstrip("/") + path
+
+
+# path segments followed by an id: /artists/{id}/albums, /albums/{id}/tracks...
+ID_COLLECTIONS = {"artists", "albums", "tracks", "playlists", "shows", "episodes", "audiobooks", "chapters", "users"}
+
+
+# "https://api.spotify.com/v1/artists/0TnOYISbd1XYRBk9myaseg/albums?limit=50" --> "/v1/artists/{id}/albums"
+# one name per endpoint, ids and query strings would make every call its own
+def endpoint_template(url):
+    path = url.split("?", 1)[0]
+    if "://" in path:
+        path = "/" + path.split("://", 1)[1].partition("/")[2]
+    parts = path.strip("/").split("/")
+    for index in range(1, len(parts)):
+        if parts[index - 1] in ID_COLLECTIONS and parts[index]:
+            parts[index] = "{id}"
+    return "/" + "/".join(parts)
@@ -0,0 +1,52 @@
+import json, os, threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # no flock (windows): callers still have their in-process locks
+    fcntl = None
+
+
+"""
+Cross process lock next to a shared file (tokens.json, metrics.json...)
+    with file_lock("tokens.json"):     # flock on tokens.json.lock
+        ...read, update, atomic_write_json...
+"""
+
+
+@contextmanager
+def file_lock(path):
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", "a") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+"""
+Function: replace `path` with `data` as json, a reader never sees half a file
+          (temp file + os.replace, the temp name is per process AND thread so two
+          writers of the same file never share one)
+Params:
+        @dump_options: json.dump keyword arguments (separators, default...)
+"""
+def atomic_write_json(path, data, **dump_options):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w") as file:
+            json.dump(data, file, **dump_options)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
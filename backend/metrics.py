@@ -0,0 +1,305 @@
+import json, os, threading
+
+from backend.file_lock import atomic_write_json, file_lock
+
+
+"""
+Counters and fixed bucket histograms for everything the client does (tmfy stats)
+    tmfy_http_request_duration_seconds{method, endpoint, status}   histogram
+    tmfy_http_response_bytes_total{method, endpoint}                counter
+    tmfy_http_bytes_saved_total{endpoint}                           counter (304s, see transport/revalidation.py)
+    tmfy_cache_lookups_total{cache, result}                         counter (search / ids / devices, hit / miss)
+    tmfy_search_errors_total{reason}                                counter
+Recording is in memory, flush() adds what this process recorded to
+.tmfy_cache/metrics.json, so the numbers there are cumulative over every run
+"""
+
+# prometheus' default buckets, seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    "tmfy_http_request_duration_seconds": "Spotify api calls by endpoint and status, wall time incl. rate limit waits and retries",
+    "tmfy_http_response_bytes_total": "Response body bytes received",
+    "tmfy_http_bytes_saved_total": "Body bytes not downloaded again thanks to a 304 Not Modified",
+    "tmfy_cache_lookups_total": "Cache lookups by cache and result (hit / miss)",
+    "tmfy_search_errors_total": "Search calls that returned an error result, by reason"
+}
+
+
+def _key(name, labels):
+    return name, tuple(sorted((str(label), str(value)) for label, value in labels.items()))
+
+
+class Histogram:
+    def __init__(self, counts=None, total=0.0):
+        # one count per bucket plus +Inf, not cumulative
+        self.counts = list(counts) if counts else [0] * (len(BUCKETS) + 1)
+        self.sum = total
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def observe(self, value):
+        for index, bound in enumerate(BUCKETS):
+            if value <= bound:
+                break
+        else:
+            index = len(BUCKETS)
+        self.counts[index] += 1
+        self.sum += value
+
+    def merge(self, other):
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, other.counts)]
+        self.sum += other.sum
+
+    # linear interpolation inside the bucket, like prometheus' histogram_quantile
+    def quantile(self, q):
+        total = self.count
+        if not total:
+            return None
+        rank, seen, lower = q * total, 0, 0.0
+        for index, count in enumerate(self.counts):
+            upper = BUCKETS[index] if index < len(BUCKETS) else BUCKETS[-1]
+            if count and seen + count >= rank:
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+            lower = upper
+        return BUCKETS[-1]
+
+
+class MetricsRegistry:
+    def __init__(self, path=None):
+        self.path = path or os.path.join(os.getenv("TMFY_CACHE_DIR", ".tmfy_cache"), "metrics.json")
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+
+    def inc(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+
+    def observe(self, name, value, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+
+    # one finished http call
+    def record_request(self, method, endpoint, status, seconds, size=0):
+        self.observe("tmfy_http_request_duration_seconds", seconds, method=method, endpoint=endpoint, status=status)
+        if size:
+            self.inc("tmfy_http_response_bytes_total", size, method=method, endpoint=endpoint)
+
+
+    def record_cache(self, cache, hit):
+        self.inc("tmfy_cache_lookups_total", cache=cache, result="hit" if hit else "miss")
+
+
+    def merge(self, other):
+        with self._lock:
+            for key, value in other.counters.items():
+                self.counters[key] = self.counters.get(key, 0) + value
+            for key, histogram in other.histograms.items():
+                mine = self.histograms.get(key)
+                if mine is None:
+                    self.histograms[key] = Histogram(histogram.counts, histogram.sum)
+                else:
+                    mine.merge(histogram)
+
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "buckets": list(BUCKETS),
+                "counters": [[name, dict(labels), value] for (name, labels), value in sorted(self.counters.items())],
+                "histograms": [[name, dict(labels), histogram.counts, histogram.sum]
+                               for (name, labels), histogram in sorted(self.histograms.items())]
+            }
+
+
+    @classmethod
+    def from_dict(cls, data, path=None):
+        registry = cls(path)
+        if list(data.get("buckets") or []) != list(BUCKETS):
+            # bucket layout changed since these were written, counters still add up
+            data = dict(data, histograms=[])
+        for name, labels, value in data.get("counters", []):
+            registry.counters[_key(name, labels)] = value
+        for name, labels, counts, total in data.get("histograms", []):
+            registry.histograms[_key(name, labels)] = Histogram(counts, total)
+        return registry
+
+
+    # what is on disk, without what this process has not flushed yet
+    def load(self):
+        try:
+            with open(self.path, "r") as file:
+                return MetricsRegistry.from_dict(json.load(file), self.path)
+        except (OSError, ValueError, TypeError):
+            return MetricsRegistry(self.path)
+
+
+    """
+    Function: add this process' numbers to the file and start counting from zero
+    Returns: the cumulative registry that was written (None when it could not be)
+    """
+    def flush(self):
+        with self._lock:
+            if not self.counters and not self.histograms:
+                return None
+            pending = MetricsRegistry(self.path)
+            pending.counters, self.counters = self.counters, {}
+            pending.histograms, self.histograms = self.histograms, {}
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with file_lock(self.path):
+                total = self.load()
+                total.merge(pending)
+                atomic_write_json(self.path, total.to_dict(), separators=(",", ":"))
+            return total
+        except OSError:
+            # keep the numbers for the next flush
+            self.merge(pending)
+            return None
+
+
+    def reset(self):
+        with self._lock:
+            self.counters, self.histograms = {}, {}
+        with file_lock(self.path):
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+    """
+    Function: prometheus text exposition format (version 0.0.4)
+    Returns: the whole dump as one string
+    """
+    def to_prometheus(self):
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items())
+        lines = []
+        described = set()
+
+        def describe(name, kind):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            describe(name, "counter")
+            lines.append(f"{name}{_labels(labels)} {value}")
+        for (name, labels), histogram in histograms:
+            describe(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ("+Inf",), histogram.counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(labels + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {histogram.sum:.6f}")
+            lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+    """
+    Function: human summary for `tmfy stats`
+    Returns: {"requests", "endpoints": [{"endpoint", "requests", "errors", "bytes", "p50", "p95", "p99"}],
+              "statuses": {status: n}, "caches": {cache: {"hit", "miss", "ratio"}}, "bytes_saved",
+              "search_errors": {reason: n}}
+    """
+    def summary(self):
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = dict(self.histograms)
+        endpoints, statuses = {}, {}
+        for (name, labels), histogram in histograms.items():
+            if name != "tmfy_http_request_duration_seconds":
+                continue
+            labels = dict(labels)
+            endpoint = f"{labels.get('method')} {labels.get('endpoint')}"
+            merged = endpoints.setdefault(endpoint, {"histogram": Histogram(), "errors": 0, "bytes": 0})
+            merged["histogram"].merge(histogram)
+            status = labels.get("status")
+            statuses[status] = statuses.get(status, 0) + histogram.count
+            if not status.isdigit() or int(status) >= 400:
+                merged["errors"] += histogram.count
+
+        caches, search_errors, bytes_saved = {}, {}, 0
+        for (name, labels), value in counters.items():
+            labels = dict(labels)
+            if name == "tmfy_http_response_bytes_total":
+                endpoint = f"{labels.get('method')} {labels.get('endpoint')}"
+                endpoints.setdefault(endpoint, {"histogram": Histogram(), "errors": 0, "bytes": 0})["bytes"] += value
+            elif name == "tmfy_cache_lookups_total":
+                cache = caches.setdefault(labels.get("cache"), {"hit": 0, "miss": 0})
+                cache[labels.get("result")] = cache.get(labels.get("result"), 0) + value
+            elif name == "tmfy_http_bytes_saved_total":
+                bytes_saved += value
+            elif name == "tmfy_search_errors_total":
+                search_errors[labels.get("reason")] = search_errors.get(labels.get("reason"), 0) + value
+        for cache in caches.values():
+            lookups = cache["hit"] + cache["miss"]
+            cache["ratio"] = cache["hit"] / lookups if lookups else None
+
+        rows = []
+        for endpoint, merged in sorted(endpoints.items(), key=lambda item: -item[1]["histogram"].count):
+            histogram = merged["histogram"]
+            rows.append({
+                "endpoint": endpoint,
+                "requests": histogram.count,
+                "errors": merged["errors"],
+                "bytes": merged["bytes"],
+                "p50": histogram.quantile(0.5),
+                "p95": histogram.quantile(0.95),
+                "p99": histogram.quantile(0.99)
+            })
+        return {
+            "requests": sum(row["requests"] for row in rows),
+            "endpoints": rows,
+            "statuses": dict(sorted(statuses.items())),
+            "caches": caches,
+            "bytes_saved": bytes_saved,
+            "search_errors": search_errors
+        }
+
+
+# {"endpoint": "/v1/search", "status": "200"} --> '{endpoint="/v1/search",status="200"}'
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')) for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+# the process wide registry every call site records into
+def registry():
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = MetricsRegistry()
+    return _registry
+
+
+def set_registry(new_registry):
+    global _registry
+    with _registry_lock:
+        _registry = new_registry
@@ -0,0 +1,178 @@
+import json, os, threading, time, weakref
+
+from backend import metrics
+from backend.endpoints import api_url
+from backend.file_lock import atomic_write_json
+from backend.transport.revalidation import default_revalidator
+
+
+"""
+Spotify Connect devices, looked up once and reused (.tmfy_cache/device.json)
+    devices:   /me/player/devices, kept for `ttl` seconds
+    target:    the last active device id, remembered across processes so a play
+               command is a single PUT instead of devices --> play
+A 404 / "device not found" from a player command invalidates both
+One registry per SpotifySession, Auth.is_token_valid fills the same one
+"""
+
+# devices come and go (phone locked, speaker off), a short ttl is enough to
+# cover a burst of commands without serving a stale list for long
+DEVICE_TTL = 30
+
+_registries = weakref.WeakKeyDictionary()
+_registries_lock = threading.Lock()
+
+
+# the registry shared by every Player / Auth riding on `session`
+def registry_for(session):
+    with _registries_lock:
+        registry = _registries.get(session)
+        if registry is None:
+            registry = _registries[session] = DeviceRegistry(session)
+        return registry
+
+
+# the device playback should go to: the active one, else the first usable one
+def pick_device(devices):
+    usable = [device for device in devices or [] if device.get("id") and not device.get("is_restricted")]
+    for device in usable:
+        if device.get("is_active"):
+            return device
+    return usable[0] if usable else None
+
+
+# spotify answers 404 both for an unknown device id and for "no active device"
+def is_device_error(res):
+    return res is not None and res.status_code == 404
+
+
+class DeviceRegistry:
+    def __init__(self, session, ttl=DEVICE_TTL, path=None):
+        self.session = session
+        self.ttl = ttl
+        self.path = path or os.path.join(os.getenv("TMFY_CACHE_DIR", ".tmfy_cache"), "device.json")
+        self.fetches = 0
+        self.hits = 0
+        self.invalidations = 0
+        self._devices = None
+        self._fetched_at = 0.0
+        self._device_id = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+
+    """
+    Function: the user's devices, from memory while younger than ttl
+    Returns: list of device objects, None when spotify could not be asked
+    Params:
+            @refresh: skip the cached list
+    """
+    def devices(self, refresh=False):
+        with self._lock:
+            hit = not refresh and self._fresh()
+            if hit:
+                self.hits += 1
+                devices = list(self._devices)
+        metrics.registry().record_cache("devices", hit)
+        if hit:
+            return devices
+        res, devices = default_revalidator().get(self.session, api_url('/me/player/devices'),
+                                                 normalize=lambda res: res.json().get('devices', []))
+        if devices is None:
+            print(f"Error fetching devices: {res.status_code}")
+            return None
+        return self.store(devices)
+
+
+    # a devices list fetched elsewhere (Auth.is_token_valid) is just as good
+    def store(self, devices):
+        devices = list(devices or [])
+        with self._lock:
+            self.fetches += 1
+            self._devices = devices
+            self._fetched_at = time.monotonic()
+        device = pick_device(devices)
+        if device is not None and device.get("is_active"):
+            self.remember(device["id"])
+        return list(devices)
+
+
+    """
+    Function: device id a player command should target
+    Returns: the remembered id (no request), else the active / first device
+             from the devices list, None when there is none
+    """
+    def target_device_id(self):
+        remembered = self.remembered()
+        if remembered is not None:
+            return remembered
+        device = pick_device(self.devices())
+        if device is None:
+            return None
+        self.remember(device["id"])
+        return device["id"]
+
+
+    def remembered(self):
+        with self._lock:
+            if not self._loaded:
+                self._loaded = True
+                try:
+                    with open(self.path, "r") as file:
+                        self._device_id = json.load(file).get("id")
+                except (OSError, ValueError, AttributeError):
+                    self._device_id = None
+            return self._device_id
+
+
+    def remember(self, device_id):
+        with self._lock:
+            self._loaded = True
+            if device_id == self._device_id:
+                return
+            self._device_id = device_id
+            self._write({"id": device_id, "saved_at": time.time()})
+
+
+    """
+    Function: forget what a 404 / "device not found" proved wrong
+    Params:
+            @device_id: the device the command targeted, the remembered id is only
+                        dropped when it is this one (or when None is given)
+    """
+    def invalidate(self, device_id=None):
+        with self._lock:
+            self.invalidations += 1
+            self._devices = None
+            self._fetched_at = 0.0
+            if device_id is None or device_id == self._device_id:
+                self._device_id = None
+                self._loaded = True
+                try:
+                    os.remove(self.path)
+                except OSError:
+                    pass
+
+
+    def stats(self):
+        with self._lock:
+            return {
+                "fetches": self.fetches,
+                "hits": self.hits,
+                "invalidations": self.invalidations,
+                "cached": len(self._devices) if self._fresh() else 0,
+                "target": self._device_id
+            }
+
+
+    def _fresh(self):
+        return self._devices is not None and time.monotonic() - self._fetched_at < self.ttl
+
+
+    # called with _lock held
+    def _write(self, data):
+        try:
+            atomic_write_json(self.path, data)
+        except OSError:
+            # a lost target only costs one devices lookup
+            pass
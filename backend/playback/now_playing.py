@@ -0,0 +1,193 @@
+import threading, time
+
+import requests
+
+from backend.endpoints import api_url
+from backend.transport.scheduler import RequestScheduler
+
+
+"""
+Live "now playing" feed for a status bar, polled adaptively instead of once a second
+    playing:    every `interval` seconds, but wakes right after the current track
+                should end (progress_ms / duration_ms) so a track change shows up at once
+    paused:     every `paused_interval` seconds, nothing moves on its own
+    throttled:  429 / 5xx / network errors double the interval up to `max_backoff`
+                (Retry-After when spotify gives one), polls skip the scheduler's own
+                retries so a throttled poll comes straight back here
+Subscribers get change events only: new track, play/pause, seek, device, shuffle, stopped
+"""
+
+# fields of a poll that make up "what is playing", everything else is noise
+STATE_FIELDS = ("uri", "is_playing", "context_uri", "device_id", "shuffle_state", "repeat_state")
+
+# a progress jump bigger than this (vs. where it should be by now) is a seek
+SEEK_TOLERANCE_MS = 3000
+
+
+# /me/player or /me/player/currently-playing body --> flat state, None when nothing is playing
+def playback_state(payload):
+    item = (payload or {}).get("item")
+    if not item:
+        return None
+    return {
+        "uri": item.get("uri"),
+        "name": item.get("name"),
+        "artists": ", ".join(artist.get("name", "") for artist in item.get("artists", [])),
+        "duration_ms": item.get("duration_ms") or 0,
+        "progress_ms": payload.get("progress_ms") or 0,
+        "is_playing": bool(payload.get("is_playing")),
+        "context_uri": (payload.get("context") or {}).get("uri"),
+        "device_id": (payload.get("device") or {}).get("id"),
+        "shuffle_state": payload.get("shuffle_state"),
+        "repeat_state": payload.get("repeat_state")
+    }
+
+
+class NowPlayingPoller:
+    """
+    Params:
+            @session: SpotifySession (the player's), polls share its pool and rate limit
+            @full: poll /me/player (device, shuffle, repeat) instead of the lighter
+                   /me/player/currently-playing
+            @clock: monotonic clock, injectable for tests
+    """
+    def __init__(self, session, on_change=None, interval=5.0, min_interval=1.0, paused_interval=15.0,
+                 max_backoff=60.0, full=False, clock=time.monotonic):
+        self.session = session
+        self.interval = interval
+        self.min_interval = min_interval
+        self.paused_interval = paused_interval
+        self.max_backoff = max_backoff
+        self.full = full
+        self.clock = clock
+        self.state = None
+        self.polls = 0
+        self.events = 0
+        self.errors = 0
+        self._backoff = None
+        self._polled_at = None
+        self._subscribers = [on_change] if on_change is not None else []
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+
+    # Returns: a function that unsubscribes `callback`
+    def subscribe(self, callback):
+        with self._lock:
+            self._subscribers.append(callback)
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+
+    """
+    Function: one poll
+    Returns: (event or None, seconds until the next poll)
+             event = {"changes": [...], "state": new state, "previous": old state}
+    """
+    def poll(self):
+        path = '/me/player' if self.full else '/me/player/currently-playing'
+        now = self.clock()
+        try:
+            res = self.session.get(api_url(path), retry=False)
+        except requests.exceptions.RequestException:
+            return None, self._throttled(None)
+        self.polls += 1
+        if res.status_code == 429 or res.status_code >= 500:
+            return None, self._throttled(res)
+        self._backoff = None
+        if res.status_code == 204:
+            state = None
+        elif res.status_code == 200:
+            state = playback_state(res.json())
+        else:
+            self.errors += 1
+            return None, self.paused_interval
+
+        event = self._diff(self.state, state, now)
+        self.state, self._polled_at = state, now
+        if event is not None:
+            self.events += 1
+            self._publish(event)
+        return event, self.next_interval(state)
+
+
+    # seconds to wait after seeing `state`
+    def next_interval(self, state):
+        if state is None or not state["is_playing"]:
+            return self.paused_interval
+        remaining = max(0.0, (state["duration_ms"] - state["progress_ms"]) / 1000)
+        # land just after the track boundary, never faster than min_interval
+        return min(self.interval, max(self.min_interval, remaining + 0.5))
+
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="tmfy-now-playing", daemon=True)
+            self._thread.start()
+        return self
+
+
+    def stop(self, timeout=2):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+    def stats(self):
+        return {
+            "polls": self.polls,
+            "events": self.events,
+            "errors": self.errors,
+            "backoff": self._backoff
+        }
+
+
+    def _run(self):
+        while not self._stop.is_set():
+            _, wait = self.poll()
+            self._stop.wait(wait)
+
+
+    def _throttled(self, res):
+        self.errors += 1
+        self._backoff = min(self.max_backoff, (self._backoff or self.interval) * 2)
+        retry_after = RequestScheduler.parse_retry_after(res.headers.get("Retry-After")) if res is not None else None
+        return max(self._backoff, min(retry_after or 0, self.max_backoff))
+
+
+    def _diff(self, previous, state, now):
+        if previous is None and state is None:
+            return None
+        if state is None:
+            changes = ["stopped"]
+        elif previous is None:
+            changes = ["track"]
+        else:
+            changes = ["track" if field == "uri" else field
+                       for field in STATE_FIELDS if previous[field] != state[field]]
+            if "track" not in changes and self._seeked(previous, state, now):
+                changes.append("seek")
+        if not changes:
+            return None
+        return {"changes": changes, "state": state, "previous": previous}
+
+
+    # where the previous poll says the track should be by now vs. where it is
+    def _seeked(self, previous, state, now):
+        expected = previous["progress_ms"]
+        if previous["is_playing"] and self._polled_at is not None:
+            expected += (now - self._polled_at) * 1000
+        return abs(state["progress_ms"] - expected) > SEEK_TOLERANCE_MS
+
+
+    def _publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            callback(event)
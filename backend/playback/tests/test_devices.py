@@ -0,0 +1,110 @@
+import json, time
+
+import backend
+from backend.Auth import Auth
+from backend.playback.devices import DeviceRegistry, registry_for, pick_device
+from backend.transport.session import SpotifySession
+
+DEVICES = "GET /v1/me/player/devices"
+PLAY = "PUT /v1/me/player/play"
+SHUFFLE = "PUT /v1/me/player/shuffle"
+
+
+def add_device(fake, device_id, active=False):
+    fake.devices.append({"id": device_id, "is_active": active, "is_restricted": False,
+                         "name": device_id, "type": "Smartphone", "volume_percent": 50})
+
+
+def test_devices_are_cached_for_the_ttl(fake):
+    registry = DeviceRegistry(SpotifySession("fake-token"), ttl=60)
+    assert registry.devices()[0]["id"] == "fakedevice01"
+    assert registry.devices()
+    assert fake.request_counts[DEVICES] == 1
+    assert registry.devices(refresh=True)
+    assert fake.request_counts[DEVICES] == 2
+    assert registry.stats()["hits"] == 1
+
+
+def test_expired_list_is_fetched_again(fake):
+    registry = DeviceRegistry(SpotifySession("fake-token"), ttl=0.05)
+    registry.devices()
+    time.sleep(0.06)
+    registry.devices()
+    assert fake.request_counts[DEVICES] == 2
+
+
+def test_active_device_is_remembered_across_registries(fake, tmp_path):
+    session = SpotifySession("fake-token")
+    assert DeviceRegistry(session).target_device_id() == "fakedevice01"
+    with open(tmp_path / "tmfy_cache" / "device.json") as file:
+        assert json.load(file)["id"] == "fakedevice01"
+    # a new process starts from the file, no lookup
+    assert DeviceRegistry(session).target_device_id() == "fakedevice01"
+    assert fake.request_counts[DEVICES] == 1
+
+
+def test_pick_device_prefers_active_and_skips_restricted():
+    devices = [{"id": "a", "is_restricted": True, "is_active": True}, {"id": "b"}, {"id": "c", "is_active": True}]
+    assert pick_device(devices)["id"] == "c"
+    assert pick_device(devices[:2])["id"] == "b"
+    assert pick_device([]) is None
+
+
+def test_play_is_one_request_once_the_device_is_known(fake):
+    session = SpotifySession("fake-token")
+    player = backend.Player("fake-token", session=session)
+    assert player.get_devices()
+    fake.reset_counts()
+    for _ in range(3):
+        assert player.play_track("spotify:track:abc")
+    assert fake.request_counts[PLAY] == 3
+    assert fake.request_counts[DEVICES] == 0
+
+
+def test_play_with_shuffle_targets_the_same_device(fake):
+    add_device(fake, "phone")
+    session = SpotifySession("fake-token")
+    registry_for(session).remember("phone")
+    assert backend.Player("fake-token", session=session).play(context_uri="spotify:album:x", shuffle=True)
+    assert fake.playback["device"]["id"] == "phone"
+    assert fake.playback["shuffle_state"] is True
+    assert fake.total_requests() == 2
+
+
+def test_unknown_device_is_invalidated_and_retried_once(fake):
+    session = SpotifySession("fake-token")
+    registry = registry_for(session)
+    registry.remember("gone")
+    assert backend.Player("fake-token", session=session).play_track("abc")
+    # play on "gone" --> 404, devices, play on the active device
+    assert fake.request_counts[PLAY] == 2
+    assert fake.request_counts[DEVICES] == 1
+    assert registry.remembered() == "fakedevice01"
+    assert registry.stats()["invalidations"] == 1
+
+
+def test_no_active_device_falls_back_to_an_available_one(fake):
+    fake.devices[0]["is_active"] = False
+    session = SpotifySession("fake-token")
+    assert backend.Player("fake-token", session=session).play_track("abc")
+    assert fake.playback["device"]["id"] == "fakedevice01"
+    assert registry_for(session).remembered() == "fakedevice01"
+
+
+def test_play_fails_cleanly_without_devices(fake):
+    fake.devices.clear()
+    session = SpotifySession("fake-token")
+    assert backend.Player("fake-token", session=session).play_track("abc") is False
+    assert fake.request_counts[PLAY] == 1
+
+
+def test_token_check_fills_the_player_registry(fake):
+    with open("tokens.json", "w") as file:
+        json.dump({"access_token": "a", "refresh_token": "r", "expires_at": time.time() + 3600}, file)
+    auth = Auth()
+    assert auth.is_token_valid()
+    player = backend.Player(auth.token, session=auth.session)
+    assert player.get_devices()
+    assert player.play_track("abc")
+    assert fake.request_counts[DEVICES] == 1
+    assert fake.playback["device"]["id"] == "fakedevice01"
@@ -0,0 +1,132 @@
+import threading
+
+import pytest
+import backend
+from backend.playback.now_playing import NowPlayingPoller, playback_state
+from backend.transport.session import SpotifySession
+
+CURRENTLY_PLAYING = "GET /v1/me/player/currently-playing"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def set_playing(fake, uri="spotify:track:a", progress=0, duration=200000, playing=True):
+    fake.playback["item"] = {"uri": uri, "id": uri.rsplit(":", 1)[-1], "name": uri, "duration_ms": duration}
+    fake.playback["progress_ms"] = progress
+    fake.playback["is_playing"] = playing
+
+
+def poller(clock, events=None, **options):
+    return NowPlayingPoller(SpotifySession("fake-token"), on_change=events.append if events is not None else None,
+                            clock=clock, **options)
+
+
+def test_only_changes_are_published(fake, clock):
+    events = []
+    feed = poller(clock, events)
+    set_playing(fake)
+    feed.poll()
+    clock.now += 5
+    fake.playback["progress_ms"] = 5000
+    assert feed.poll()[0] is None
+    set_playing(fake, uri="spotify:track:b")
+    clock.now += 5
+    feed.poll()
+    assert [event["changes"] for event in events] == [["track"], ["track"]]
+    assert events[1]["previous"]["uri"] == "spotify:track:a"
+    assert feed.stats()["polls"] == 3
+
+
+def test_pause_seek_and_stop_are_events(fake, clock):
+    events = []
+    feed = poller(clock, events)
+    set_playing(fake)
+    feed.poll()
+    fake.playback["is_playing"] = False
+    feed.poll()
+    fake.playback["progress_ms"] = 90000
+    feed.poll()
+    fake.playback["item"] = None
+    feed.poll()
+    assert [event["changes"] for event in events] == [["track"], ["is_playing"], ["seek"], ["stopped"]]
+
+
+def test_interval_tightens_near_the_track_boundary(fake, clock):
+    feed = poller(clock, interval=5, min_interval=1, paused_interval=15)
+    set_playing(fake, progress=100000, duration=200000)
+    assert feed.poll()[1] == 5
+    fake.playback["progress_ms"] = 197000
+    assert feed.poll()[1] == pytest.approx(3.5)
+    fake.playback["progress_ms"] = 199900
+    assert feed.poll()[1] == 1
+    fake.playback["is_playing"] = False
+    assert feed.poll()[1] == 15
+
+
+def test_nothing_playing_polls_slowly(fake, clock):
+    feed = poller(clock, paused_interval=20)
+    event, wait = feed.poll()
+    assert event is None and wait == 20
+
+
+def test_throttling_backs_off_and_recovers(fake, clock):
+    fake.rate_limit_rate = 1.0
+    fake.retry_after = 0
+    feed = poller(clock, interval=5, max_backoff=30)
+    assert feed.poll()[1] == 10
+    assert feed.poll()[1] == 20
+    assert feed.poll()[1] == 30
+    assert feed.poll()[1] == 30
+    # one request per poll, the scheduler leaves the backoff to the poller
+    assert fake.request_counts[CURRENTLY_PLAYING] == 4
+    fake.rate_limit_rate = 0.0
+    set_playing(fake)
+    assert feed.poll()[1] == 5
+    assert feed.stats()["backoff"] is None
+
+
+def test_full_poll_reports_device_and_shuffle(fake, clock):
+    events = []
+    feed = poller(clock, events, full=True)
+    set_playing(fake)
+    feed.poll()
+    fake.playback["shuffle_state"] = True
+    feed.poll()
+    assert events[0]["state"]["device_id"] == "fakedevice01"
+    assert events[1]["changes"] == ["shuffle_state"]
+    assert fake.request_counts["GET /v1/me/player"] == 2
+
+
+def test_playback_state_flattens_a_poll():
+    assert playback_state(None) is None
+    state = playback_state({"is_playing": True, "progress_ms": 10, "context": {"uri": "spotify:album:x"},
+                            "item": {"uri": "spotify:track:a", "name": "A", "duration_ms": 99,
+                                     "artists": [{"name": "X"}, {"name": "Y"}]}})
+    assert state["artists"] == "X, Y"
+    assert state["context_uri"] == "spotify:album:x"
+    assert state["device_id"] is None
+
+
+def test_background_feed_from_the_player(fake):
+    set_playing(fake, progress=199000)
+    seen = threading.Event()
+    feed = backend.Player("fake-token").now_playing(on_change=lambda event: seen.set(), min_interval=0.05)
+    unsubscribe = feed.subscribe(lambda event: None)
+    feed.start()
+    try:
+        assert seen.wait(2)
+    finally:
+        feed.stop()
+        unsubscribe()
+    assert fake.request_counts[CURRENTLY_PLAYING] >= 1
@@ -0,0 +1,60 @@
+import pytest
+import backend
+from backend.transport.session import SpotifySession
+
+PLAY = "PUT /v1/me/player/play"
+SHUFFLE = "PUT /v1/me/player/shuffle"
+QUEUE = "POST /v1/me/player/queue"
+
+
+@pytest.fixture
+def player(fake):
+    return backend.Player("fake-token", session=SpotifySession("fake-token"))
+
+
+def test_album_is_one_context_request(fake, player):
+    assert player.play_album("abc")
+    assert dict(fake.request_counts) == {PLAY: 1}
+    assert fake.playback["context"]["uri"] == "spotify:album:abc"
+
+
+def test_album_with_shuffle_is_two_requests(fake, player):
+    assert player.play_album("spotify:album:abc", shuffle=True, offset=3)
+    assert dict(fake.request_counts) == {SHUFFLE: 1, PLAY: 1}
+    assert fake.playback["shuffle_state"] is True
+
+
+def test_track_list_is_one_request(fake, player):
+    assert player.play_tracks(["a", "spotify:track:b", None, "c"], offset=1)
+    assert dict(fake.request_counts) == {PLAY: 1}
+    assert fake.playback["uris"] == ["spotify:track:a", "spotify:track:b", "spotify:track:c"]
+    assert fake.playback["item"]["uri"] == "spotify:track:b"
+
+
+def test_offset_by_uri_inside_a_context(fake, player):
+    assert player.play(context_uri="spotify:album:abc", offset="spotify:track:t3")
+    assert fake.playback["item"]["uri"] == "spotify:track:t3"
+
+
+def test_nothing_to_play(fake, player):
+    assert player.play_tracks([]) is False
+    assert player.play_album(None) is False
+    assert fake.total_requests() == 0
+
+
+def test_explicit_device_is_not_second_guessed(fake, player):
+    assert player.play(uris=["spotify:track:a"], device_id="nope") is False
+    assert dict(fake.request_counts) == {PLAY: 1}
+
+
+def test_queue_keeps_order_on_one_connection(fake, player):
+    tracks = [f"t{i}" for i in range(6)]
+    assert player.queue(tracks) == 6
+    assert fake.playback["queue"] == [f"spotify:track:t{i}" for i in range(6)]
+    assert fake.request_counts[QUEUE] == 6
+    assert player.session.pool_stats()["connections_opened"] == 1
+
+
+def test_queue_reports_rejected_tracks(fake, player):
+    fake.devices.clear()
+    assert player.queue(["a", "b"]) == 0
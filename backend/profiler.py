@@ -0,0 +1,166 @@
+import json, os, threading, time
+
+
+"""
+Spans around http calls and the phases of a command (tmfy --profile)
+    with span("resolve", artist=name) as attrs:
+        ...
+        attrs["cache"] = "hit"
+Nothing is recorded until enable(), a disabled span() is one global read
+    kinds:  "phase" (auth, resolve, search, normalize, render) and "http"
+    attrs:  anything the call site knows: status, bytes, cache (hit / miss)...
+"""
+
+_profiler = None
+
+
+class _NullSpan:
+    def __enter__(self):
+        # attrs written by the call site go nowhere
+        return {}
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, profiler, name, kind, attrs):
+        self.profiler = profiler
+        self.name = name
+        self.kind = kind
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self.attrs
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.profiler.record(self.name, self.kind, self.start, end, self.attrs)
+        return False
+
+
+class Profiler:
+    def __init__(self):
+        self.spans = []
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+
+    def span(self, name, kind="phase", **attrs):
+        return _Span(self, name, kind, attrs)
+
+
+    def record(self, name, kind, start, end, attrs):
+        with self._lock:
+            self.spans.append({
+                "name": name,
+                "kind": kind,
+                "start_ms": (start - self.started) * 1000,
+                "duration_ms": (end - start) * 1000,
+                "thread": threading.get_ident(),
+                "attrs": attrs
+            })
+
+
+    """
+    Function: spans grouped by kind + name, in order of first appearance
+    Returns: [{"kind", "name", "calls", "total_ms", "max_ms", "bytes", "cache": {status: count}}]
+    """
+    def summary(self):
+        with self._lock:
+            spans = list(self.spans)
+        groups = {}
+        for span in spans:
+            group = groups.setdefault((span["kind"], span["name"]), {
+                "kind": span["kind"], "name": span["name"], "calls": 0, "total_ms": 0.0,
+                "max_ms": 0.0, "bytes": 0, "cache": {}
+            })
+            group["calls"] += 1
+            group["total_ms"] += span["duration_ms"]
+            group["max_ms"] = max(group["max_ms"], span["duration_ms"])
+            group["bytes"] += span["attrs"].get("bytes") or 0
+            cache = span["attrs"].get("cache")
+            if cache:
+                group["cache"][cache] = group["cache"].get(cache, 0) + 1
+        return list(groups.values())
+
+
+    # wall time covered by at least one span (spans nest and overlap across threads)
+    def covered_ms(self):
+        with self._lock:
+            intervals = sorted((span["start_ms"], span["start_ms"] + span["duration_ms"]) for span in self.spans)
+        covered, end = 0.0, None
+        for start, stop in intervals:
+            if end is None or start > end:
+                covered += stop - start
+                end = stop
+            elif stop > end:
+                covered += stop - end
+                end = stop
+        return covered
+
+
+    # per phase breakdown, phases first, then the http calls they made
+    def report(self, out):
+        total_ms = (time.perf_counter() - self.started) * 1000
+        rows = sorted(self.summary(), key=lambda group: group["kind"] != "phase")
+        print(f"-- profile: {total_ms:.1f} ms, {len(self.spans)} spans, "
+              f"{max(0.0, total_ms - self.covered_ms()):.1f} ms outside any span", file=out)
+        print(f"{'span':<42} {'calls':>5} {'total ms':>9} {'max ms':>8} {'bytes':>9}  cache", file=out)
+        for group in rows:
+            name = group["name"] if group["kind"] == "phase" else f"http {group['name']}"
+            cache = " ".join(f"{status}={count}" for status, count in sorted(group["cache"].items()))
+            print(f"{name[:42]:<42} {group['calls']:>5} {group['total_ms']:>9.1f} {group['max_ms']:>8.1f} "
+                  f"{group['bytes'] or '':>9}  {cache}", file=out)
+
+
+    """
+    Function: write every span as a chrome trace (chrome://tracing, ui.perfetto.dev)
+    Params:
+            @path: json file to write
+    """
+    def write_trace(self, path):
+        with self._lock:
+            spans = list(self.spans)
+        events = [{
+            "name": span["name"],
+            "cat": span["kind"],
+            "ph": "X",
+            "ts": round(span["start_ms"] * 1000, 1),
+            "dur": round(span["duration_ms"] * 1000, 1),
+            "pid": os.getpid(),
+            "tid": span["thread"],
+            "args": span["attrs"]
+        } for span in spans]
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file, default=str)
+
+
+def span(name, kind="phase", **attrs):
+    profiler = _profiler
+    if profiler is None:
+        return _NULL_SPAN
+    return profiler.span(name, kind, **attrs)
+
+
+def enabled():
+    return _profiler is not None
+
+
+# start recording spans process wide, returns the Profiler collecting them
+def enable():
+    global _profiler
+    _profiler = Profiler()
+    return _profiler
+
+
+def disable():
+    global _profiler
+    profiler, _profiler = _profiler, None
+    return profiler
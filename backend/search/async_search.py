@@ -0,0 +1,76 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from .search_wrapper import Search
+from .search_manager import SearchManager
+from backend.transport.session import SpotifySession
+
+
+"""
+asyncio counterparts of Search and SearchManager
+requirements.txt has no async http client, so each request runs the blocking
+pooled session on a worker thread. Concurrency is bounded by the executor size
+(and the session pool is sized to match), results come back in input order
+"""
+
+
+class AsyncSearch:
+    def __init__(self, token, session=None, concurrency=8):
+        session = session if session is not None else SpotifySession(token, pool_maxsize=concurrency)
+        self.search_wrapper_api = Search(token, session=session)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="tmfy-search")
+
+
+    async def search(self, query, search_type, limit=10, offset=0, market=None):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self.search_wrapper_api.search, query, search_type, limit, offset, market)
+
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+class AsyncSearchManager:
+    def __init__(self, token=None, cache=None, session=None, concurrency=8, manager=None):
+        if manager is None:
+            session = session if session is not None else SpotifySession(token, pool_maxsize=concurrency)
+            manager = SearchManager(token, cache=cache, session=session)
+        self.manager = manager
+        self.concurrency = concurrency
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="tmfy-search")
+
+
+    """
+    Function: async SearchManager.run (goes through the same cache)
+    Returns: normalized result dict
+    """
+    async def run(self, query, search_type="tracks", limit=5, offset=0, market=None):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self.manager.run, query, search_type, limit, offset, market)
+
+
+    """
+    Function: run many searches concurrently, at most self.concurrency in flight
+    Returns: list of normalized result dicts, same order as queries
+    Params:
+            @queries: list of query strings, or dicts with "query" plus any of
+                      search_type/limit/offset/market to override the defaults per query
+    """
+    async def run_many(self, queries, search_type="tracks", limit=5, offset=0, market=None):
+        defaults = {"search_type": search_type, "limit": limit, "offset": offset, "market": market}
+        tasks = []
+        for entry in queries:
+            request = dict(defaults)
+            if isinstance(entry, dict):
+                request.update(entry)
+            else:
+                request["query"] = entry
+            tasks.append(self.run(request["query"], request["search_type"], request["limit"],
+                                  request["offset"], request["market"]))
+        return await asyncio.gather(*tasks)
+
+
+    def close(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,121 @@
+import json, os, threading
+
+from backend.file_lock import atomic_write_json
+
+
+"""
+The cli's memory between commands (.tmfy_cache/session.json)
+    focus:   what the user narrowed down to   {"type": "artist", "id", "uri", "name"}
+    results: the last numbered list printed   {"type": "albums", "items": [{"type", "id", "uri", "name"}...]}
+             plus "context": the album uri when the list is that album's tracks
+Only ids/uris/names are kept, enough for `#N` to resolve to a uri and for drilling
+down (artist --> albums --> tracks) by id, without searching by name again
+"""
+
+
+# "#3" / "3" --> 3, anything else --> None
+def parse_ref(text):
+    if not isinstance(text, str):
+        return None
+    text = text.strip()
+    if text.startswith("#"):
+        text = text[1:]
+    if not text.isdigit() or int(text) < 1:
+        return None
+    return int(text)
+
+
+# "#1,3" / "1,2,#5" --> [1, 3] / [1, 2, 5], None unless every part is a ref
+def parse_refs(text):
+    if not isinstance(text, str) or not text.strip():
+        return None
+    refs = [parse_ref(part) for part in text.split(",") if part.strip()]
+    if not refs or None in refs:
+        return None
+    return refs
+
+
+# the few fields worth remembering from a result record / raw api object
+def compact(item, item_type=None):
+    return {
+        "type": item_type or item.get("type"),
+        "id": item.get("id"),
+        "uri": item.get("uri"),
+        "name": item.get("name")
+    }
+
+
+class FocusSession:
+    def __init__(self, path=None):
+        self.path = path or os.path.join(os.getenv("TMFY_CACHE_DIR", ".tmfy_cache"), "session.json")
+        self.focus = None
+        self.results = None
+        self._mtime = None
+        self._lock = threading.Lock()
+
+
+    # re-read the file when another tmfy process (or the daemon) wrote it since
+    def load(self):
+        with self._lock:
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                return self
+            if mtime == self._mtime:
+                return self
+            try:
+                with open(self.path, "r") as file:
+                    data = json.load(file)
+            except (OSError, ValueError):
+                return self
+            self.focus = data.get("focus")
+            self.results = data.get("results")
+            self._mtime = mtime
+            return self
+
+
+    def save(self):
+        with self._lock:
+            try:
+                atomic_write_json(self.path, {"focus": self.focus, "results": self.results}, separators=(",", ":"))
+                self._mtime = os.path.getmtime(self.path)
+            except OSError:
+                # losing the session only costs a re-search
+                pass
+
+
+    def set_focus(self, item, item_type=None, save=True):
+        self.focus = compact(item, item_type)
+        if save:
+            self.save()
+
+
+    """
+    Function: remember the numbered list that was just printed
+    Params:
+            @result_type: "albums", "tracks", "artists"... or "items" for a mixed list
+            @items: records / raw api objects in display order (#1 first)
+            @context: uri the items were listed from (an album), playing #N then
+                      plays that context starting at #N
+    """
+    def set_results(self, result_type, items, save=True, context=None):
+        singular = None if result_type == "items" else result_type.rstrip("s")
+        self.results = {"type": result_type, "items": [compact(item, singular) for item in items]}
+        if context:
+            self.results["context"] = context
+        if save:
+            self.save()
+
+
+    """
+    Function: resolve a `#N` reference against the last printed list
+    Returns: the compact item {"type", "id", "uri", "name"} or None
+    """
+    def resolve(self, ref):
+        number = parse_ref(ref) if not isinstance(ref, int) else ref
+        if number is None or not self.results:
+            return None
+        items = self.results.get("items", [])
+        if number > len(items):
+            return None
+        return items[number - 1]
@@ -0,0 +1,152 @@
+import json, os, threading, time, unicodedata
+
+from backend.file_lock import atomic_write_json
+
+
+"""
+Persistent name --> spotify id index
+    artists: normalized artist name            --> artist id
+    tracks:  normalized (artist name, track)   --> track id
+Keys ignore case, accents and extra whitespace ("Beyoncé" == "beyonce ").
+Entries older than ttl are stale: callers should re-resolve them, but can still
+fall back to the stale id when the api is unreachable.
+"""
+
+DEFAULT_TTL = 30 * 24 * 3600
+
+
+def normalize_name(name):
+    decomposed = unicodedata.normalize("NFKD", name or "")
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.casefold().split())
+
+
+def track_key(artist_name, track_name):
+    return f"{normalize_name(artist_name)}\x1f{normalize_name(track_name)}"
+
+
+class IdIndex:
+    def __init__(self, path=None, ttl=DEFAULT_TTL):
+        self.path = path or os.path.join(os.getenv("TMFY_CACHE_DIR", ".tmfy_cache"), "ids.json")
+        self.ttl = ttl
+        self._entries = None
+        self._dirty = {"artists": set(), "tracks": set()}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+
+    """
+    Function: look an artist up
+    Returns: (artist_id, is_fresh) or (None, False) when the name was never resolved
+    Params:
+            @count: False for a re-check of a lookup that was already counted in stats()
+    """
+    def lookup_artist(self, artist_name, count=True):
+        return self._lookup("artists", normalize_name(artist_name), count)
+
+
+    def lookup_track(self, artist_name, track_name, count=True):
+        return self._lookup("tracks", track_key(artist_name, track_name), count)
+
+
+    def put_artist(self, artist_name, artist_id, save=True):
+        self._put("artists", normalize_name(artist_name), artist_id, artist_name)
+        if save:
+            self.save()
+
+
+    def put_track(self, artist_name, track_name, track_id, save=True):
+        self._put("tracks", track_key(artist_name, track_name), track_id, f"{artist_name} - {track_name}")
+        if save:
+            self.save()
+
+
+    """
+    Function: bulk load already known ids, written to disk once
+    Params:
+            @artists: {artist name: artist id}
+            @tracks:  {(artist name, track name): track id}
+    """
+    def preload(self, artists=None, tracks=None):
+        for artist_name, artist_id in (artists or {}).items():
+            self.put_artist(artist_name, artist_id, save=False)
+        for (artist_name, track_name), track_id in (tracks or {}).items():
+            self.put_track(artist_name, track_name, track_id, save=False)
+        self.save()
+
+
+    def stats(self):
+        with self._lock:
+            entries = self._load()
+            return {
+                "artists": len(entries["artists"]),
+                "tracks": len(entries["tracks"]),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses
+            }
+
+
+    """
+    Function: write the index to disk (temp file + rename)
+              entries written by other processes since we loaded are merged in, ours win
+    """
+    def save(self):
+        with self._lock:
+            if not any(self._dirty.values()):
+                return
+            entries = self._load()
+            on_disk = self._read_file()
+            for kind in ("artists", "tracks"):
+                merged = on_disk.get(kind, {})
+                for key in self._dirty[kind]:
+                    merged[key] = entries[kind][key]
+                for key, entry in merged.items():
+                    entries[kind].setdefault(key, entry)
+                on_disk[kind] = merged
+            try:
+                atomic_write_json(self.path, on_disk)
+                self._dirty = {"artists": set(), "tracks": set()}
+            except OSError:
+                # the index is an optimisation, keep going with the in-memory copy
+                pass
+
+
+    def _lookup(self, kind, key, count=True):
+        with self._lock:
+            entry = self._load()[kind].get(key)
+            if entry is None:
+                if count:
+                    self.misses += 1
+                return None, False
+            fresh = time.time() - entry["resolved_at"] < self.ttl
+            if count and fresh:
+                self.hits += 1
+            elif count:
+                self.stale_hits += 1
+            return entry["id"], fresh
+
+
+    def _put(self, kind, key, spotify_id, display_name):
+        with self._lock:
+            self._load()[kind][key] = {"id": spotify_id, "name": display_name, "resolved_at": time.time()}
+            self._dirty[kind].add(key)
+
+
+    # caller must hold self._lock
+    def _load(self):
+        if self._entries is None:
+            data = self._read_file()
+            self._entries = {"artists": data.get("artists", {}), "tracks": data.get("tracks", {})}
+        return self._entries
+
+
+    def _read_file(self):
+        try:
+            with open(self.path, "r") as file:
+                data = json.load(file)
+            return data if isinstance(data, dict) else {}
+        except (FileNotFoundError, json.JSONDecodeError, OSError):
+            return {}
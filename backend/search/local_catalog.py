@@ -0,0 +1,258 @@
+import json, os, re, sqlite3, threading, time
+from concurrent.futures import ThreadPoolExecutor
+
+from .records import BaseResult, make_record, RECORD_TYPES
+
+
+"""
+Local catalog of every result record the client has seen (.tmfy_cache/catalog.sqlite3)
+    items:      one row per spotify uri (type, id, name, subtitle, raw item json)
+    items_fts:  FTS5 index over name + subtitle, kept in sync by triggers
+Answers searches offline in well under a millisecond, results come back as the
+same records / result dict as Search.search ("source": "local")
+Without FTS5 in the sqlite build it falls back to LIKE matching
+Searches write through upsert_later(): one background writer, in order, reads wait for it
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    rowid INTEGER PRIMARY KEY,
+    uri TEXT NOT NULL UNIQUE,
+    id TEXT,
+    type TEXT NOT NULL,
+    name TEXT,
+    subtitle TEXT,
+    raw TEXT NOT NULL,
+    seen_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_type ON items(type);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+    name, subtitle, content='items', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS items_ai AFTER INSERT ON items BEGIN
+    INSERT INTO items_fts(rowid, name, subtitle) VALUES (new.rowid, new.name, new.subtitle);
+END;
+CREATE TRIGGER IF NOT EXISTS items_ad AFTER DELETE ON items BEGIN
+    INSERT INTO items_fts(items_fts, rowid, name, subtitle) VALUES ('delete', old.rowid, old.name, old.subtitle);
+END;
+CREATE TRIGGER IF NOT EXISTS items_au AFTER UPDATE OF name, subtitle ON items BEGIN
+    INSERT INTO items_fts(items_fts, rowid, name, subtitle) VALUES ('delete', old.rowid, old.name, old.subtitle);
+    INSERT INTO items_fts(rowid, name, subtitle) VALUES (new.rowid, new.name, new.subtitle);
+END;
+"""
+
+UPSERT = """
+INSERT INTO items (uri, id, type, name, subtitle, raw, seen_at) VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(uri) DO UPDATE SET
+    id = excluded.id, type = excluded.type, name = excluded.name,
+    subtitle = excluded.subtitle, raw = excluded.raw, seen_at = excluded.seen_at
+"""
+
+
+# the second line of a result: who made it / where it belongs
+def subtitle(record):
+    search_type = record.search_type
+    if search_type == "tracks":
+        return f"{record.artist_names} {(record.raw.get('album') or {}).get('name') or ''}".strip()
+    if search_type == "albums":
+        return record.artist_names
+    if search_type == "artists":
+        return " ".join(record.genres or [])
+    if search_type == "playlists":
+        return record.owner or ""
+    if search_type == "shows":
+        return record.publisher or ""
+    if search_type == "episodes":
+        return record.show.get("name") or ""
+    return ""
+
+
+# "jay z 4:4" --> '"jay"* "z"* "4"* "4"*', every word as a prefix, all of them required
+def fts_query(query):
+    words = re.findall(r"\w+", query or "", flags=re.UNICODE)
+    return " ".join(f'"{word}"*' for word in words)
+
+
+class LocalCatalog:
+    def __init__(self, path=None):
+        self.path = path or os.path.join(os.getenv("TMFY_CACHE_DIR", ".tmfy_cache"), "catalog.sqlite3")
+        self.fts = True
+        self.upserted = 0
+        self.searches = 0
+        self._conn = None
+        self._lock = threading.Lock()
+        # background writes, started on first use (one thread keeps them in order)
+        self._writer = None
+        self._pending = None
+        self._writer_lock = threading.Lock()
+
+
+    # opened on first use, one connection shared by every thread (guarded by _lock)
+    def _connect(self):
+        if self._conn is not None:
+            return self._conn
+        directory = os.path.dirname(self.path)
+        if directory and self.path != ":memory:":
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        try:
+            conn.executescript(FTS_SCHEMA)
+        except sqlite3.OperationalError:
+            # sqlite built without fts5
+            self.fts = False
+        self._conn = conn
+        return conn
+
+
+    """
+    Function: insert or refresh result records, one transaction per call
+    Returns: number of records written
+    Params:
+            @records: result records (records.py), anything else / without a uri is skipped
+    """
+    def upsert(self, records):
+        now = time.time()
+        rows = [
+            (record.uri, record.id, record.search_type, record.name, subtitle(record), json.dumps(record.raw), now)
+            for record in records
+            if isinstance(record, BaseResult) and record.uri
+        ]
+        if not rows:
+            return 0
+        with self._lock:
+            try:
+                conn = self._connect()
+                with conn:
+                    conn.executemany(UPSERT, rows)
+            except (sqlite3.Error, OSError):
+                # the catalog is a convenience, never fail a search over it
+                return 0
+            self.upserted += len(rows)
+        return len(rows)
+
+
+    # upsert() off the caller's thread, returns the Future (its result is the row count)
+    def upsert_later(self, records):
+        return self._submit(self.upsert, records)
+
+
+    def upsert_result_later(self, result):
+        if not result or not result.get("success"):
+            return None
+        return self._submit(self.upsert_result, result)
+
+
+    def _submit(self, write, argument):
+        with self._writer_lock:
+            if self._writer is None:
+                # the executor's worker is joined at interpreter exit, queued writes still land
+                self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tmfy-catalog")
+            self._pending = self._writer.submit(write, argument)
+            return self._pending
+
+
+    # wait for every background write submitted so far (they run in order, the last one is enough)
+    def flush(self):
+        with self._writer_lock:
+            pending = self._pending
+        if pending is not None:
+            pending.result()
+
+
+    # every record inside a Search.search / Search.search_types result dict
+    def upsert_result(self, result):
+        if not result or not result.get("success"):
+            return 0
+        if "results" in result:
+            return sum(self.upsert_result(section) for section in result["results"].values())
+        return self.upsert(result.get("result", []))
+
+
+    """
+    Function: full text search over everything seen so far
+    Returns: same dict as Search.search plus "source": "local"
+             search_type None searches every type
+    """
+    def search(self, query, search_type=None, limit=10):
+        if search_type is not None and search_type not in RECORD_TYPES:
+            return self._result(False, query, search_type, [], error=f"Invalid search type: {search_type}")
+        match = fts_query(query)
+        if not match:
+            return self._result(False, query, search_type, [], error="Query cannot be empty")
+
+        # what this process fetched is searchable right away
+        self.flush()
+        with self._lock:
+            self.searches += 1
+            try:
+                conn = self._connect()
+                rows = self._query(conn, query, match, search_type, limit)
+            except (sqlite3.Error, OSError) as e:
+                return self._result(False, query, search_type, [], error=f"Local catalog error: {e}")
+        records = [make_record(json.loads(raw), item_type) for item_type, raw in rows]
+        return self._result(True, query, search_type, records)
+
+
+    def _query(self, conn, query, match, search_type, limit):
+        type_filter = "AND items.type = ?" if search_type else ""
+        if self.fts:
+            sql = f"""
+                SELECT items.type, items.raw FROM items_fts JOIN items ON items.rowid = items_fts.rowid
+                WHERE items_fts MATCH ? {type_filter}
+                ORDER BY bm25(items_fts, 10.0, 1.0), items.seen_at DESC LIMIT ?"""
+            params = [match]
+        else:
+            like = f"%{query.strip()}%"
+            sql = f"""
+                SELECT type, raw FROM items WHERE (name LIKE ? OR subtitle LIKE ?) {type_filter}
+                ORDER BY seen_at DESC LIMIT ?"""
+            params = [like, like]
+        if search_type:
+            params.append(search_type)
+        params.append(limit)
+        return conn.execute(sql, params).fetchall()
+
+
+    def _result(self, success, query, search_type, records, error=None):
+        result = {
+            "success": success,
+            "source": "local",
+            "search_type": search_type,
+            "query": query,
+            "total_results": len(records),
+            "result": records
+        }
+        if error:
+            result["error"] = error
+        return result
+
+
+    def stats(self):
+        self.flush()
+        with self._lock:
+            conn = self._connect()
+            counts = dict(conn.execute("SELECT type, COUNT(*) FROM items GROUP BY type").fetchall())
+            return {
+                "items": sum(counts.values()),
+                "by_type": counts,
+                "fts": self.fts,
+                "upserted": self.upserted,
+                "searches": self.searches
+            }
+
+
+    def close(self):
+        with self._writer_lock:
+            writer, self._writer, self._pending = self._writer, None, None
+        if writer is not None:
+            writer.shutdown(wait=True)
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
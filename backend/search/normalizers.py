@@ -0,0 +1,201 @@
+"""
+Table driven normalizers: spotify item --> the plain result dict of its search type
+Every type is a spec (field --> extractor, in the record's FIELDS order), compiled once
+per (search type, fields) into one python function:
+    normalize = compile_normalizer("tracks", fields=("name", "artist_names"))
+    normalize(item) --> {"name": ..., "artist_names": ...}
+Nested objects (album, artists, owner...) are looked up once per item no matter how
+many fields read them, a projection only reads what it returns
+    normalize_page(items, "tracks"):  a whole /search page, None items skipped
+SPECS is the only definition of the result fields, the record properties in records.py
+are generated from it too (compile_getter), so dict(record) == normalize(record.raw)
+"""
+
+
+class Key:
+    def __init__(self, key, default=None):
+        self.key = key
+        self.default = default
+        self.needs = ()
+
+    def source(self):
+        if self.default is None:
+            return f"get({self.key!r})"
+        return f"get({self.key!r}, {self.default!r})"
+
+
+# a key of a nested object, `item.get(outer) or {}` is shared by every field reading it
+class Nested:
+    def __init__(self, outer, key, default=None):
+        self.outer = outer
+        self.key = key
+        self.default = default
+        self.needs = ((f"_{outer}", f"get({outer!r}) or {{}}"),)
+
+    def source(self):
+        if self.default is None:
+            return f"_{self.outer}.get({self.key!r})"
+        return f"_{self.outer}.get({self.key!r}, {self.default!r})"
+
+
+# a small dict copied out of a nested object: album --> {"name", "id", "uri", "release_date"}
+class Pick:
+    def __init__(self, outer, *keys):
+        self.outer = outer
+        self.keys = keys
+        self.needs = ((f"_{outer}", f"get({outer!r}) or {{}}"),)
+
+    def source(self):
+        return "{" + ", ".join(f"{key!r}: _{self.outer}.get({key!r})" for key in self.keys) + "}"
+
+
+class Source:
+    def __init__(self, source, *needs):
+        self.code = source
+        self.needs = needs
+
+    def source(self):
+        return self.code
+
+
+_ARTISTS_LIST = ("_artists", "get('artists') or []")
+
+ARTISTS = Source("[{'name': artist.get('name'), 'id': artist.get('id'), 'uri': artist.get('uri')} for artist in _artists]",
+                 _ARTISTS_LIST)
+ARTIST_NAMES = Source("', '.join([artist.get('name', '') for artist in _artists])", _ARTISTS_LIST)
+
+
+BASE = {
+    "id": Key("id"),
+    "uri": Key("uri"),
+    "name": Key("name"),
+    "type": Key("type"),
+    "spotify_url": Nested("external_urls", "spotify"),
+    "preview_url": Key("preview_url"),
+    "popularity": Key("popularity"),
+    "raw": Source("item")
+}
+
+SPECS = {
+    "tracks": dict(BASE, **{
+        "track_name": Key("name"),
+        "artists": ARTISTS,
+        "artist_names": ARTIST_NAMES,
+        "album": Pick("album", "name", "id", "uri", "release_date"),
+        "duration_ms": Key("duration_ms"),
+        "explicit": Key("explicit", True)
+    }),
+    "albums": dict(BASE, **{
+        "album_name": Key("name"),
+        "artists": ARTISTS,
+        "artist_names": ARTIST_NAMES,
+        "release_date": Key("release_date"),
+        "total_tracks": Key("total_tracks"),
+        "images": Key("images", [])
+    }),
+    "artists": dict(BASE, **{
+        "artist_name": Key("name"),
+        "genres": Key("genres", []),
+        "followers": Nested("followers", "total", 0),
+        "images": Key("images", [])
+    }),
+    "playlists": dict(BASE, **{
+        "playlist_name": Key("name"),
+        "owner": Nested("owner", "display_name"),
+        "owner_id": Nested("owner", "id"),
+        "track_count": Nested("tracks", "total", 0),
+        "public": Key("public", False),
+        "images": Key("images", [])
+    }),
+    "shows": dict(BASE, **{
+        "show_name": Key("name"),
+        "publisher": Key("publisher"),
+        "description": Key("description"),
+        "languages": Key("languages", []),
+        "explicit": Key("explicit", False),
+        "images": Key("images", [])
+    }),
+    "episodes": dict(BASE, **{
+        "episode_name": Key("name"),
+        "description": Key("description"),
+        "duration_ms": Key("duration_ms"),
+        "release_date": Key("release_date"),
+        "explicit": Key("explicit", False),
+        "images": Key("images", []),
+        "show": Pick("show", "name", "id")
+    })
+}
+
+
+# Returns the first field `search_type` does not have, None when they all exist
+def unknown_field(search_type, fields):
+    spec = SPECS[search_type]
+    for field in fields:
+        if field not in spec:
+            return field
+    return None
+
+
+_compiled = {}
+
+
+def _needs(spec, fields):
+    needs = {}
+    for field in fields:
+        for name, source in spec[field].needs:
+            needs.setdefault(name, source)
+    return [f"    {name} = {source}" for name, source in needs.items()]
+
+
+def _build(name, lines):
+    source = "\n".join(lines) + "\n"
+    namespace = {}
+    exec(compile(source, f"<normalizer {name}>", "exec"), namespace)
+    function = namespace[name]
+    function.source = source
+    return function
+
+
+"""
+Function: build (once) the normalizer for one search type
+Returns: item --> dict, the function's generated code is on its `source` attribute
+Params:
+        @fields: only these keys, in this order (None: every field of the type)
+"""
+def compile_normalizer(search_type, fields=None):
+    cache_key = (search_type, tuple(fields) if fields is not None else None)
+    normalize = _compiled.get(cache_key)
+    if normalize is not None:
+        return normalize
+
+    spec = SPECS[search_type]
+    fields = tuple(spec) if fields is None else tuple(fields)
+    missing = unknown_field(search_type, fields)
+    if missing is not None:
+        raise KeyError(f"{search_type} has no field {missing!r}")
+
+    lines = [f"def normalize_{search_type}(item):", "    get = item.get"]
+    lines += _needs(spec, fields)
+    lines.append("    return {" + ", ".join(f"{field!r}: {spec[field].source()}" for field in fields) + "}")
+    normalize = _build(f"normalize_{search_type}", lines)
+    _compiled[cache_key] = normalize
+    return normalize
+
+
+# one field as a method of a record (records.py), the same extractor reading `self.raw`
+def compile_getter(search_type, field):
+    spec = SPECS[search_type]
+    lines = [f"def {field}(self):", "    item = self.raw", "    get = item.get"]
+    lines += _needs(spec, (field,))
+    lines.append(f"    return {spec[field].source()}")
+    return _build(field, lines)
+
+
+def normalize_item(item, search_type, fields=None):
+    return compile_normalizer(search_type, fields)(item)
+
+
+# a whole page of raw items, the normalizer is looked up once
+def normalize_page(items, search_type, fields=None):
+    normalize = compile_normalizer(search_type, fields)
+    return [normalize(item) for item in items if item is not None]
@@ -0,0 +1,95 @@
+from collections.abc import Mapping
+
+from .normalizers import SPECS, compile_getter, compile_normalizer
+
+
+"""
+Compact search result records
+Each record only holds the raw spotify item (one slot), every other field is
+computed from it on access. They behave like the read-only dicts search_wrapper
+used to build: record["artist_names"], record.get("album"), dict(record), ==
+    TrackResult, AlbumResult, ArtistResult, PlaylistResult, ShowResult, EpisodeResult
+The fields and their properties come from the specs in normalizers.py
+"""
+
+
+class BaseResult(Mapping):
+    __slots__ = ("raw",)
+    search_type = None
+    FIELDS = ()
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    # Mapping interface, keys are the record's FIELDS
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self):
+        return len(self.FIELDS)
+
+    def __contains__(self, key):
+        return key in self.FIELDS
+
+    # every field at once, one compiled function instead of a property call per field
+    def to_dict(self):
+        return compile_normalizer(self.search_type)(self.raw)
+
+    def __repr__(self):
+        return f"{type(self).__name__}(id={self.id!r}, name={self.name!r})"
+
+
+# one read-only property per field of the spec, "raw" is the slot itself
+def _record_type(class_name, search_type):
+    namespace = {"__slots__": (), "search_type": search_type, "FIELDS": tuple(SPECS[search_type])}
+    for field in SPECS[search_type]:
+        if field != "raw":
+            namespace[field] = property(compile_getter(search_type, field))
+    return type(class_name, (BaseResult,), namespace)
+
+
+TrackResult = _record_type("TrackResult", "tracks")
+AlbumResult = _record_type("AlbumResult", "albums")
+ArtistResult = _record_type("ArtistResult", "artists")
+PlaylistResult = _record_type("PlaylistResult", "playlists")
+ShowResult = _record_type("ShowResult", "shows")
+EpisodeResult = _record_type("EpisodeResult", "episodes")
+
+
+RECORD_TYPES = {
+    "tracks": TrackResult,
+    "albums": AlbumResult,
+    "artists": ArtistResult,
+    "playlists": PlaylistResult,
+    "shows": ShowResult,
+    "episodes": EpisodeResult
+}
+
+
+def make_record(item, search_type):
+    return RECORD_TYPES[search_type](item)
+
+
+# a whole page of raw items, None items skipped
+def make_records(items, search_type):
+    record_type = RECORD_TYPES[search_type]
+    return [record_type(item) for item in items if item is not None]
+
+
+# json hooks so records can be stored compactly (raw item only) and rebuilt on load
+def record_to_json(obj):
+    if isinstance(obj, BaseResult):
+        return {"__record__": obj.search_type, "raw": obj.raw}
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def record_from_json(data):
+    search_type = data.get("__record__")
+    if search_type in RECORD_TYPES and "raw" in data:
+        return RECORD_TYPES[search_type](data["raw"])
+    return data
@@ -0,0 +1,199 @@
+import hashlib, json, os, threading, time
+from collections import OrderedDict
+
+from backend.file_lock import atomic_write_json
+from .records import record_to_json, record_from_json
+
+
+class SearchCache:
+    """
+    Two tier cache for normalized search responses
+        - memory tier: LRU (OrderedDict), bounded by max_entries
+        - disk tier:   one json file per entry under cache_dir, bounded by max_disk_entries
+                       survives between tmfy processes
+    Every entry carries its own expiry (ttl seconds), expired entries count as misses
+    but stay readable through get_stale() until evicted (conditional requests reuse them)
+    """
+    def __init__(self, cache_dir=None, ttl=3600, max_entries=256, max_disk_entries=2048):
+        self.cache_dir = cache_dir or os.getenv("TMFY_CACHE_DIR", os.path.join(".tmfy_cache", "search"))
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+    """
+    Function: build the cache key for one /search request
+    Returns: hex digest string (also used as the on-disk file name)
+    """
+    @staticmethod
+    def make_key(query, search_type, limit, offset, market=None):
+        raw_key = json.dumps([query.strip().lower(), search_type, limit, offset, market])
+        return hashlib.sha1(raw_key.encode("utf-8")).hexdigest()
+
+
+    """
+    Function: look a key up, memory first then disk
+    Returns: cached value or None on miss/expired
+    """
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    self.memory_hits += 1
+                    return value
+
+        entry = self._read_disk(key)
+        if entry is not None and entry["expires_at"] > now:
+            with self._lock:
+                self._remember(key, entry["expires_at"], entry["value"])
+                self.hits += 1
+                self.disk_hits += 1
+            return entry["value"]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+
+    """
+    Function: look a key up, expired or not (not counted as a hit or a miss)
+    Returns: cached value or None when it is in neither tier
+    """
+    def get_stale(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                return entry[1]
+        entry = self._read_disk(key)
+        if entry is None:
+            return None
+        with self._lock:
+            # kept in memory, expired or not, so a touch() that follows is seen by is_fresh()
+            self._remember(key, entry["expires_at"], entry["value"])
+        return entry["value"]
+
+
+    # unexpired in the memory tier (no disk read, not counted)
+    def is_fresh(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            return entry is not None and entry[0] > time.time()
+
+
+    """
+    Function: store a value in both tiers
+    Params:
+            @ttl: per entry override of the default ttl (seconds)
+    """
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._remember(key, expires_at, value)
+        self._write_disk(key, {"expires_at": expires_at, "ttl": ttl, "value": value})
+
+
+    """
+    Function: start an entry's ttl over without writing it again
+              memory: new expiry, disk: the file's mtime (read back as written + ttl)
+    """
+    def touch(self, key, ttl=None):
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory[key] = (expires_at, entry[1])
+        try:
+            os.utime(self._path(key), (now, now))
+        except OSError:
+            pass
+
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".json"):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+                "memory_entries": len(self._memory)
+            }
+
+
+    # caller must hold self._lock
+    def _remember(self, key, expires_at, value):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+
+    def _read_disk(self, key):
+        try:
+            with open(self._path(key), "r") as file:
+                entry = json.load(file, object_hook=record_from_json)
+                # touch() moved the mtime forward, the ttl counts from there
+                if "ttl" in entry:
+                    touched_at = os.fstat(file.fileno()).st_mtime
+                    entry["expires_at"] = max(entry["expires_at"], touched_at + entry["ttl"])
+                return entry
+        except (FileNotFoundError, json.JSONDecodeError, OSError):
+            return None
+
+
+    def _write_disk(self, key, entry):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # records are stored as their raw item only and rebuilt on read
+            atomic_write_json(self._path(key), entry, default=record_to_json)
+            self._evict_disk()
+        except (OSError, TypeError, ValueError):
+            # the disk tier is best effort, memory tier still holds the entry
+            pass
+
+
+    # drop the least recently written entries once the directory is over its bound
+    def _evict_disk(self):
+        names = [name for name in os.listdir(self.cache_dir) if name.endswith(".json")]
+        overflow = len(names) - self.max_disk_entries
+        if overflow <= 0:
+            return
+        paths = [os.path.join(self.cache_dir, name) for name in names]
+        paths.sort(key=lambda path: os.path.getmtime(path) if os.path.exists(path) else 0)
+        for path in paths[:overflow]:
+            try:
+                os.remove(path)
+                with self._lock:
+                    self.evictions += 1
+            except OSError:
+                pass
@@ -1,12 +1,177 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from .search_wrapper import Search
+from .search_cache import SearchCache
+from .local_catalog import LocalCatalog
+from backend.transport.single_flight import SingleFlight
+from backend import metrics
+from backend.profiler import span
+
+# spotify's /search refuses offset + limit past this point
+MAX_SEARCH_OFFSET = 1000
 
 
 class SearchManager:
-    def __init__ (self, token):
-        self.search_wrapper_api = Search(token)
+    def __init__ (self, token, cache=None, session=None, catalog=None):
+        self.search_wrapper_api = Search(token, session=session)
         self.focus = None
-        self.cached_result = {}
-        
-        
+        self.cached_result = cache if cache is not None else SearchCache()
+        # every record fetched from the api is kept in the local full text catalog (written in the background)
+        self.catalog = catalog if catalog is not None else LocalCatalog()
+        self.last_error = None
+        # concurrent cache misses for the same key share one search
+        self.inflight = SingleFlight()
+
+
+    """
+    Function: cached front door to Search.search
+    Returns: same result dict as Search.search
+             with several types ("artists,albums" or a list) ONE request is sent and the
+             result is Search.search_types' per type map: {"results": {type: result dict}}
+             only successful results are cached, errors always go back to the api next time
+             concurrent calls for the same uncached key share one request
+    """
     def run (self, query, search_type="tracks", limit=5, offset=0, market=None):
-            return self.search_wrapper_api.search(query, search_type, limit, offset, market)
\ No newline at end of file
+            search_types = self.split_types(search_type)
+            if not query or not query.strip():
+                return self._search(query, search_types, limit, offset, market)
+
+            key = self.cached_result.make_key(query, ",".join(search_types), limit, offset, market)
+            with span("search", search_type=",".join(search_types)) as attrs:
+                cached = self.cached_result.get(key)
+                attrs["cache"] = "hit" if cached is not None else "miss"
+                metrics.registry().record_cache("search", cached is not None)
+                if cached is not None:
+                    return cached
+                return self.inflight.do(key, lambda: self._search_and_cache(key, query, search_types, limit, offset, market))
+
+
+    def _search_and_cache (self, key, query, search_types, limit, offset, market):
+            # a flight that finished while we were queued may have filled the cache already,
+            # not counted again: run() recorded this lookup
+            cached = self.cached_result.get_stale(key) if self.cached_result.is_fresh(key) else None
+            if cached is not None:
+                return cached
+            result = self._search(query, search_types, limit, offset, market, key)
+            # a 304 handed back the expired entry and restarted its ttl, it is cached already
+            if result.get("success") and not self.cached_result.is_fresh(key):
+                self.cached_result.set(key, result)
+                self.catalog.upsert_result_later(result)
+            return result
+
+
+    """
+    Function: answer from the local catalog only, no request
+    Returns: same result dict as Search.search with "source": "local"
+             (search_type None or several types: matches of any of them)
+    """
+    def run_local (self, query, search_type="tracks", limit=5):
+            search_types = self.split_types(search_type) if search_type else [None]
+            if len(search_types) == 1:
+                return self.catalog.search(query, search_types[0], limit)
+            results = [self.catalog.search(query, t, limit) for t in search_types]
+            merged = [record for result in results if result["success"] for record in result["result"]]
+            return {
+                "success": any(result["success"] for result in results),
+                "source": "local",
+                "search_type": search_types,
+                "query": query,
+                "total_results": len(merged),
+                "result": merged
+            }
+
+
+    """
+    Function: local hits first, remote results after
+              the remote search (run) starts before the catalog is queried, on_local
+              gets the local result while the request is still in flight
+    Returns: the remote result, same as run()
+    """
+    def run_hybrid (self, query, search_type="tracks", limit=5, offset=0, market=None, on_local=None):
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix="tmfy-remote") as executor:
+                remote = executor.submit(self.run, query, search_type, limit, offset, market)
+                if on_local is not None:
+                    on_local(self.run_local(query, search_type, limit))
+                return remote.result()
+
+
+    # "artists, albums" / ["artists", "albums"] / "tracks" --> list of types
+    @staticmethod
+    def split_types (search_type):
+            if isinstance(search_type, (list, tuple)):
+                return [t.strip() for t in search_type if t and t.strip()]
+            if isinstance(search_type, str) and "," in search_type:
+                return [t.strip() for t in search_type.split(",") if t.strip()]
+            return [search_type]
+
+
+    # @key: cached_result key the result is kept under, None for uncached calls
+    def _search (self, query, search_types, limit, offset, market, key=None):
+            cache = self.cached_result if key is not None else None
+            if len(search_types) == 1:
+                return self.search_wrapper_api.search(query, search_types[0], limit, offset, market,
+                                                      cache=cache, cache_key=key)
+            return self.search_wrapper_api.search_types(query, search_types, limit, offset, market,
+                                                        cache=cache, cache_key=key)
+
+
+    """
+    Function: sync wrapper around AsyncSearchManager.run_many for the cli
+    Returns: list of result dicts in the same order as queries
+             (must not be called from inside a running event loop)
+    """
+    def run_many (self, queries, search_type="tracks", limit=5, offset=0, market=None, concurrency=8):
+            # imported here, async_search builds on this module (and asyncio is slow to import)
+            import asyncio
+            from .async_search import AsyncSearchManager
+
+            async_manager = AsyncSearchManager(manager=self, concurrency=concurrency)
+            try:
+                return asyncio.run(async_manager.run_many(queries, search_type, limit, offset, market))
+            finally:
+                async_manager.close()
+
+
+
+    """
+    Function: stream normalized items across pages, page N+1 is fetched in the
+              background while the caller is still handling page N
+    Returns: generator of result items, stops at max_items / total_results / a failed page
+             (a failed page is kept in self.last_error)
+    Params:
+            @max_items: stop after this many items (None = everything spotify will page through)
+            @page_size: items per request (1-50)
+    """
+    def iter_results (self, query, search_type="tracks", max_items=None, page_size=50, market=None):
+            self.last_error = None
+            page_size = max(1, min(page_size, 50))
+            wanted = MAX_SEARCH_OFFSET if max_items is None else min(max_items, MAX_SEARCH_OFFSET)
+            if wanted <= 0:
+                return
+
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tmfy-prefetch")
+
+            def fetch(offset):
+                return executor.submit(self.run, query, search_type, min(page_size, wanted - offset), offset, market)
+
+            offset = 0
+            pending = fetch(offset)
+            try:
+                while pending is not None:
+                    page = pending.result()
+                    if not page.get("success"):
+                        self.last_error = page
+                        return
+
+                    items = page["result"]
+                    offset += min(page_size, wanted - offset)
+                    limit_to = min(wanted, page.get("total_results", 0))
+                    # kick off the next page before handing this one to the caller
+                    pending = fetch(offset) if items and offset < limit_to else None
+
+                    for item in items:
+                        yield item
+            finally:
+                if pending is not None:
+                    pending.cancel()
+                executor.shutdown(wait=False)
@@ -1,10 +1,33 @@
 import requests
+from backend.endpoints import api_url
+from backend import metrics
+from backend.profiler import span
+from backend.transport.session import SpotifySession
+from backend.transport.revalidation import default_revalidator
+from .normalizers import normalize_page, unknown_field
+from .records import make_record, make_records
+
+
+VALID_SEARCH_TYPES = ["artists", "tracks", "albums", "playlists", "shows", "episodes"]
+
+# our plural search_type --> spotify's singular type parameter
+TYPE_MAP = {
+    "artists": "artist",
+    "tracks": "track",
+    "albums": "album",
+    "playlists": "playlist",
+    "shows": "show",
+    "episodes": "episode"
+}
 
 
 class Search:
-    def __init__(self, token):
+    def __init__(self, token, session=None, revalidator=None):
         self.token = token
-        
+        self.session = session if session is not None else SpotifySession(token)
+        # an expired SearchManager entry is revalidated (If-None-Match), a 304 reuses the normalized result
+        self.revalidator = revalidator if revalidator is not None else default_revalidator()
+
     """
     Function: universal search api that directly maps to spotify's /search endpoint
     Returns: standardize json format
@@ -13,237 +36,186 @@ class Search:
             @search_type: what to search for ("artist", "album", "playlist"...)
             @limit: number of results, default at 20
             @offset: pagination, default to 0
-    """    
-    def search(self, query, search_type, limit=10, offset=0, market=None):
+            @fields: plain dicts with only these keys instead of records ("id", "name"...)
+            @cache/@cache_key: SearchCache entry the result is kept in (see transport/revalidation.py)
+    """
+    def search(self, query, search_type, limit=10, offset=0, market=None, fields=None, cache=None, cache_key=None):
         # Input validation
-        valid_search_types = ["artists", "tracks", "albums", "playlists", "shows", "episodes"]
-        
-        #validate query
-        #Empty Query
-        if not query or not query.strip():
+        error = self.validate(query, [search_type], limit, offset, fields)
+        if error:
+            return self.error_result(error, search_type, query, reason="invalid")
+
+        """
+            This block sends the request, and acquires the response
+            if response.status_code(401, !200) return == generic(false) and empty result
+            if not parse the response and return == geric(true) with result list
+        """
+        # Parse the reponse (200 only, a 304 hands back what this returned last time)
+        def normalize(response):
+            with span("normalize", search_type=search_type) as attrs:
+                result = self.normalize_section(response.json(), search_type, query)
+                attrs["items"] = len(result.get("result", []))
+            return result
+
+        try:
+            response, result = self.send(query, [search_type], limit, offset, market, normalize, cache, cache_key)
+
+            if response.status_code == 401:
+                return self.error_result("request.get(search) == 401! \nToken might have expired or is invalid.", search_type, query,
+                                         reason="unauthorized")
+            elif result is None:
+                return self.error_result(f"Spotify Api Error{response.status_code}", search_type, query,
+                                         reason=f"http_{response.status_code}")
+            return self.project(result, fields)
+
+        except requests.exceptions.RequestException as e:
+            return self.error_result(f"Network error: {str(e)}", search_type, query, reason="network")
+
+
+    """
+    Function: several search types in ONE /search request (spotify takes a comma separated type list)
+    Returns: {"success", "query", "search_type": [types], "results": {type: same dict as search()}}
+    Params:
+            @search_types: list of search types ("artists", "albums", "tracks"...)
+            @limit/@offset/@fields: applied to every type
+            @cache/@cache_key: same as search()
+    """
+    def search_types(self, query, search_types, limit=10, offset=0, market=None, fields=None, cache=None, cache_key=None):
+        search_types = list(dict.fromkeys(search_types or []))
+        error = self.validate(query, search_types, limit, offset, fields)
+        if error:
+            return self.error_multi(error, search_types, query, reason="invalid")
+
+        def normalize(response):
+            with span("normalize", search_type=",".join(search_types)) as attrs:
+                data = response.json()
+                results = {search_type: self.normalize_section(data, search_type, query) for search_type in search_types}
+                attrs["items"] = sum(len(section.get("result", [])) for section in results.values())
             return {
-                "success": False,
-                "error": "Query cannot be empty",
-                "search_type": search_type,
+                "success": all(section["success"] for section in results.values()),
+                "search_type": search_types,
                 "query": query,
-                "result": []
+                "results": results
             }
-        
+
+        try:
+            response, result = self.send(query, search_types, limit, offset, market, normalize, cache, cache_key)
+
+            if response.status_code == 401:
+                return self.error_multi("request.get(search) == 401! \nToken might have expired or is invalid.", search_types, query,
+                                        reason="unauthorized")
+            elif result is None:
+                return self.error_multi(f"Spotify Api Error{response.status_code}", search_types, query,
+                                        reason=f"http_{response.status_code}")
+            if fields is not None:
+                result = dict(result, results={search_type: self.project(section, fields)
+                                               for search_type, section in result["results"].items()})
+            return result
+
+        except requests.exceptions.RequestException as e:
+            return self.error_multi(f"Network error: {str(e)}", search_types, query, reason="network")
+
+
+    # Returns the first validation error message, or None when the request is fine
+    def validate(self, query, search_types, limit, offset, fields=None):
+        #validate query
+        #Empty Query
+        if not query or not query.strip():
+            return "Query cannot be empty"
+
         #validate search type
         #Empty/wrong search_type
-        if not search_type or search_type not in valid_search_types:
-            return {
-                "success": False,
-                "error": f"Invalid search type. Must be one of: {','.join(valid_search_types)}",
-                "search_type": search_type,
-                "query": query,
-                "result": []
-            }
-        
+        if not search_types or any(not search_type or search_type not in VALID_SEARCH_TYPES for search_type in search_types):
+            return f"Invalid search type. Must be one of: {','.join(VALID_SEARCH_TYPES)}"
+
         #validate limit (Spotify allows 1-50)
         if not isinstance(limit, int) or limit < 1 or limit > 50:
-            return {
-                "success": False,
-                "error": "Limit must be an integer between 1 and 50",
-                "search_type": search_type,
-                "query": query,
-                "result": []
-            }
-        
+            return "Limit must be an integer between 1 and 50"
+
         #valid offset
         if not isinstance(offset, int) or offset < 0:
-            return {
-                "success": False,
-                "error": "Offset must be a non-negative integer",
-                "search_type": search_type,
-                "query": query,
-                "result": []
-            }
-        
-        # Building the request
-        url = 'https://api.spotify.com/v1/search'
-        headers = {
-            "Authorization": f'Bearer {self.token}'
-        }
+            return "Offset must be a non-negative integer"
+
+        #validate projected fields
+        if fields is not None:
+            for search_type in search_types:
+                field = unknown_field(search_type, fields)
+                if field is not None:
+                    return f"Unknown field for {search_type}: {field}"
+        return None
+
+
+    # Building the request
+    # Returns: (response, normalize(response) or the revalidated result, None when neither)
+    def send(self, query, search_types, limit, offset, market, normalize=None, cache=None, cache_key=None):
+        url = api_url('/search')
         params = {
             "q": query,
-            "type": search_type,
+            "type": ",".join(TYPE_MAP.get(search_type, search_type) for search_type in search_types),
             "limit": limit,
             "offset": offset
         }
-        type_map = {
-            "artists": "artist",
-            "tracks": "track",
-            "albums": "album",
-            "playlists": "playlist",
-            "shows": "show",
-            "episodes": "episode"
-        }
-        params["type"] = type_map.get(search_type, search_type)
-        
+
         if market:
             params["market"] = market
-        
-        """
-            This block sends the request, and acquires the response 
-            if response.status_code(401, !200) return == generic(false) and empty result
-            if not parse the response and return == geric(true) with result list
-        """    
-        try:
-            response = requests.get(url, headers=headers, params=params)
-            
-            if response.status_code == 401:
-                return {
-                    "success": False,
-                    "error": "request.get(search) == 401! \nToken might have expired or is invalid.",
-                    "search_type": search_type,
-                    "query": query,
-                    "result": []
-                }
-            elif response.status_code != 200:
-                return {
-                    "success": False,
-                    "error": f"Spotify Api Error{response.status_code}",
-                    "search_type": search_type,
-                    "query": query,
-                    "result": []
-                }
-                   
-            # Parse the reponse
-            data = response.json()
-            if search_type in data:
-                raw_data_items = data[search_type]["items"]
-                total = data[search_type]["total"]
-                
-                result = []
-                for item in raw_data_items:
-                    #1. Build base result_item (universal fields) for all search_types
-                    if item is None:
-                        continue
-                    result_items = {
-                        "id": item.get("id"),          # Spotify id for search_type
-                        "uri": item.get("uri"),        # Spotify URI, used for playing: spotify:track:uri
-                        "name": item.get("name"),
-                        "type": item.get("type"),
-                        
-                        #URLs for Linking
-                        "spotify_url": item.get("external_urls", {}).get("spotify"),
-                        "preview_url": item.get("preview_url"),
-                        "popularity": item.get("popularity"),
-                        
-                        #rawData if we want the rawdata it self
-                        "raw": item
-                    }
-                    
-                    #2. Add search_type specific fields
-                    ##searchtype==track
-                    if search_type == "tracks":
-                        result_items.update({
-                            "track_name": item.get("name"),
-                            "artists": [
-                                {
-                                    "name": artists.get("name"),
-                                    "id": artists.get("id"),
-                                    "uri": artists.get("uri")
-                                }
-                                for artists in item.get("artists", [])    
-                            ],
-                            "artist_names": ", ".join([artists.get("name", "") for artists in item.get("artists", [])]),
-                            "album": {
-                                "name": item.get("album", {}).get("name"),
-                                "id": item.get("album", {}).get("id"),
-                                "uri": item.get("album", {}).get("uri"),
-                                "release_date": item.get("album", {}).get("release_date")
-                            },
-                            "duration_ms": item.get("duration_ms"), 
-                            "explicit": item.get("explicit", True)
-                        })
-                
-                    ##searchtype=albums
-                    elif search_type == "albums":
-                        result_items.update({
-                            "album_name": item.get("name"),
-                            "artists": [
-                                {
-                                    "name": artists.get("name"),
-                                    "id": artists.get("id"),
-                                    "uri": artists.get("uri")
-                                }
-                                for artists in item.get("artists", [])
-                            ],
-                            "artist_names": ", ".join([artists.get("name", "") for artists in item.get("artists", [])]),
-                            "release_date": item.get("release_date"),
-                            "total_tracks": item.get("total_tracks"),
-                            "images": item.get("images", [])
-                        })
-                        
-                    ##searchtype=artists   
-                    elif search_type == "artists":
-                        result_items.update({
-                            "artist_name": item.get("name"),
-                            "genres": item.get("genres", []),
-                            "followers": item.get("followers", {}).get("total", 0),
-                            "images": item.get("images", [])
-                        }) 
-                                    
-                    ##playlists
-                    elif search_type == "playlists":
-                        result_items.update({
-                            "playlist_name": item.get("name"),
-                            "owner": item.get("owner", {}).get("display_name"),
-                            "owner_id": item.get("owner", {}).get("id"),
-                            "track_count": item.get("tracks", {}).get("total", 0),
-                            "public": item.get("public", False),
-                            "images": item.get("images", [])
-                        })
-                    
-                    ##shows
-                    elif search_type == "shows":
-                        result_items.update({
-                            "show_name": item.get("name"),
-                            "publisher": item.get("publisher"),
-                            "description": item.get("description"),
-                            "languages": item.get("languages", []),
-                            "explicit": item.get("explicit", False),
-                            "images": item.get("images", [])
-                        })
-                        
-                    ##episodes
-                    elif search_type == "episodes":
-                        result_items.update({
-                            "episode_name": item.get("name"),
-                            "description": item.get("description"),
-                            "duration_ms": item.get("duration_ms"),
-                            "release_date": item.get("release_date"),
-                            "explicit": item.get("explicit", False),
-                            "images": item.get("images", []),
-                            "show": {
-                                "name": item.get("show", {}).get("name"),
-                                "id": item.get("show", {}).get("id")
-                            }
-                        })
-                    result.append(result_items)
-                return {
-                    "success": True,
-                    "search_type": search_type,
-                    "query": query,
-                    "total_results": total,
-                    "result": result
-                }
-            else:
-                return {
-                    "success": False,
-                    "error": f"Unexpected response structure for search_type: {search_type}",
-                    "search_type": search_type,
-                    "query": query,
-                    "result": []
-                }
-                
-        except requests.exceptions.RequestException as e:
-            return {
-                "success": False, 
-                "error": f"Network error: {str(e)}", 
-                "query": query,
-                "search_type": search_type,
-                "result": []
-            }
\ No newline at end of file
+        return self.revalidator.get(self.session, url, params, normalize=normalize, cache=cache, cache_key=cache_key)
+
+
+    # @reason: short label counted in tmfy_search_errors_total (tmfy stats), None counts nothing
+    def error_result(self, error, search_type, query, reason=None):
+        if reason is not None:
+            metrics.registry().inc("tmfy_search_errors_total", reason=reason)
+        return {
+            "success": False,
+            "error": error,
+            "search_type": search_type,
+            "query": query,
+            "result": []
+        }
+
+
+    def error_multi(self, error, search_types, query, reason=None):
+        if reason is not None:
+            metrics.registry().inc("tmfy_search_errors_total", reason=reason)
+        return {
+            "success": False,
+            "error": error,
+            "search_type": search_types,
+            "query": query,
+            "results": {search_type: self.error_result(error, search_type, query) for search_type in search_types}
+        }
+
+
+    """
+    Function: normalize one section ("tracks", "albums"...) of a /search response
+    Returns: the standard single type result dict
+    """
+    def normalize_section(self, data, search_type, query):
+        if search_type not in data:
+            return self.error_result(f"Unexpected response structure for search_type: {search_type}", search_type, query,
+                                     reason="bad_response")
+
+        raw_data_items = data[search_type]["items"]
+        total = data[search_type]["total"]
+
+        return {
+            "success": True,
+            "search_type": search_type,
+            "query": query,
+            "total_results": total,
+            "result": make_records(raw_data_items, search_type)
+        }
+
+
+    # records --> plain dicts with only `fields` (normalizers.py), applied after the
+    # validator store so a 304 is projected the same way as a fresh page
+    def project(self, result, fields):
+        if fields is None or not result.get("success"):
+            return result
+        raw_items = [record.raw for record in result["result"]]
+        return dict(result, result=normalize_page(raw_items, result["search_type"], fields))
+
+
+    # lazy slotted record (see records.py), derived fields are computed on access
+    def normalize_item(self, item, search_type):
+        return make_record(item, search_type)
@@ -0,0 +1,56 @@
+import asyncio, time
+
+import pytest
+from backend.search.async_search import AsyncSearch, AsyncSearchManager
+from backend.search.search_cache import SearchCache
+from backend.search.search_manager import SearchManager
+from backend.testing.fake_spotify import FakeSpotify
+
+
+@pytest.fixture
+def fake():
+    with FakeSpotify(latency=0.02) as fake:
+        yield fake
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SearchCache(cache_dir=str(tmp_path / "search"))
+
+
+def test_run_many_keeps_input_order(fake, cache):
+    names = [f"artist {n}" for n in range(20)]
+    manager = AsyncSearchManager("fake-token", cache=cache, concurrency=10)
+    start = time.perf_counter()
+    results = asyncio.run(manager.run_many(names, search_type="artists", limit=1))
+    elapsed = time.perf_counter() - start
+    manager.close()
+    assert [res["result"][0]["artist_name"] for res in results] == names
+    # 20 sequential calls would take at least 20 * latency
+    assert elapsed < 20 * fake.latency
+    assert fake.request_counts["GET /v1/search"] == 20
+
+
+def test_run_many_per_query_overrides(fake, cache):
+    manager = AsyncSearchManager("fake-token", cache=cache)
+    results = asyncio.run(manager.run_many(["Eminem", {"query": "Eminem", "search_type": "albums", "limit": 2}],
+                                           search_type="artists", limit=1))
+    manager.close()
+    assert results[0]["search_type"] == "artists" and len(results[0]["result"]) == 1
+    assert results[1]["search_type"] == "albums" and len(results[1]["result"]) == 2
+
+
+def test_async_search_matches_sync_result(fake):
+    search = AsyncSearch("fake-token")
+    res = asyncio.run(search.search("Eminem", "tracks", limit=3))
+    search.close()
+    assert res["success"] is True and len(res["result"]) == 3
+
+
+def test_sync_wrapper_uses_cache(fake, cache):
+    manager = SearchManager("fake-token", cache=cache)
+    first = manager.run_many(["a", "b", "a"], search_type="artists", limit=1)
+    second = manager.run_many(["a", "b"], search_type="artists", limit=1)
+    assert [res["query"] for res in first] == ["a", "b", "a"]
+    assert [res["query"] for res in second] == ["a", "b"]
+    assert fake.request_counts["GET /v1/search"] <= 3
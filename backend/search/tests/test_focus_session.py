@@ -0,0 +1,48 @@
+from backend.search.focus_session import FocusSession, compact, parse_ref, parse_refs
+from backend.search.records import make_record
+from backend.testing.fake_spotify import make_search_item
+
+
+def test_parse_ref():
+    assert parse_ref("#3") == 3
+    assert parse_ref(" 12 ") == 12
+    assert parse_ref("#0") is None
+    assert parse_ref("Jay-Z") is None
+    assert parse_ref(None) is None
+
+
+def test_parse_refs():
+    assert parse_refs("#1,3") == [1, 3]
+    assert parse_refs("1, #2,") == [1, 2]
+    assert parse_refs("#1,x") is None
+    assert parse_refs("") is None
+
+
+def test_results_survive_a_new_process(tmp_path):
+    path = str(tmp_path / "session.json")
+    albums = [make_record(make_search_item("albums", "4:44", n), "albums") for n in range(3)]
+    session = FocusSession(path)
+    session.set_focus({"id": "a1", "uri": "spotify:artist:a1", "name": "Jay-Z"}, "artist")
+    session.set_results("albums", albums)
+
+    restored = FocusSession(path).load()
+    assert restored.focus == {"type": "artist", "id": "a1", "uri": "spotify:artist:a1", "name": "Jay-Z"}
+    assert restored.resolve("#2") == compact(albums[1], "album")
+    assert restored.resolve("#2")["uri"] == albums[1].uri
+    assert restored.resolve("#4") is None
+
+
+def test_load_picks_up_other_writers(tmp_path):
+    path = str(tmp_path / "session.json")
+    reader = FocusSession(path).load()
+    assert reader.resolve("#1") is None
+
+    FocusSession(path).set_results("tracks", [{"id": "t1", "uri": "spotify:track:t1", "name": "Smile"}])
+    assert reader.load().resolve("#1")["type"] == "track"
+
+
+def test_corrupt_file_is_ignored(tmp_path):
+    path = tmp_path / "session.json"
+    path.write_text("{not json")
+    session = FocusSession(str(path)).load()
+    assert session.focus is None and session.resolve("#1") is None
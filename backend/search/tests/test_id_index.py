@@ -0,0 +1,74 @@
+import pytest
+import backend
+from backend.search.id_index import IdIndex, normalize_name
+from backend.testing.fake_spotify import artist_id_for
+
+
+@pytest.fixture
+def index(tmp_path):
+    return IdIndex(path=str(tmp_path / "ids.json"))
+
+
+def test_keys_ignore_case_accents_and_spacing():
+    assert normalize_name("  Beyoncé ") == normalize_name("BEYONCE")
+    assert normalize_name("Sigur  Rós") == "sigur ros"
+
+
+def test_index_persists_between_instances(index):
+    index.put_artist("Beyoncé", "b1")
+    index.put_track("Jay-Z", "Smile", "t1")
+    fresh = IdIndex(path=index.path)
+    assert fresh.lookup_artist("beyonce") == ("b1", True)
+    assert fresh.lookup_track("JAY-Z", "smile ") == ("t1", True)
+    assert fresh.lookup_artist("Drake") == (None, False)
+
+
+def test_stale_entries_are_flagged(index):
+    index.put_artist("Jay-Z", "j1")
+    index.ttl = 0
+    assert index.lookup_artist("Jay-Z") == ("j1", False)
+    assert index.stats()["stale_hits"] == 1
+
+
+def test_save_merges_other_writers(index):
+    other = IdIndex(path=index.path)
+    index.put_artist("Jay-Z", "j1")
+    other.put_artist("Drake", "d1")
+    merged = IdIndex(path=index.path)
+    assert merged.lookup_artist("Jay-Z")[0] == "j1"
+    assert merged.lookup_artist("Drake")[0] == "d1"
+
+
+def test_artist_resolution_skips_search_once_known(fake, index):
+    search = backend.Search("fake-token", id_index=index)
+    assert search.get_artist_id("Jay-Z") == artist_id_for("Jay-Z")
+    assert search.get_artist_id("jay-z") == artist_id_for("Jay-Z")
+    search.get_artist_top_tracks("JAY-Z")
+    assert fake.request_counts["GET /v1/search"] == 1
+    assert (index.stats()["misses"], index.stats()["hits"]) == (1, 2)
+
+
+def test_stale_entry_is_revalidated(fake, index):
+    index.put_artist("Jay-Z", "old-id")
+    index.ttl = 0
+    search = backend.Search("fake-token", id_index=index)
+    assert search.get_artist_id("Jay-Z") == artist_id_for("Jay-Z")
+    assert fake.request_counts["GET /v1/search"] == 1
+    assert index.stats()["stale_hits"] == 1
+
+
+def test_track_ids_are_indexed(fake, index):
+    search = backend.Search("fake-token", id_index=index)
+    first = search.get_track_id("Jay-Z", "Smile")
+    assert search.get_track_id("jay-z", "SMILE") == first
+    assert fake.request_counts["GET /v1/search"] == 1
+
+
+def test_bulk_preload(fake, index):
+    search = backend.Search("fake-token", id_index=index)
+    index.preload(artists={"Known": "k1"})
+    resolved = search.preload_artist_ids(["Known", "Drake", "Eminem"])
+    assert resolved["Known"] == "k1"
+    assert resolved["Drake"] == artist_id_for("Drake")
+    assert fake.request_counts["GET /v1/search"] == 2
+    assert IdIndex(path=index.path).lookup_artist("eminem")[0] == artist_id_for("Eminem")
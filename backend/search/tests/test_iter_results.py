@@ -0,0 +1,63 @@
+import time
+
+import pytest
+from backend.search.search_cache import SearchCache
+from backend.search.search_manager import SearchManager
+from backend.testing.fake_spotify import FakeSpotify
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return SearchManager("fake-token", cache=SearchCache(cache_dir=str(tmp_path / "search")))
+
+
+def test_stops_at_max_items(manager):
+    with FakeSpotify(catalog_size=120) as fake:
+        items = list(manager.iter_results("Jay-Z", "tracks", max_items=70))
+    assert len(items) == 70
+    assert len({item["id"] for item in items}) == 70
+    assert fake.request_counts["GET /v1/search"] == 2
+
+
+def test_pages_through_total(manager):
+    with FakeSpotify(catalog_size=120) as fake:
+        items = list(manager.iter_results("Jay-Z", "albums"))
+    assert len(items) == 120
+    assert fake.request_counts["GET /v1/search"] == 3
+
+
+def test_early_break_skips_unneeded_pages(manager):
+    with FakeSpotify(catalog_size=500) as fake:
+        for n, item in enumerate(manager.iter_results("Jay-Z", "tracks", page_size=10)):
+            if n == 4:
+                break
+        time.sleep(0.05)
+    # the first page plus at most the one prefetched page
+    assert fake.request_counts["GET /v1/search"] <= 2
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.001)
+    return True
+
+
+def test_next_page_is_prefetched(manager):
+    events = []
+    with FakeSpotify(catalog_size=150, latency=0.05) as fake:
+        for n, item in enumerate(manager.iter_results("Jay-Z", "tracks")):
+            if n == 49:
+                # still holding the last item of page 1, page 2 must already be on its way
+                if wait_for(lambda: fake.request_counts["GET /v1/search"] >= 2):
+                    events.append("page 2 requested")
+                events.append("page 1 done")
+    assert events == ["page 2 requested", "page 1 done"]
+
+
+def test_failed_page_is_reported(manager):
+    with FakeSpotify(error_rate=1.0):
+        assert list(manager.iter_results("Jay-Z", "tracks")) == []
+    assert manager.last_error["success"] is False
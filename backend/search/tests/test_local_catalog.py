@@ -0,0 +1,112 @@
+import time
+
+import pytest
+from backend.search.local_catalog import LocalCatalog, fts_query
+from backend.search.records import make_record
+from backend.search.search_cache import SearchCache
+from backend.search.search_manager import SearchManager
+from backend.testing.fake_spotify import FakeSpotify, make_search_item
+
+
+def records(search_type, query, count):
+    return [make_record(make_search_item(search_type, query, n), search_type) for n in range(count)]
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = LocalCatalog(str(tmp_path / "catalog.sqlite3"))
+    yield catalog
+    catalog.close()
+
+
+def test_fts_query_prefixes_every_word():
+    assert fts_query("Jay-Z 4:4") == '"Jay"* "Z"* "4"* "4"*'
+    assert fts_query(" ") == ""
+
+
+def test_upsert_and_search(catalog):
+    assert catalog.upsert(records("albums", "Beyoncé", 5) + records("tracks", "Smile", 5)) == 10
+    result = catalog.search("beyon album 3", "albums")
+    assert result["success"] and result["source"] == "local"
+    assert result["result"][0].album_name == "Beyoncé Album 3"
+    # accents are folded, types filter, tracks match on their artist too
+    assert catalog.search("beyonce", "albums")["total_results"] == 5
+    assert catalog.search("smile", "albums")["total_results"] == 0
+    assert catalog.search("smile")["total_results"] == 5
+
+
+def test_upsert_replaces_by_uri(catalog):
+    catalog.upsert(records("artists", "Jay-Z", 3))
+    catalog.upsert(records("artists", "Jay-Z", 3))
+    assert catalog.stats()["items"] == 3
+    assert catalog.search("jay", "artists")["total_results"] == 3
+
+
+def test_bad_input(catalog):
+    assert catalog.search("", "tracks")["success"] is False
+    assert catalog.search("x", "podcasts")["success"] is False
+    assert catalog.upsert([{"uri": "spotify:track:plain-dict"}]) == 0
+
+
+def test_background_writes_are_searchable(catalog):
+    future = catalog.upsert_later(records("tracks", "Smile", 4))
+    assert catalog.search("smile", "tracks")["total_results"] == 4
+    assert future.done() and future.result() == 4
+    assert catalog.upsert_result_later({"success": False}) is None
+
+
+def test_track_without_album(catalog):
+    track = make_record(dict(make_search_item("tracks", "Smile", 0), album=None), "tracks")
+    assert catalog.upsert([track]) == 1
+
+
+def test_unopenable_catalog_never_fails_a_search(tmp_path):
+    (tmp_path / "file").write_text("")
+    broken = LocalCatalog(str(tmp_path / "file" / "catalog.sqlite3"))
+    assert broken.upsert(records("tracks", "Smile", 2)) == 0
+    assert broken.search("smile", "tracks")["success"] is False
+
+
+def test_search_stays_fast(catalog):
+    for search_type in ("tracks", "albums", "artists"):
+        for query in ("jay", "smile", "ariana", "drake"):
+            catalog.upsert(records(search_type, query, 200))
+    catalog.search("drake track 1", "tracks")
+    timings = []
+    for _ in range(50):
+        start = time.perf_counter()
+        assert catalog.search("drake track 1", "tracks", limit=10)["total_results"] == 10
+        timings.append(time.perf_counter() - start)
+    # ~0.3ms on a laptop, generous bound for loaded ci machines
+    assert sorted(timings)[len(timings) // 2] < 0.005
+
+
+@pytest.fixture
+def manager(tmp_path):
+    with FakeSpotify(latency=0.1) as fake:
+        manager = SearchManager("fake-token", cache=SearchCache(cache_dir=str(tmp_path / "cache")),
+                                catalog=LocalCatalog(str(tmp_path / "catalog.sqlite3")))
+        yield manager, fake
+
+
+def test_manager_catalogs_remote_results(manager):
+    manager, fake = manager
+    manager.run("Lose Yourself", "tracks,albums", limit=3)
+    fake.reset_counts()
+    local = manager.run_local("lose yourself", "tracks")
+    assert local["total_results"] == 3
+    assert manager.run_local("lose", "tracks, albums")["total_results"] == 6
+    assert fake.total_requests() == 0
+
+
+def test_hybrid_shows_local_hits_before_the_remote_answer(manager):
+    manager, fake = manager
+    manager.run("Lose Yourself", "tracks", limit=3)
+    seen = []
+    start = time.perf_counter()
+    remote = manager.run_hybrid("Lose Yourself", "tracks", limit=5,
+                                on_local=lambda local: seen.append((local, time.perf_counter() - start)))
+    local, at = seen[0]
+    assert local["total_results"] == 3 and at < 0.05
+    assert remote["success"] and len(remote["result"]) == 5
+    assert fake.request_counts["GET /v1/search"] == 2
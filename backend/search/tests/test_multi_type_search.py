@@ -0,0 +1,44 @@
+import pytest
+from backend.search.search_cache import SearchCache
+from backend.search.search_manager import SearchManager
+from backend.search.search_wrapper import Search
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return SearchManager("fake-token", cache=SearchCache(cache_dir=str(tmp_path / "search")))
+
+
+def test_one_request_for_three_types(fake, manager):
+    res = manager.run("Jay-Z", ["artists", "albums", "tracks"], limit=3)
+    assert res["success"] is True
+    assert fake.request_counts["GET /v1/search"] == 1
+    assert set(res["results"]) == {"artists", "albums", "tracks"}
+    assert res["results"]["artists"]["result"][0]["artist_name"] == "Jay-Z"
+    assert "album_name" in res["results"]["albums"]["result"][0]
+    assert "track_name" in res["results"]["tracks"]["result"][0]
+
+
+def test_sections_match_single_type_normalization(fake, manager):
+    multi = manager.run("Jay-Z", "artists, tracks", limit=2)["results"]
+    single = Search("fake-token").search("Jay-Z", "tracks", limit=2)
+    assert multi["tracks"] == single
+
+
+def test_multi_type_is_cached(fake, manager):
+    manager.run("Jay-Z", "artists,albums", limit=2)
+    manager.run("Jay-Z", ["artists", "albums"], limit=2)
+    assert fake.request_counts["GET /v1/search"] == 1
+
+
+def test_multi_type_validation(fake):
+    res = Search("fake-token").search_types("Jay-Z", ["artists", "nope"])
+    assert res["success"] is False
+    assert "Invalid search type" in res["error"]
+    assert res["results"]["nope"]["success"] is False
+    assert fake.total_requests() == 0
+
+
+def test_single_type_still_returns_flat_result(fake, manager):
+    res = manager.run("Jay-Z", "artists", limit=1)
+    assert res["search_type"] == "artists" and len(res["result"]) == 1
@@ -0,0 +1,71 @@
+import pytest
+from backend.benchmarks.bench_normalizers import run
+from backend.benchmarks.bench_records import legacy_normalize_item
+from backend.search.normalizers import SPECS, compile_getter, compile_normalizer, normalize_page
+from backend.search.records import RECORD_TYPES, make_record
+from backend.search.search_wrapper import Search
+from backend.testing.fake_spotify import FakeSpotify, make_search_item
+
+
+@pytest.mark.parametrize("search_type", list(RECORD_TYPES))
+def test_compiled_matches_records_and_legacy(search_type):
+    assert tuple(SPECS[search_type]) == RECORD_TYPES[search_type].FIELDS
+    item = make_search_item(search_type, "Jay-Z", 3)
+    normalized = compile_normalizer(search_type)(item)
+    assert normalized == legacy_normalize_item(item, search_type)
+    assert normalized == dict(make_record(item, search_type))
+
+
+@pytest.mark.parametrize("search_type", list(RECORD_TYPES))
+def test_missing_nested_objects_match_records(search_type):
+    item = {"id": "x", "album": None, "artists": None, "owner": None, "show": None, "followers": None}
+    assert compile_normalizer(search_type)(item) == dict(make_record(item, search_type))
+
+
+@pytest.mark.parametrize("search_type", list(RECORD_TYPES))
+def test_record_properties_are_generated_from_the_spec(search_type):
+    record_type = RECORD_TYPES[search_type]
+    for field in SPECS[search_type]:
+        if field != "raw":
+            assert getattr(record_type, field).fget.source == compile_getter(search_type, field).source
+    # still one slot per record
+    assert not hasattr(record_type({}), "__dict__")
+
+
+def test_compiled_once_per_projection():
+    assert compile_normalizer("tracks") is compile_normalizer("tracks")
+    projected = compile_normalizer("tracks", ["name", "artist_names"])
+    assert projected is compile_normalizer("tracks", ("name", "artist_names"))
+    assert projected is not compile_normalizer("tracks")
+    # a projection only reads what it returns
+    assert "_album" not in projected.source
+    assert compile_normalizer("tracks", ["artists", "artist_names"]).source.count("get('artists')") == 1
+
+
+def test_page_projection_keeps_field_order_and_skips_none():
+    items = [make_search_item("tracks", "Jay-Z", index) for index in range(3)]
+    page = normalize_page(items[:1] + [None] + items[1:], "tracks", fields=("uri", "name"))
+    assert [list(row) for row in page] == [["uri", "name"]] * 3
+    assert [row["name"] for row in page] == [item["name"] for item in items]
+    with pytest.raises(KeyError):
+        compile_normalizer("artists", ["album"])
+
+
+def test_search_projects_fields(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with FakeSpotify():
+        search = Search("fake-token")
+        res = search.search("Eminem", "tracks", limit=3, fields=["id", "artist_names"])
+        assert res["success"] is True
+        assert [list(row) for row in res["result"]] == [["id", "artist_names"]] * 3
+        multi = search.search_types("Eminem", ["tracks", "albums"], limit=2, fields=["id", "name"])
+        assert all(list(row) == ["id", "name"] for section in multi["results"].values() for row in section["result"])
+        invalid = search.search("Eminem", "artists", fields=["album"])
+        assert invalid["success"] is False
+        assert "album" in invalid["error"]
+
+
+def test_benchmark_runs():
+    rows = run(50, repeat=1)
+    assert [row["search_type"] for row in rows] == list(SPECS)
+    assert all(row["compiled_ms"] > 0 and row["speedup"] for row in rows)
@@ -0,0 +1,63 @@
+import json
+from collections.abc import Mapping
+
+import pytest
+from backend.benchmarks.bench_records import legacy_normalize_item, run
+from backend.search.records import RECORD_TYPES, TrackResult, make_record, record_to_json, record_from_json
+from backend.search.search_cache import SearchCache
+from backend.testing.fake_spotify import make_search_item
+
+
+@pytest.mark.parametrize("search_type", list(RECORD_TYPES))
+def test_record_matches_legacy_dict(search_type):
+    item = make_search_item(search_type, "Jay-Z", 3)
+    record = make_record(item, search_type)
+    assert isinstance(record, Mapping)
+    assert dict(record) == legacy_normalize_item(item, search_type)
+    assert record == legacy_normalize_item(item, search_type)
+    assert record.to_dict() == dict(record)
+
+
+def test_records_are_slotted():
+    record = make_record(make_search_item("tracks", "Jay-Z", 0), "tracks")
+    assert not hasattr(record, "__dict__")
+    with pytest.raises(AttributeError):
+        record.extra = 1
+
+
+def test_dict_style_access():
+    record = make_record(make_search_item("tracks", "Jay-Z", 0), "tracks")
+    assert record["artist_names"] == record.artist_names == "Jay-Z"
+    assert record.get("album")["id"]
+    assert record.get("not_a_field", "default") == "default"
+    assert "track_name" in record and "genres" not in record
+    with pytest.raises(KeyError):
+        record["genres"]
+
+
+def test_missing_nested_fields_default():
+    record = TrackResult({"id": "x", "album": None})
+    assert record.album == {"name": None, "id": None, "uri": None, "release_date": None}
+    assert record.artists == [] and record.explicit is True
+
+
+def test_json_round_trip_keeps_records():
+    record = make_record(make_search_item("albums", "Jay-Z", 1), "albums")
+    encoded = json.dumps({"result": [record]}, default=record_to_json)
+    decoded = json.loads(encoded, object_hook=record_from_json)["result"][0]
+    assert type(decoded) is type(record) and decoded == record
+
+
+def test_cache_disk_tier_stores_records(tmp_path):
+    cache = SearchCache(cache_dir=str(tmp_path))
+    record = make_record(make_search_item("tracks", "Jay-Z", 0), "tracks")
+    cache.set("k", {"success": True, "result": [record]})
+    loaded = SearchCache(cache_dir=str(tmp_path)).get("k")
+    assert isinstance(loaded["result"][0], TrackResult)
+    assert loaded["result"][0] == record
+
+
+def test_benchmark_reports_every_type():
+    rows = run(50)
+    assert {row["search_type"] for row in rows} == set(RECORD_TYPES)
+    assert all(row["record_bytes_per_item"] < row["dict_bytes_per_item"] for row in rows)
@@ -0,0 +1,89 @@
+import os, time
+
+import pytest
+from backend.search.search_cache import SearchCache
+from backend.search.search_manager import SearchManager
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SearchCache(cache_dir=str(tmp_path / "search"), ttl=60, max_entries=2, max_disk_entries=3)
+
+
+class CountingSearch:
+    def __init__(self):
+        self.calls = 0
+
+    def search(self, query, search_type, limit=10, offset=0, market=None, **options):
+        self.calls += 1
+        return {"success": True, "search_type": search_type, "query": query, "total_results": 1, "result": [{"id": "1"}]}
+
+
+def test_key_covers_every_request_field():
+    base = SearchCache.make_key("Eminem", "artists", 5, 0, None)
+    assert base == SearchCache.make_key("  eminem ", "artists", 5, 0, None)
+    assert base != SearchCache.make_key("Eminem", "tracks", 5, 0, None)
+    assert base != SearchCache.make_key("Eminem", "artists", 6, 0, None)
+    assert base != SearchCache.make_key("Eminem", "artists", 5, 5, None)
+    assert base != SearchCache.make_key("Eminem", "artists", 5, 0, "US")
+
+
+def test_memory_hit_and_miss_counters(cache):
+    assert cache.get("a") is None
+    cache.set("a", {"v": 1})
+    assert cache.get("a") == {"v": 1}
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["memory_hits"] == 1 and stats["misses"] == 1
+
+
+def test_lru_eviction_falls_back_to_disk(cache):
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)          # "b" is least recently used in memory
+    assert cache.stats()["memory_entries"] == 2
+    assert cache.get("b") == 2
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_disk_tier_survives_new_instance(cache):
+    cache.set("a", {"v": 1})
+    fresh = SearchCache(cache_dir=cache.cache_dir)
+    assert fresh.get("a") == {"v": 1}
+    assert fresh.stats()["disk_hits"] == 1
+
+
+def test_ttl_expiry(cache):
+    cache.set("a", 1, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+
+
+def test_expired_entry_stays_readable_until_touched(cache):
+    cache.set("a", 1, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.get_stale("a") == 1
+    assert SearchCache(cache_dir=cache.cache_dir).get_stale("a") == 1
+    cache.touch("a")
+    assert cache.is_fresh("a") and cache.get("a") == 1
+
+
+def test_disk_eviction_is_bounded(cache):
+    for n in range(6):
+        cache.set(f"k{n}", n)
+    assert len([name for name in os.listdir(cache.cache_dir) if name.endswith(".json")]) == 3
+    assert cache.stats()["evictions"] > 0
+
+
+def test_manager_run_serves_repeats_from_cache(cache):
+    manager = SearchManager("token", cache=cache)
+    manager.search_wrapper_api = CountingSearch()
+    first = manager.run("Eminem", "artists", limit=3)
+    second = manager.run("Eminem", "artists", limit=3)
+    assert first == second
+    assert manager.search_wrapper_api.calls == 1
+    # the re-check inside the flight is not a second miss
+    assert (cache.stats()["misses"], cache.stats()["hits"]) == (1, 1)
+    manager.run("Eminem", "artists", limit=4)
+    assert manager.search_wrapper_api.calls == 2
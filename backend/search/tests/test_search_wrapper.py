@@ -1,4 +1,5 @@
 import pytest 
+from collections.abc import Mapping
 from backend.Auth import Auth
 from backend.search.search_wrapper import Search
 
@@ -34,7 +35,7 @@ def search():
 
 
 def _assert_base_item_fields(item):
-    assert isinstance(item, dict)
+    assert isinstance(item, Mapping)
     for k in ("id", "uri", "name", "type", "raw"):
         assert k in item
 
@@ -0,0 +1,293 @@
+import os, shlex, sys, threading
+from collections import OrderedDict
+
+from backend.commands import CommandContext, run_command, show_albums, show_tracks, item_line
+
+
+"""
+tmfy shell: one long lived Auth / SearchManager / Player for a whole session
+    tmfy> search -ar Jay-Z          any tmfy command, same syntax as the cli
+    tmfy> search albums
+    tmfy> play #1 -sf
+    tmfy> find [tracks|albums|artists]   type-ahead search, results refresh while typing,
+                                         enter keeps the list for #N, esc leaves
+    tmfy> quit
+"""
+
+SEARCH_KEYS = {"tracks", "albums", "artists", "playlists", "shows", "episodes"}
+ENTER = ("\r", "\n")
+BACKSPACE = ("\x7f", "\b")
+ESCAPE = ("\x1b", "\x03", "\x04")
+
+
+class TypeAhead:
+    """
+    Debounced search-as-you-type
+        - every update(prefix) restarts a `delay` timer, only a prefix that stays put
+          for `delay` seconds is searched
+        - a newer keypress cancels older work: a pending timer never fires, a search
+          already in flight has its result dropped instead of shown
+        - results are cached per prefix, backspacing to an earlier prefix is instant
+    on_result(prefix, result) is called (from a timer thread) for the latest prefix only
+    """
+    def __init__(self, search, delay=0.15, on_result=None, min_chars=2, cache_size=128):
+        self.search = search
+        self.delay = delay
+        self.on_result = on_result
+        self.min_chars = min_chars
+        self.cache_size = cache_size
+        self.prefix = ""
+        self.generation = 0
+        self.requests = 0
+        self.debounced = 0
+        self.cancelled = 0
+        self.cache_hits = 0
+        self._cache = OrderedDict()
+        self._latest = None
+        self._timer = None
+        self._running = set()
+        self._done = threading.Condition()
+
+
+    def update(self, prefix):
+        with self._done:
+            self.generation += 1
+            generation = self.generation
+            self.prefix = prefix
+            self._latest = None
+            if self._timer is not None and not self._timer.finished.is_set():
+                self._timer.cancel()
+                self.debounced += 1
+            self._timer = None
+
+            cached = self._cache.get(prefix)
+            if cached is not None:
+                self._cache.move_to_end(prefix)
+                self.cache_hits += 1
+            elif len(prefix.strip()) >= self.min_chars:
+                self._timer = threading.Timer(self.delay, self._fire, (generation, prefix))
+                self._timer.daemon = True
+                self._timer.start()
+                return
+        if cached is not None:
+            self._deliver(generation, prefix, cached)
+
+
+    """
+    Function: wait for the current prefix' result (enter pressed)
+    Returns: result dict, or None when the prefix is too short / timed out
+             a pending debounce timer is skipped, the search runs right away
+    """
+    def flush(self, timeout=10):
+        with self._done:
+            generation, prefix = self.generation, self.prefix
+            if self._latest is not None and self._latest[0] == generation:
+                return self._latest[2]
+            if len(prefix.strip()) < self.min_chars:
+                return None
+            if prefix in self._cache:
+                return self._cache[prefix]
+            in_flight = generation in self._running
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+        if not in_flight:
+            self._fire(generation, prefix)
+        with self._done:
+            self._done.wait_for(lambda: self._latest is not None or self.generation != generation, timeout)
+            return self._latest[2] if self._latest is not None else None
+
+
+    def cancel(self):
+        with self._done:
+            self.generation += 1
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+
+    def _fire(self, generation, prefix):
+        with self._done:
+            if generation != self.generation:
+                return
+            # the timer has started, a keypress from now on cancels the result, not the timer
+            self._timer = None
+            self._running.add(generation)
+            self.requests += 1
+        try:
+            result = self.search(prefix)
+        finally:
+            with self._done:
+                self._running.discard(generation)
+        with self._done:
+            if result and result.get("success"):
+                self._cache[prefix] = result
+                self._cache.move_to_end(prefix)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            if generation != self.generation:
+                # the user kept typing while this was in flight
+                self.cancelled += 1
+                return
+        self._deliver(generation, prefix, result)
+
+
+    def _deliver(self, generation, prefix, result):
+        with self._done:
+            if generation != self.generation:
+                return
+            self._latest = (generation, prefix, result)
+            self._done.notify_all()
+        if self.on_result is not None:
+            self.on_result(prefix, result)
+
+
+    def stats(self):
+        with self._done:
+            return {
+                "requests": self.requests,
+                "debounced": self.debounced,
+                "cancelled": self.cancelled,
+                "cache_hits": self.cache_hits,
+                "cached_prefixes": len(self._cache)
+            }
+
+
+# Returns a generator of single keys from a terminal in raw mode (restored afterwards)
+def read_keys(stream=None):
+    import termios, tty
+    stream = stream or sys.stdin
+    fd = stream.fileno()
+    previous = termios.tcgetattr(fd)
+    try:
+        tty.setcbreak(fd)
+        while True:
+            key = os.read(fd, 1).decode("utf-8", "ignore")
+            if not key:
+                return
+            yield key
+    finally:
+        termios.tcsetattr(fd, termios.TCSADRAIN, previous)
+
+
+class TmfyShell:
+    def __init__(self, context=None, out=None, delay=0.15, limit=8):
+        self.context = context if context is not None else CommandContext()
+        self.out = out or sys.stdout
+        self.delay = delay
+        self.limit = limit
+        self.typeahead = None
+        # live redraws only make sense on a terminal
+        self.live = hasattr(self.out, "isatty") and self.out.isatty()
+        self._out_lock = threading.Lock()
+
+
+    def run(self, lines=None):
+        interactive = lines is None
+        if not interactive:
+            lines = iter(lines)
+        else:
+            try:
+                import readline  # noqa: F401  (history + line editing for input())
+            except ImportError:
+                pass
+        self.context.warm()
+        while True:
+            try:
+                line = input("tmfy> ") if interactive else next(lines)
+            except (EOFError, StopIteration):
+                break
+            except KeyboardInterrupt:
+                self.write("\n")
+                continue
+            if self.execute(line) is False:
+                break
+        return 0
+
+
+    """
+    Function: run one shell line
+    Returns: False when the shell should exit, otherwise the command's exit status
+    """
+    def execute(self, line):
+        try:
+            argv = shlex.split(line)
+        except ValueError as e:
+            self.write(f"{e}\n")
+            return 2
+        if argv[:1] == ["tmfy"]:
+            argv = argv[1:]
+        if not argv:
+            return 0
+        if argv[0] in ("quit", "exit", "q"):
+            return False
+        if argv[0] == "find":
+            search_type = argv[1] if len(argv) > 1 and argv[1] in SEARCH_KEYS else "tracks"
+            self.find(search_type)
+            return 0
+        return run_command(argv, self.context, self.out)
+
+
+    """
+    Function: interactive type-ahead over `keys` (the terminal by default)
+    Returns: the result dict that was kept with enter, or None (esc / ctrl-c)
+             the kept list is numbered and stored, `play #N` / `-tr #N` work on it
+    """
+    def find(self, search_type="tracks", keys=None):
+        manager = self.context.search_manager
+        typeahead = TypeAhead(lambda prefix: manager.run(prefix, search_type, limit=self.limit),
+                              delay=self.delay, on_result=self.render if self.live else None)
+        self.typeahead = typeahead
+        prefix = ""
+        self.write(f"find {search_type}> ")
+        if keys is None:
+            # piped stdin (no terminal to put in raw mode): one line is the whole query
+            keys = read_keys() if sys.stdin.isatty() else iter(sys.stdin.readline())
+        for key in keys:
+            if key in ESCAPE:
+                typeahead.cancel()
+                self.write("\n")
+                return None
+            if key in ENTER:
+                break
+            if key in BACKSPACE:
+                prefix = prefix[:-1]
+            elif key.isprintable():
+                prefix += key
+            else:
+                continue
+            if self.live:
+                self.write(f"\r\x1b[Kfind {search_type}> {prefix}")
+            typeahead.update(prefix)
+
+        result = typeahead.flush()
+        self.write("\n\x1b[J" if self.live else "\n")
+        if not result or not result.get("success") or not result.get("result"):
+            self.write((result or {}).get("error", "No results") + "\n")
+            return result
+        records = result["result"]
+        if search_type == "albums":
+            show_albums(records, self.context, self.out)
+        elif search_type == "tracks":
+            show_tracks(records, self.context, self.out)
+        else:
+            for number, record in enumerate(records, 1):
+                self.write(f"#{number} {item_line(record)}\n")
+            self.context.focus_session.set_results(search_type, records)
+        return result
+
+
+    # live results under the input line, the cursor goes back to where the user types
+    def render(self, prefix, result):
+        lines = [item_line(record) for record in (result or {}).get("result", [])] if result else []
+        if result and not result.get("success"):
+            lines = [result.get("error", "search failed")]
+        block = "".join(f"\n\x1b[K  {line}" for line in lines)
+        self.write(f"\x1b7\x1b[J{block}\x1b8")
+
+
+    def write(self, text):
+        with self._out_lock:
+            self.out.write(text)
+            self.out.flush()
+
@@ -0,0 +1,18 @@
+import io
+
+from backend.commands import CommandContext, run_command
+
+
+"""
+Runs one `tmfy` command line in process, for the command / daemon / metrics tests
+    status, lines = tmfy("search", "-ar", "Jay-Z")
+Every call gets a fresh context, like separate `tmfy` processes sharing the session file
+"""
+def tmfy(*argv):
+    out = io.StringIO()
+    context = CommandContext()
+    try:
+        status = run_command(list(argv), context, out)
+    finally:
+        context.close()
+    return status, out.getvalue().splitlines()
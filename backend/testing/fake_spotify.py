@@ -0,0 +1,487 @@
+import hashlib, json, os, random, threading, time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+
+"""
+Local stand-in for the parts of the Spotify Web API + accounts service that TermTify uses
+    - /v1/search, /v1/artists/{id}/albums, /v1/artists/{id}/top-tracks, /v1/albums?ids=
+    - /v1/me/player/*  (devices, playback state, currently-playing, play/pause/shuffle/queue)
+    - /api/token       (authorization_code and refresh_token grants)
+Every response is synthetic but deterministic for a given query/id.
+Latency, error rate and 429 injection are configurable so tests and benchmarks
+can run hermetically without a browser login.
+GET responses carry an ETag (a hash of the body), If-None-Match with the same tag gets a 304
+
+Usage:
+    with FakeSpotify(latency=0.005) as fake:
+        ...   # SPOTIFY_API_URL / SPOTIFY_ACCOUNTS_URL point at the fake while inside
+"""
+
+SEARCH_TYPES = {
+    "artist": "artists",
+    "album": "albums",
+    "track": "tracks",
+    "playlist": "playlists",
+    "show": "shows",
+    "episode": "episodes"
+}
+
+
+def make_id(*parts):
+    return hashlib.md5(":".join(str(part) for part in parts).encode("utf-8")).hexdigest()[:22]
+
+
+def artist_id_for(name):
+    return make_id("artist", name.strip().lower())
+
+
+def make_artist(artist_id, name):
+    return {
+        "id": artist_id,
+        "uri": f"spotify:artist:{artist_id}",
+        "name": name,
+        "type": "artist",
+        "genres": ["hip hop", "rap"],
+        "followers": {"href": None, "total": 1000 + int(artist_id[:4], 16)},
+        "popularity": int(artist_id[:2], 16) % 100,
+        "images": [{"url": f"https://i.scdn.co/image/{artist_id}", "height": 640, "width": 640}],
+        "external_urls": {"spotify": f"https://open.spotify.com/artist/{artist_id}"}
+    }
+
+
+def make_album(album_id, name, artist, total_tracks=12, year=2000):
+    return {
+        "id": album_id,
+        "uri": f"spotify:album:{album_id}",
+        "name": name,
+        "type": "album",
+        "album_type": "album",
+        "artists": [{"id": artist["id"], "name": artist["name"], "uri": artist["uri"], "type": "artist"}],
+        "release_date": f"{year}-07-07",
+        "release_date_precision": "day",
+        "total_tracks": total_tracks,
+        "images": [{"url": f"https://i.scdn.co/image/{album_id}", "height": 640, "width": 640}],
+        "external_urls": {"spotify": f"https://open.spotify.com/album/{album_id}"}
+    }
+
+
+def make_track(track_id, name, album, number=1):
+    return {
+        "id": track_id,
+        "uri": f"spotify:track:{track_id}",
+        "name": name,
+        "type": "track",
+        "artists": album["artists"],
+        "album": {key: album[key] for key in ("id", "uri", "name", "release_date", "images", "artists")},
+        "duration_ms": 150000 + int(track_id[:4], 16) % 120000,
+        "explicit": number % 2 == 0,
+        "popularity": int(track_id[:2], 16) % 100,
+        "preview_url": None,
+        "track_number": number,
+        "external_urls": {"spotify": f"https://open.spotify.com/track/{track_id}"}
+    }
+
+
+def make_search_item(search_type, query, index):
+    item_id = make_id(search_type, query.lower(), index)
+    if search_type == "artists":
+        name = query if index == 0 else f"{query} {index}"
+        artist_id = artist_id_for(name)
+        return make_artist(artist_id, name)
+    artist = make_artist(artist_id_for(query), query)
+    if search_type == "albums":
+        return make_album(item_id, f"{query} Album {index}", artist, year=2000 + index % 25)
+    if search_type == "tracks":
+        album = make_album(make_id("album", query.lower(), index), f"{query} Album {index}", artist)
+        return make_track(item_id, f"{query} Track {index}", album, index + 1)
+    if search_type == "playlists":
+        return {
+            "id": item_id, "uri": f"spotify:playlist:{item_id}", "name": f"{query} Mix {index}", "type": "playlist",
+            "owner": {"id": "fakeuser", "display_name": "Fake User"}, "tracks": {"total": 25 + index},
+            "public": True, "images": [], "external_urls": {"spotify": f"https://open.spotify.com/playlist/{item_id}"}
+        }
+    if search_type == "shows":
+        return {
+            "id": item_id, "uri": f"spotify:show:{item_id}", "name": f"{query} Show {index}", "type": "show",
+            "publisher": "Fake Publisher", "description": f"A show about {query}", "languages": ["en"],
+            "explicit": False, "images": [], "external_urls": {"spotify": f"https://open.spotify.com/show/{item_id}"}
+        }
+    show_id = make_id("show", query.lower())
+    return {
+        "id": item_id, "uri": f"spotify:episode:{item_id}", "name": f"{query} Episode {index}", "type": "episode",
+        "description": f"Episode {index} about {query}", "duration_ms": 1800000, "release_date": "2024-01-01",
+        "explicit": False, "images": [], "show": {"id": show_id, "name": f"{query} Show"},
+        "external_urls": {"spotify": f"https://open.spotify.com/episode/{item_id}"}
+    }
+
+
+class FakeSpotify:
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit_rate=0.0, retry_after=1,
+                 catalog_size=200, albums_per_artist=35, token_ttl=3600, seed=None, etags=True):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.catalog_size = catalog_size
+        self.albums_per_artist = albums_per_artist
+        self.token_ttl = token_ttl
+        self.etags = etags
+        self.revoked_tokens = set()
+        # refresh tokens spotify no longer accepts (400 invalid_grant)
+        self.revoked_refresh_tokens = set()
+        # /api/token answers 503 with an html body
+        self.token_outage = False
+        self.request_counts = Counter()
+        self.status_counts = Counter()
+        self.devices = [
+            {"id": "fakedevice01", "is_active": True, "is_restricted": False, "name": "Fake Speaker",
+             "type": "Computer", "volume_percent": 50}
+        ]
+        self.playback = {
+            "is_playing": False, "progress_ms": 0, "shuffle_state": False, "repeat_state": "off",
+            "item": None, "context": None, "queue": [], "device": self.devices[0]
+        }
+        self.albums = {}
+        self._issued = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+        self._saved_env = {}
+
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+    @property
+    def api_url(self):
+        return f"{self.url}/v1"
+
+
+    @property
+    def accounts_url(self):
+        return self.url
+
+
+    def start(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self._thread.start()
+        return self
+
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+    # point the client at the fake for the duration of a with block
+    def __enter__(self):
+        self.start()
+        for name, value in (("SPOTIFY_API_URL", self.api_url), ("SPOTIFY_ACCOUNTS_URL", self.accounts_url)):
+            self._saved_env[name] = os.environ.get(name)
+            os.environ[name] = value
+        return self
+
+
+    def __exit__(self, *exc_info):
+        for name, value in self._saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        self.stop()
+
+
+    def total_requests(self):
+        with self._lock:
+            return sum(self.request_counts.values())
+
+
+    def reset_counts(self):
+        with self._lock:
+            self.request_counts.clear()
+            self.status_counts.clear()
+
+
+    def issue_token(self):
+        with self._lock:
+            self._issued += 1
+            return {
+                "access_token": f"fake-access-{self._issued}",
+                "token_type": "Bearer",
+                "scope": "user-read-playback-state user-modify-playback-state",
+                "expires_in": self.token_ttl,
+                "refresh_token": f"fake-refresh-{self._issued}"
+            }
+
+
+    # returns (status, extra_headers) for an injected failure, or None to serve normally
+    def _inject_fault(self):
+        with self._lock:
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+            roll = self._random.random()
+        if delay:
+            time.sleep(delay)
+        if roll < self.rate_limit_rate:
+            return 429, {"Retry-After": str(self.retry_after)}
+        if roll < self.rate_limit_rate + self.error_rate:
+            return 500, {}
+        return None
+
+
+    def route(self, method, path, query, body, headers):
+        if path == "/api/token":
+            if method != "POST":
+                return 405, {"error": "method_not_allowed"}
+            if self.token_outage:
+                return 503, b"<html><body>Service Unavailable</body></html>"
+            form = parse_qs(body.decode("utf-8"))
+            grant = form.get("grant_type", [None])[0]
+            if grant not in ("authorization_code", "refresh_token"):
+                return 400, {"error": "unsupported_grant_type"}
+            if grant == "refresh_token" and form.get("refresh_token", [None])[0] in self.revoked_refresh_tokens:
+                return 400, {"error": "invalid_grant", "error_description": "Refresh token revoked"}
+            return 200, self.issue_token()
+
+        if not path.startswith("/v1/"):
+            return 404, {"error": {"status": 404, "message": "Service not found"}}
+
+        auth_header = headers.get("Authorization", "")
+        token = auth_header[len("Bearer "):] if auth_header.startswith("Bearer ") else None
+        if not token or token == "None" or token in self.revoked_tokens:
+            return 401, {"error": {"status": 401, "message": "The access token expired"}}
+
+        parts = path[len("/v1/"):].strip("/").split("/")
+        if parts == ["search"] and method == "GET":
+            return self._search(query)
+        if parts == ["albums"] and method == "GET":
+            return self._albums(query)
+        if len(parts) == 3 and parts[0] == "albums" and parts[2] == "tracks" and method == "GET":
+            return self._album_tracks(parts[1], query)
+        if len(parts) == 3 and parts[0] == "artists" and method == "GET":
+            if parts[2] == "albums":
+                return self._artist_albums(parts[1], query)
+            if parts[2] == "top-tracks":
+                return self._top_tracks(parts[1])
+        if parts[:2] == ["me", "player"]:
+            return self._player(method, parts[2:], query, body)
+        return 404, {"error": {"status": 404, "message": "Non existing id"}}
+
+
+    def _search(self, query):
+        q = query.get("q", [""])[0]
+        if not q:
+            return 400, {"error": {"status": 400, "message": "No search query"}}
+        limit = int(query.get("limit", ["20"])[0])
+        offset = int(query.get("offset", ["0"])[0])
+        types = query.get("type", [""])[0].split(",")
+        if not types or any(t not in SEARCH_TYPES for t in types):
+            return 400, {"error": {"status": 400, "message": "Bad search type field"}}
+        data = {}
+        for t in types:
+            section = SEARCH_TYPES[t]
+            end = min(offset + limit, self.catalog_size)
+            items = [make_search_item(section, q, index) for index in range(offset, end)]
+            if section == "albums":
+                self._remember_albums(items)
+            data[section] = {
+                "limit": limit,
+                "offset": offset,
+                "total": self.catalog_size,
+                "next": None,
+                "items": items
+            }
+        return 200, data
+
+
+    def _remember_albums(self, albums):
+        with self._lock:
+            for album in albums:
+                self.albums[album["id"]] = album
+
+
+    # GET /albums?ids=  (at most 20 ids, unknown ids come back as null like the real api)
+    def _albums(self, query):
+        ids = [album_id for album_id in query.get("ids", [""])[0].split(",") if album_id]
+        if not ids or len(ids) > 20:
+            return 400, {"error": {"status": 400, "message": "Invalid ids"}}
+        albums = []
+        for album_id in ids:
+            with self._lock:
+                album = self.albums.get(album_id)
+            if album is None:
+                albums.append(None)
+                continue
+            tracks = self._tracks_of(album)
+            full = dict(album)
+            full["tracks"] = {"limit": 50, "offset": 0, "total": len(tracks), "next": None, "items": tracks}
+            albums.append(full)
+        return 200, {"albums": albums}
+
+
+    def _tracks_of(self, album):
+        return [
+            make_track(make_id("track", album["id"], n), f"{album['name']} Track {n + 1}", album, n + 1)
+            for n in range(album["total_tracks"])
+        ]
+
+
+    # GET /albums/{id}/tracks  (simplified tracks: no "album" key, like the real api)
+    def _album_tracks(self, album_id, query):
+        with self._lock:
+            album = self.albums.get(album_id)
+        if album is None:
+            return 404, {"error": {"status": 404, "message": "Non existing id"}}
+        limit = int(query.get("limit", ["20"])[0])
+        offset = int(query.get("offset", ["0"])[0])
+        tracks = [{key: value for key, value in track.items() if key != "album"} for track in self._tracks_of(album)]
+        return 200, {"limit": limit, "offset": offset, "total": len(tracks), "next": None,
+                     "items": tracks[offset:offset + limit]}
+
+
+    def _artist_album_list(self, artist_id):
+        artist = make_artist(artist_id, f"Artist {artist_id[:6]}")
+        albums = [
+            make_album(make_id("album", artist_id, n), f"Album {n + 1}", artist, total_tracks=8 + n % 10, year=1990 + n % 35)
+            for n in range(self.albums_per_artist)
+        ]
+        self._remember_albums(albums)
+        return albums
+
+
+    def _artist_albums(self, artist_id, query):
+        limit = int(query.get("limit", ["20"])[0])
+        offset = int(query.get("offset", ["0"])[0])
+        albums = self._artist_album_list(artist_id)
+        return 200, {
+            "limit": limit,
+            "offset": offset,
+            "total": len(albums),
+            "next": None,
+            "items": albums[offset:offset + limit]
+        }
+
+
+    def _top_tracks(self, artist_id):
+        artist = make_artist(artist_id, f"Artist {artist_id[:6]}")
+        album = make_album(make_id("album", artist_id, "top"), "Greatest Hits", artist)
+        tracks = [make_track(make_id("track", artist_id, n), f"Hit {n + 1}", album, n + 1) for n in range(10)]
+        return 200, {"tracks": tracks}
+
+
+    def _player(self, method, rest, query, body):
+        with self._lock:
+            playback = self.playback
+            if rest == ["devices"] and method == "GET":
+                return 200, {"devices": list(self.devices)}
+            if rest == [] and method == "GET":
+                if not playback["item"]:
+                    return 204, None
+                return 200, {key: value for key, value in playback.items() if key not in ("queue", "uris")}
+            if rest == ["currently-playing"] and method == "GET":
+                if not playback["item"]:
+                    return 204, None
+                return 200, {key: playback[key] for key in ("is_playing", "progress_ms", "item", "context")}
+            if (rest in (["play"], ["shuffle"]) and method == "PUT") or (rest == ["queue"] and method == "POST"):
+                # a player command goes to ?device_id= (which becomes the active one) or the active device
+                device_id = query.get("device_id", [None])[0]
+                device = next((device for device in self.devices
+                               if device["id"] == device_id or (not device_id and device["is_active"])), None)
+                if device is None:
+                    message = "Device not found" if device_id else "Player command failed: No active device found"
+                    return 404, {"error": {"status": 404, "message": message}}
+                for other in self.devices:
+                    other["is_active"] = other is device
+                playback["device"] = device
+            if rest == ["play"] and method == "PUT":
+                payload = json.loads(body or b"{}")
+                uris = payload.get("uris")
+                context_uri = payload.get("context_uri")
+                offset = payload.get("offset") or {}
+                uri = offset.get("uri") or (uris[offset.get("position", 0)] if uris else context_uri)
+                if uri:
+                    playback["item"] = {"uri": uri, "id": uri.rsplit(":", 1)[-1], "name": uri, "duration_ms": 200000}
+                    playback["context"] = {"uri": context_uri} if context_uri else None
+                    playback["uris"] = uris
+                    playback["progress_ms"] = 0
+                if not playback["item"]:
+                    return 404, {"error": {"status": 404, "message": "Player command failed: No active device found"}}
+                playback["is_playing"] = True
+                return 204, None
+            if rest == ["pause"] and method == "PUT":
+                playback["is_playing"] = False
+                return 204, None
+            if rest == ["shuffle"] and method == "PUT":
+                playback["shuffle_state"] = query.get("state", ["false"])[0] == "true"
+                return 204, None
+            if rest == ["queue"] and method == "POST":
+                playback["queue"].append(query.get("uri", [None])[0])
+                return 204, None
+        return 404, {"error": {"status": 404, "message": "Service not found"}}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body go out in separate writes, without this keep-alive
+    # connections stall on delayed ACKs (~40ms per request)
+    disable_nagle_algorithm = True
+
+    def _handle(self, method):
+        fake = self.server.fake
+        split = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        fault = fake._inject_fault()
+        if fault:
+            status, extra_headers = fault
+            payload = {"error": {"status": status, "message": "injected"}}
+        else:
+            extra_headers = {}
+            status, payload = fake.route(method, split.path, parse_qs(split.query), body, self.headers)
+
+        if payload is None or isinstance(payload, bytes):
+            data = payload or b""
+        else:
+            data = json.dumps(payload).encode("utf-8")
+        if fake.etags and method == "GET" and status == 200 and split.path.startswith("/v1/"):
+            extra_headers["ETag"] = f'"{hashlib.md5(data).hexdigest()[:16]}"'
+            if self.headers.get("If-None-Match") == extra_headers["ETag"]:
+                status, data = 304, b""
+
+        with fake._lock:
+            fake.request_counts[f"{method} {split.path}"] += 1
+            fake.status_counts[status] += 1
+
+        self.send_response(status)
+        if data:
+            self.send_header("Content-Type", "text/html" if isinstance(payload, bytes) else "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in extra_headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if data:
+            self.wfile.write(data)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def log_message(self, format, *args):
+        pass
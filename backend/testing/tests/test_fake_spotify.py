@@ -0,0 +1,69 @@
+import pytest
+import requests
+from backend.testing.fake_spotify import FakeSpotify
+from backend.search.search_wrapper import Search
+from backend.benchmarks.bench_api import percentile, run_benchmark
+
+
+@pytest.fixture
+def fake():
+    with FakeSpotify(seed=1) as fake:
+        yield fake
+
+
+def test_search_wrapper_against_fake(fake):
+    res = Search("fake-token").search("Eminem", "artists", limit=3)
+    assert res["success"] is True
+    assert res["total_results"] == fake.catalog_size
+    assert len(res["result"]) == 3
+    assert res["result"][0]["artist_name"] == "Eminem"
+    assert fake.request_counts["GET /v1/search"] == 1
+
+
+def test_tracks_have_album_and_artists(fake):
+    res = Search("fake-token").search("Lose Yourself", "tracks", limit=2, offset=4)
+    first = res["result"][0]
+    assert first["album"]["id"]
+    assert first["artist_names"] == "Lose Yourself"
+
+
+def test_revoked_token_gets_401(fake):
+    fake.revoked_tokens.add("old-token")
+    res = Search("old-token").search("Eminem", "artists")
+    assert res["success"] is False
+    assert "401" in res["error"]
+
+
+def test_rate_limit_injection_sets_retry_after():
+    with FakeSpotify(rate_limit_rate=1.0, retry_after=7) as fake:
+        response = requests.get(f"{fake.api_url}/search", params={"q": "x", "type": "track"},
+                                headers={"Authorization": "Bearer t"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "7"
+
+
+def test_error_rate_injection():
+    with FakeSpotify(error_rate=1.0) as fake:
+        res = Search("fake-token").search("Eminem", "artists")
+    assert res["success"] is False
+    # first attempt plus the scheduler's retries
+    assert fake.status_counts[500] == 5
+
+
+def test_token_grant_and_player(fake):
+    token = requests.post(f"{fake.accounts_url}/api/token", data={"grant_type": "refresh_token"}).json()
+    assert token["access_token"] and token["expires_in"] == fake.token_ttl
+    headers = {"Authorization": f"Bearer {token['access_token']}"}
+    devices = requests.get(f"{fake.api_url}/me/player/devices", headers=headers).json()["devices"]
+    assert devices[0]["is_active"] is True
+    artist_id = "abc123"
+    albums = requests.get(f"{fake.api_url}/artists/{artist_id}/albums", params={"limit": 50}, headers=headers).json()
+    assert albums["total"] == fake.albums_per_artist
+
+
+def test_benchmark_summary():
+    assert percentile([5, 1, 3, 2, 4], 50) == 3
+    assert percentile([5, 1, 3, 2, 4], 99) == 5
+    result = run_benchmark("noop", lambda i: True, iterations=20, concurrency=2)
+    assert result["iterations"] == 20 and result["errors"] == 0
+    assert result["rps"] > 0
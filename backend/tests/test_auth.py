@@ -0,0 +1,148 @@
+import json, os, subprocess, sys, threading, time
+
+from backend.Auth import Auth, REFRESH_MARGIN
+
+
+def write_tokens(**token_data):
+    with open("tokens.json", "w") as file:
+        json.dump(token_data, file)
+
+
+def read_tokens():
+    with open("tokens.json", "r") as file:
+        return json.load(file)
+
+
+def test_unexpired_token_loads_without_network(fake):
+    write_tokens(access_token="a", refresh_token="r", expires_at=time.time() + 3600)
+    auth = Auth()
+    assert auth.token == "a"
+    assert fake.total_requests() == 0
+
+
+def test_token_without_expiry_is_trusted_lazily(fake):
+    write_tokens(access_token="a", refresh_token="r")
+    auth = Auth()
+    assert auth.token == "a"
+    assert fake.total_requests() == 0
+
+
+def test_token_close_to_expiry_is_refreshed_ahead(fake):
+    write_tokens(access_token="a", refresh_token="r", expires_at=time.time() + REFRESH_MARGIN / 2)
+    auth = Auth()
+    assert auth.token.startswith("fake-access-")
+    assert fake.request_counts["POST /api/token"] == 1
+    stored = read_tokens()
+    assert stored["access_token"] == auth.token
+    assert stored["expires_in"] == fake.token_ttl
+    assert stored["expires_at"] > time.time() + REFRESH_MARGIN
+
+
+def test_handle_unauthorized_refreshes(fake):
+    write_tokens(access_token="a", refresh_token="r", expires_at=time.time() + 3600)
+    auth = Auth()
+    assert auth.handle_unauthorized().startswith("fake-access-")
+    assert not auth.is_token_expiring()
+
+
+def test_ensure_fresh_token_only_refreshes_when_needed(fake):
+    write_tokens(access_token="a", refresh_token="r", expires_at=time.time() + 3600)
+    auth = Auth()
+    assert auth.ensure_fresh_token() == "a"
+    auth.expires_at = time.time()
+    assert auth.ensure_fresh_token() != "a"
+    assert fake.request_counts["POST /api/token"] == 1
+
+
+def test_missing_file_requires_login(fake):
+    auth = Auth()
+    assert auth.token is None
+    assert auth.is_token_expiring()
+
+
+def test_concurrent_unauthorized_threads_share_one_refresh(fake):
+    write_tokens(access_token="a", refresh_token="r", expires_at=time.time() + 3600)
+    auth = Auth()
+    fake.latency = 0.05
+    barrier = threading.Barrier(8)
+    tokens = []
+
+    def worker():
+        barrier.wait()
+        tokens.append(auth.handle_unauthorized("a"))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert fake.request_counts["POST /api/token"] == 1
+    assert len(set(tokens)) == 1 and tokens[0].startswith("fake-access-")
+
+
+def test_refresh_adopts_a_token_another_process_wrote(fake):
+    write_tokens(access_token="a", refresh_token="r", expires_at=time.time() + 3600)
+    auth = Auth()
+    # a second process refreshed in the meantime
+    write_tokens(access_token="b", refresh_token="r2", expires_in=3600, expires_at=time.time() + 3600)
+    assert auth.handle_unauthorized() == "b"
+    assert auth.refresh_token == "r2"
+    assert fake.request_counts["POST /api/token"] == 0
+
+
+def test_processes_refresh_once(fake, tmp_path):
+    write_tokens(access_token="a", refresh_token="r", expires_at=time.time())
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ, PYTHONPATH=root)
+    script = "from backend.Auth import Auth; print(Auth().token)"
+    processes = [subprocess.Popen([sys.executable, "-c", script], cwd=tmp_path, env=env,
+                                  stdout=subprocess.PIPE, text=True) for _ in range(4)]
+    tokens = {process.communicate(timeout=60)[0].splitlines()[-1] for process in processes}
+    assert fake.request_counts["POST /api/token"] == 1
+    assert len(tokens) == 1 and tokens.pop() == read_tokens()["access_token"]
+
+
+def test_save_is_atomic(fake, tmp_path):
+    write_tokens(access_token="a", refresh_token="r", expires_at=time.time() + 3600)
+    auth = Auth()
+    auth.token = "c"
+    auth.save_token()
+    assert read_tokens()["access_token"] == "c"
+    assert sorted(os.listdir(tmp_path)) == ["tokens.json"]
+
+
+def test_corrupt_file_is_kept(fake):
+    with open("tokens.json", "w") as file:
+        file.write('{"access_token": "a", "refr')
+    auth = Auth()
+    assert auth.token is None
+    assert os.path.exists("tokens.json")
+
+
+def test_revoked_refresh_token_requires_login(fake):
+    write_tokens(access_token="a", refresh_token="r", expires_at=time.time() - 10)
+    fake.revoked_refresh_tokens.add("r")
+    auth = Auth()
+    assert auth.token is None and auth.refresh_error == "invalid_grant"
+    assert not os.path.exists("tokens.json")
+
+
+def test_outage_keeps_the_tokens(fake):
+    write_tokens(access_token="a", refresh_token="r", expires_at=time.time() - 10)
+    fake.token_outage = True
+    auth = Auth()
+    assert auth.refresh_error == "http_503"
+    assert auth.refresh_token == "r"
+    assert read_tokens()["refresh_token"] == "r"
+
+    # spotify is back, the next refresh just works
+    fake.token_outage = False
+    assert auth.ensure_fresh_token() == read_tokens()["access_token"] != "a"
+
+
+def test_unreachable_accounts_service_keeps_the_tokens(fake, monkeypatch):
+    write_tokens(access_token="a", refresh_token="r", expires_at=time.time() - 10)
+    monkeypatch.setenv("SPOTIFY_ACCOUNTS_URL", "http://127.0.0.1:9")
+    auth = Auth()
+    assert auth.refresh_error == "network"
+    assert read_tokens()["refresh_token"] == "r"
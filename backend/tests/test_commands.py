@@ -0,0 +1,76 @@
+import re
+
+from backend.testing.cli import tmfy
+from backend.testing.fake_spotify import artist_id_for
+
+
+def test_focus_workflow_reuses_stored_ids(fake, logged_in):
+    assert tmfy("search", "-ar", "Jay-Z") == (0, ["Focus: Jay-Z"])
+
+    fake.reset_counts()
+    status, albums = tmfy("search", "albums")
+    assert status == 0 and len(albums) == 10 and albums[0].startswith("#1 Album 1, ")
+    # straight to the artist's albums by id, no name search
+    assert dict(fake.request_counts) == {f"GET /v1/artists/{artist_id_for('Jay-Z')}/albums": 1}
+
+    fake.reset_counts()
+    assert tmfy("play", "#1", "-sf")[0] == 0
+    assert dict(fake.request_counts) == {"PUT /v1/me/player/shuffle": 1, "PUT /v1/me/player/play": 1}
+    assert fake.playback["context"]["uri"].startswith("spotify:album:")
+    assert fake.playback["shuffle_state"] is True
+
+
+def test_drill_down_album_to_tracks(fake, logged_in):
+    tmfy("search", "-al", "4:44", "Jay-Z")
+    fake.reset_counts()
+    status, tracks = tmfy("-tr", "#2")
+    assert status == 0 and tracks[0].startswith("#1 4:44 Jay-Z Album 1 Track 1, 4:44 Jay-Z, ")
+    assert list(fake.request_counts) == [next(key for key in fake.request_counts if key.endswith("/tracks"))]
+
+    fake.reset_counts()
+    assert tmfy("play", "#3") == (0, ["Playing 4:44 Jay-Z Album 1 Track 3"])
+    assert dict(fake.request_counts) == {"PUT /v1/me/player/play": 1}
+    assert fake.playback["item"]["name"].startswith("spotify:track:")
+    # the album plays on from the picked track
+    assert fake.playback["context"]["uri"].startswith("spotify:album:")
+
+
+def test_several_tracks_are_one_play_call(fake, logged_in):
+    tmfy("search", "-tr", "Jay-Z")
+    fake.reset_counts()
+    assert tmfy("play", "#1,3", "#4", "-sf") == (0, ["Playing 3 tracks (shuffle)"])
+    assert dict(fake.request_counts) == {"PUT /v1/me/player/shuffle": 1, "PUT /v1/me/player/play": 1}
+    assert len(fake.playback["uris"]) == 3
+    assert tmfy("play", "#1,99") == (1, ["No #99 in the last results, search first"])
+
+
+def test_track_search_variants(logged_in):
+    status, lines = tmfy("search", "Jay-Z", "-tr", "Smile")
+    assert status == 0 and len(lines) == 5
+    status, lines = tmfy("search", "-tr", "Jay-Z")
+    assert status == 0 and len(lines) == 10
+    assert re.fullmatch(r"#1 Jay-Z Track 0, Jay-Z, \d+:\d\d", lines[0])
+
+
+def test_unknown_reference_and_missing_focus(logged_in):
+    assert tmfy("play", "#1") == (1, ["No #1 in the last results, search first"])
+    status, lines = tmfy("search", "albums")
+    assert status == 1 and lines[0].startswith("Nothing in focus")
+
+
+def test_legacy_commands_unchanged(logged_in):
+    status, lines = tmfy("search", "Jay-Z", "tt")
+    assert status == 0 and lines[0] == "Track Name: Hit 1 | Artist: Artist 13c532 | Album: Greatest Hits "
+    assert tmfy("search", "Jay-Z", "nope")[0] == 2
+
+
+def test_local_catalog_answers_without_requests(fake, logged_in):
+    tmfy("search", "-tr", "Jay-Z")
+    fake.reset_counts()
+    status, lines = tmfy("search", "--local", "jay")
+    assert status == 0 and lines[0].startswith("#1 [track] Jay-Z Track 0, Jay-Z, ")
+    assert tmfy("play", "#2")[0] == 0
+    assert dict(fake.request_counts) == {"PUT /v1/me/player/play": 1}
+
+    status, lines = tmfy("search", "--hybrid", "-al", "Jay-Z")
+    assert status == 0 and len(lines) == 10
@@ -0,0 +1,85 @@
+import itertools
+
+import pytest
+import backend
+from backend.api import IncompleteDiscography, Search
+from backend.testing.cli import tmfy
+from backend.testing.fake_spotify import FakeSpotify, artist_id_for
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    # keep the id index out of the repo
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.fixture
+def fake():
+    with FakeSpotify(albums_per_artist=137) as fake:
+        yield fake
+
+
+def test_full_discography_is_paginated(fake):
+    albums = backend.Search("fake-token").get_artist_descography("Jay-Z")
+    assert len(albums) == 137
+    assert [album["name"] for album in albums[:3]] == ["Album 1", "Album 2", "Album 3"]
+    # ceil(137 / 50) album pages + the name lookup
+    assert fake.request_counts[f"GET /v1/artists/{artist_id_for('Jay-Z')}/albums"] == 3
+
+
+def test_hydration_batches_twenty_ids(fake):
+    albums = list(backend.Search("fake-token").iter_artist_descography("Jay-Z"))
+    assert len(albums) == 137
+    assert [album["name"] for album in albums] == [f"Album {n + 1}" for n in range(137)]
+    assert all(album["tracks"]["total"] == album["total_tracks"] for album in albums)
+    # ceil(137 / 20) batch lookups instead of 137 single album requests
+    assert fake.request_counts["GET /v1/albums"] == 7
+
+
+def test_small_catalogue_single_page():
+    with FakeSpotify(albums_per_artist=5) as fake:
+        albums = list(backend.Search("fake-token").iter_artist_descography("Jay-Z"))
+    assert len(albums) == 5
+    assert fake.request_counts["GET /v1/albums"] == 1
+
+
+def test_album_page_error_returns_nothing():
+    with FakeSpotify(error_rate=1.0):
+        assert backend.Search("fake-token").get_artist_album_page("abc") is None
+
+
+# the second album page (offset 50) fails, everything else answers
+@pytest.fixture
+def lost_page(monkeypatch):
+    get_page = Search.get_artist_album_page
+    monkeypatch.setattr(Search, "get_artist_album_page",
+                        lambda self, artist_id, offset=0, *args: None if offset == 50 else get_page(self, artist_id, offset, *args))
+
+
+def test_failed_page_is_reported_not_skipped(fake, lost_page):
+    albums = []
+    with pytest.raises(IncompleteDiscography) as error:
+        for album in backend.Search("fake-token").iter_artist_descography("Jay-Z"):
+            albums.append(album)
+    assert error.value.failed == 1
+    # every album that did arrive was streamed first
+    assert len(albums) == 137 - 50
+    assert backend.Search("fake-token").get_artist_descography("Jay-Z") is None
+
+
+def test_failed_batch_is_reported(fake, monkeypatch):
+    get_albums, calls = Search.get_albums, itertools.count()
+    # whichever /albums?ids= batch goes first fails
+    monkeypatch.setattr(Search, "get_albums", lambda self, ids: None if next(calls) == 0 else get_albums(self, ids))
+    albums = []
+    with pytest.raises(IncompleteDiscography):
+        for album in backend.Search("fake-token").iter_artist_descography("Jay-Z"):
+            albums.append(album)
+    assert len(albums) == 137 - 20
+
+
+def test_dsc_fails_on_a_partial_discography(fake, logged_in, lost_page):
+    status, lines = tmfy("search", "Jay-Z", "dsc")
+    assert status == 1
+    assert lines[-1] == "1 album request(s) failed, the discography of Jay-Z is incomplete"
+    assert len([line for line in lines if line.startswith("Album Name:")]) == 137 - 50
@@ -0,0 +1,35 @@
+import json, threading
+
+import pytest
+from backend.file_lock import atomic_write_json
+
+
+def test_threads_writing_one_file_never_mix(tmp_path):
+    path = str(tmp_path / "shared" / "state.json")
+    barrier = threading.Barrier(8)
+
+    def writer(n):
+        barrier.wait()
+        for _ in range(50):
+            atomic_write_json(path, {"writer": n, "payload": [n] * 500})
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with open(path) as file:
+        data = json.load(file)
+    assert data["payload"] == [data["writer"]] * 500
+    assert [p.name for p in (tmp_path / "shared").iterdir()] == ["state.json"]
+
+
+def test_failed_dump_keeps_the_old_file(tmp_path):
+    path = str(tmp_path / "state.json")
+    atomic_write_json(path, {"ok": True})
+    with pytest.raises(TypeError):
+        atomic_write_json(path, {"ok": object()})
+    with open(path) as file:
+        assert json.load(file) == {"ok": True}
+    assert [p.name for p in tmp_path.iterdir()] == ["state.json"]
@@ -0,0 +1,90 @@
+import threading
+
+from backend import metrics
+from backend.metrics import Histogram, MetricsRegistry
+from backend.search.search_wrapper import Search
+from backend.testing.cli import tmfy
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = Histogram()
+    for value in (0.001, 0.002, 0.003, 0.04, 20):
+        histogram.observe(value)
+    assert histogram.count == 5
+    assert histogram.counts[0] == 3 and histogram.counts[3] == 1 and histogram.counts[-1] == 1
+    assert histogram.quantile(0.5) <= 0.005
+    assert 0.025 <= histogram.quantile(0.8) <= 0.05
+    assert Histogram().quantile(0.5) is None
+
+
+def test_flush_is_cumulative_across_processes(tmp_path):
+    path = str(tmp_path / "metrics.json")
+    for _ in range(3):
+        # one registry per run, like separate tmfy processes
+        registry = MetricsRegistry(path)
+        registry.record_request("GET", "/v1/search", 200, 0.01, 100)
+        registry.record_cache("search", True)
+        registry.flush()
+    total = MetricsRegistry(path).load()
+    summary = total.summary()
+    assert summary["requests"] == 3
+    assert summary["endpoints"][0]["bytes"] == 300
+    assert summary["caches"]["search"] == {"hit": 3, "miss": 0, "ratio": 1.0}
+    assert registry.flush() is None
+
+
+def test_concurrent_flushes_lose_nothing(tmp_path):
+    path = str(tmp_path / "metrics.json")
+
+    def run():
+        for _ in range(20):
+            registry = MetricsRegistry(path)
+            registry.inc("tmfy_search_errors_total", reason="network")
+            registry.flush()
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert MetricsRegistry(path).load().summary()["search_errors"] == {"network": 80}
+
+
+def test_prometheus_text_format(tmp_path):
+    registry = MetricsRegistry(str(tmp_path / "metrics.json"))
+    registry.record_request("GET", "/v1/search", 200, 0.004, 10)
+    registry.record_request("GET", "/v1/search", 429, 0.2)
+    registry.inc("tmfy_search_errors_total", reason='quote"d')
+    text = registry.to_prometheus()
+    assert "# TYPE tmfy_http_request_duration_seconds histogram" in text
+    assert 'tmfy_http_request_duration_seconds_bucket{endpoint="/v1/search",method="GET",status="200",le="0.005"} 1' in text
+    assert 'tmfy_http_request_duration_seconds_bucket{endpoint="/v1/search",method="GET",status="429",le="0.1"} 0' in text
+    assert 'tmfy_http_request_duration_seconds_count{endpoint="/v1/search",method="GET",status="429"} 1' in text
+    assert 'tmfy_search_errors_total{reason="quote\\"d"} 1' in text
+    assert text.count("# TYPE tmfy_http_request_duration_seconds ") == 1
+
+
+def test_search_errors_are_counted(fake):
+    search = Search("fake-token")
+    assert not search.search("", "tracks")["success"]
+    assert not search.search_types("x", ["tracks", "nope"])["success"]
+    fake.revoked_tokens.add("fake-token")
+    assert not search.search("x", "tracks")["success"]
+    assert metrics.registry().summary()["search_errors"] == {"invalid": 2, "unauthorized": 1}
+
+
+def test_stats_command(fake, logged_in):
+    tmfy("search", "-ar", "Jay-Z")
+    tmfy("search", "-ar", "Jay-Z")
+    status, lines = tmfy("stats")
+    assert status == 0
+    assert lines[0].startswith("1 requests recorded in ")
+    assert lines[2].startswith("GET /v1/search ")
+    assert "status: 200=1" in lines
+    assert "cache hit ratio: search 50% (1/2)" in lines
+
+    status, lines = tmfy("stats", "--prometheus")
+    assert status == 0 and lines[0].startswith("# HELP ")
+
+    assert tmfy("stats", "reset") == (0, ["Metrics reset"])
+    assert tmfy("stats")[1] == [f"0 requests recorded in {metrics.registry().path}"]
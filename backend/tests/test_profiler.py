@@ -0,0 +1,66 @@
+import json
+
+import pytest
+from backend import profiler
+from backend.endpoints import endpoint_template
+from backend.testing.cli import tmfy
+
+
+@pytest.fixture(autouse=True)
+def no_leftover_profiler():
+    yield
+    profiler.disable()
+
+
+def test_disabled_spans_record_nothing():
+    with profiler.span("resolve") as attrs:
+        attrs["cache"] = "hit"
+    assert not profiler.enabled()
+    recorder = profiler.enable()
+    with profiler.span("resolve") as attrs:
+        attrs["cache"] = "hit"
+    assert profiler.disable() is recorder
+    assert [span["name"] for span in recorder.spans] == ["resolve"]
+
+
+def test_summary_groups_spans_and_coverage():
+    recorder = profiler.enable()
+    with profiler.span("search"):
+        for status in ("hit", "miss", "hit"):
+            with profiler.span("GET /v1/search", "http", cache=status, bytes=100):
+                pass
+    with pytest.raises(KeyError):
+        with profiler.span("render"):
+            raise KeyError("x")
+    groups = {group["name"]: group for group in recorder.summary()}
+    assert groups["GET /v1/search"]["calls"] == 3
+    assert groups["GET /v1/search"]["bytes"] == 300
+    assert groups["GET /v1/search"]["cache"] == {"hit": 2, "miss": 1}
+    assert recorder.spans[-1]["attrs"]["error"] == "KeyError"
+    # nested spans are not counted twice
+    assert recorder.covered_ms() <= groups["search"]["total_ms"] + groups["render"]["total_ms"] + 1e-6
+
+
+def test_endpoint_template():
+    assert endpoint_template("https://api.spotify.com/v1/artists/0TnOYISbd1XYRBk9myaseg/albums?limit=50") \
+        == "/v1/artists/{id}/albums"
+    assert endpoint_template("http://127.0.0.1:8000/v1/me/player/play") == "/v1/me/player/play"
+    assert endpoint_template("https://accounts.spotify.com/api/token") == "/api/token"
+
+
+def test_profile_flag_reports_phases_and_http_calls(fake, logged_in, tmp_path):
+    trace = tmp_path / "trace.json"
+    status, lines = tmfy("search", "-ar", "Jay-Z", "--profile", "--trace", str(trace))
+    assert status == 0
+    assert lines[0] == "Focus: Jay-Z"
+    assert lines[1].startswith("-- profile: ")
+    rows = {line.split("  ")[0].strip() for line in lines[3:-1]}
+    assert {"auth", "search", "normalize", "http GET /v1/search"} <= rows
+    events = json.loads(trace.read_text())["traceEvents"]
+    http = next(event for event in events if event["cat"] == "http")
+    assert http["args"]["status"] == 200 and http["args"]["bytes"] > 0
+    assert not profiler.enabled()
+
+
+def test_profile_is_off_by_default(fake, logged_in):
+    assert tmfy("search", "-ar", "Jay-Z") == (0, ["Focus: Jay-Z"])
@@ -0,0 +1,118 @@
+import io, threading, time
+
+import pytest
+from backend.commands import CommandContext
+from backend.shell import TmfyShell, TypeAhead
+
+
+# searches for a prefix in `hold` stay in flight until release is set
+class StubSearch:
+    def __init__(self, hold=()):
+        self.hold = set(hold)
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, prefix):
+        self.calls.append(prefix)
+        if prefix in self.hold:
+            self.started.set()
+            self.release.wait(5)
+        return {"success": True, "query": prefix, "result": [prefix.upper()]}
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.001)
+    return True
+
+
+def collect():
+    seen = []
+    return seen, lambda prefix, result: seen.append(prefix)
+
+
+def test_fast_typing_sends_one_search():
+    search = StubSearch()
+    seen, on_result = collect()
+    # no timer can fire while typing, flush() skips the last one
+    typeahead = TypeAhead(search, delay=5, on_result=on_result)
+    for prefix in ("l", "lo", "los", "lose"):
+        typeahead.update(prefix)
+    assert typeahead.flush()["query"] == "lose"
+    assert search.calls == ["lose"]
+    assert seen == ["lose"]
+    assert typeahead.stats()["debounced"] == 2   # "lo" and "los" timers, "l" is below min_chars
+
+
+def test_pause_then_keep_typing_drops_the_stale_result():
+    search = StubSearch(hold={"lo"})
+    seen, on_result = collect()
+    typeahead = TypeAhead(search, delay=0.01, on_result=on_result)
+    typeahead.update("lo")
+    assert search.started.wait(5)       # "lo" is in flight now
+    typeahead.update("lose")
+    assert typeahead.flush()["query"] == "lose"
+    search.release.set()
+    assert wait_for(lambda: typeahead.stats()["cancelled"] == 1)
+    assert search.calls == ["lo", "lose"]
+    assert seen == ["lose"]
+    assert typeahead.stats()["cancelled"] == 1
+
+
+def test_prefix_cache_serves_backspace():
+    search = StubSearch()
+    typeahead = TypeAhead(search, delay=0.01)
+    typeahead.update("jay")
+    typeahead.flush()
+    typeahead.update("jayz")
+    typeahead.flush()
+    typeahead.update("jay")
+    assert typeahead.flush()["query"] == "jay"
+    assert search.calls == ["jay", "jayz"]
+    assert typeahead.stats()["cache_hits"] == 1
+
+
+def test_short_prefix_and_cancel():
+    search = StubSearch()
+    typeahead = TypeAhead(search, delay=5)
+    typeahead.update("j")
+    assert typeahead.flush() is None
+    typeahead.update("jay")
+    timer = typeahead._timer
+    typeahead.cancel()
+    # a cancelled timer wakes up and exits without searching
+    timer.join(5)
+    assert not timer.is_alive()
+    assert search.calls == []
+
+
+@pytest.fixture
+def shell(fake, logged_in):
+    out = io.StringIO()
+    context = CommandContext()
+    yield TmfyShell(context, out=out, delay=0.01), fake, out
+    context.close()
+
+
+def test_find_then_play_reuses_the_session(shell):
+    shell, fake, out = shell
+    result = shell.find("albums", keys=iter("4:44\r"))
+    assert result["success"] and "#1 4:44 Album 0, 4:44, " in out.getvalue()
+    assert fake.request_counts["GET /v1/search"] == 1
+
+    fake.reset_counts()
+    shell.run(["tmfy -tr #1", "play #2", "quit", "search -ar never-runs"])
+    assert "Playing 4:44 Album 0 Track 2" in out.getvalue()
+    assert sum(fake.request_counts.values()) == 2
+    assert shell.context.session.pool_stats()["connections_opened"] == 1
+
+
+def test_find_escape_keeps_previous_results(shell):
+    shell, fake, out = shell
+    shell.find("tracks", keys=iter("Smile\r"))
+    assert shell.find("tracks", keys=iter("Jay\x1b")) is None
+    assert shell.context.focus_session.resolve("#1")["name"] == "Smile Track 0"
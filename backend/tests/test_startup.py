@@ -0,0 +1,46 @@
+import subprocess, sys
+
+import backend
+from backend.benchmarks import bench_startup
+from backend.benchmarks.bench_startup import parse_importtime, forbidden_loaded
+
+REPO_ROOT = bench_startup.REPO_ROOT
+
+
+def loaded_after(code):
+    script = f"import sys; {code}; print(','.join(sorted(m.split('.')[0] for m in sys.modules)))"
+    result = subprocess.run([sys.executable, "-c", script], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    return set(result.stdout.strip().split(","))
+
+
+def test_cli_entry_point_skips_heavy_imports():
+    loaded = loaded_after("import tmfy")
+    assert not loaded & {"flask", "requests", "urllib3", "dotenv", "asyncio"}
+
+
+def test_lazy_attributes_still_resolve():
+    assert loaded_after("import backend; backend.Search") >= {"requests"}
+    assert "flask" not in loaded_after("import backend; backend.Search; backend.Player")
+    assert backend.Search.__module__ == "backend.api"
+    assert backend.app.name == "backend"
+
+
+def test_parse_importtime():
+    stderr = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       100 |        100 | site",
+        bench_startup.MARKER,
+        "import time:        40 |         40 |     json.decoder",
+        "import time:        60 |        100 |   json",
+        "import time:        20 |        120 | mymodule",
+    ])
+    rows = parse_importtime(stderr)
+    assert rows == [("json.decoder", 40, 40, 2), ("json", 60, 100, 1), ("mymodule", 20, 120, 0)]
+    assert forbidden_loaded({"requests.adapters", "json"}, ["requests", "flask"]) == ["requests"]
+
+
+def test_budget_decides_exit_status(capsys):
+    assert bench_startup.main(["--runs", "1", "--budget-ms", "100000"]) == 0
+    assert bench_startup.main(["--runs", "1", "--budget-ms", "0"]) == 1
+    assert "over the 0.0 ms budget" in capsys.readouterr().out
+    assert bench_startup.main(["--runs", "1", "--budget-ms", "100000", "--module", "backend.api"]) == 1
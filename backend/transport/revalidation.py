@@ -0,0 +1,128 @@
+import hashlib, json, os, threading
+
+from backend import metrics
+from backend.endpoints import endpoint_template
+from backend.search.search_cache import SearchCache
+
+
+"""
+Conditional GETs: once a cached answer has expired, ask spotify whether it changed
+instead of downloading it again
+    200 with an ETag / Last-Modified: only the validators are stored, the normalized value
+                stays in the SearchCache the caller keeps it in anyway (`cache`, `cache_key`)
+    next time:  If-None-Match / If-Modified-Since is sent while the (expired) value is still
+                in that cache, a 304 hands it back and only restarts its ttl (no body, no
+                json parsing, no normalization, nothing serialized again)
+Validator entries are small ({etag, last_modified, bytes, cache_key}) and live in
+.tmfy_cache/validators, callers without a cache of their own keep values in validators/values
+"""
+
+# how long a validator is kept around without being used
+VALIDATOR_TTL = 7 * 24 * 3600
+
+
+# url + params, the bearer token is left out: catalogue answers are the same for any token
+def make_key(url, params=None):
+    params = sorted((str(name), str(value)) for name, value in dict(params or {}).items())
+    return hashlib.sha1(json.dumps([url, params]).encode("utf-8")).hexdigest()
+
+
+class Revalidator:
+    def __init__(self, store=None, values=None):
+        self.store = store if store is not None else SearchCache(
+            cache_dir=os.path.join(os.getenv("TMFY_CACHE_DIR", ".tmfy_cache"), "validators"),
+            ttl=VALIDATOR_TTL, max_entries=512)
+        # value cache for callers that do not pass one (catalogue reads, devices)
+        self.values = values if values is not None else SearchCache(
+            cache_dir=os.path.join(self.store.cache_dir, "values"), ttl=VALIDATOR_TTL, max_entries=256)
+        self.revalidated = 0
+        self.stored = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+
+
+    """
+    Function: GET `url`, conditionally when a validator and the value it validates are stored
+    Returns: (response, value)
+             value is normalize(response) on a 200, the stored value on a 304 (response is
+             then the 304 itself), None for anything else (the caller reads response.status_code)
+    Params:
+            @normalize: response --> value worth keeping, response.json() by default
+            @cache/@cache_key: the SearchCache entry the caller keeps the value in (the caller
+                               set()s it, a 304 only touch()es it), without one the value is
+                               kept in self.values
+    """
+    def get(self, session, url, params=None, normalize=None, cache=None, cache_key=None):
+        key = make_key(url, params)
+        own_cache = cache is None
+        if own_cache:
+            cache, cache_key = self.values, key
+        entry = self.store.get(key)
+        stale = cache.get_stale(cache_key) if entry is not None and entry.get("cache_key") == cache_key else None
+        headers = {}
+        if stale is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = session.get(url, params=params, headers=headers or None)
+        if response.status_code == 304 and stale is not None:
+            with self._lock:
+                self.revalidated += 1
+                self.bytes_saved += entry.get("bytes", 0)
+            metrics.registry().inc("tmfy_http_bytes_saved_total", entry.get("bytes", 0), endpoint=endpoint_template(url))
+            # still valid: restart both ttls, nothing is written again
+            cache.touch(cache_key)
+            self.store.touch(key)
+            return response, stale
+        if response.status_code != 200:
+            return response, None
+
+        value = normalize(response) if normalize is not None else response.json()
+        # an error result dict ({"success": False...}) is neither cached nor revalidated
+        if isinstance(value, dict) and value.get("success") is False:
+            return response, value
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            if own_cache:
+                cache.set(cache_key, value)
+            with self._lock:
+                self.stored += 1
+            self.store.set(key, {
+                "etag": etag,
+                "last_modified": last_modified,
+                "bytes": len(response.content or b""),
+                "cache_key": cache_key
+            })
+        return response, value
+
+
+    def stats(self):
+        with self._lock:
+            return {
+                "revalidated": self.revalidated,
+                "stored": self.stored,
+                "bytes_saved": self.bytes_saved
+            }
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+# one validator store per process, shared by Search, the search wrapper and Player
+def default_revalidator():
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = Revalidator()
+    return _default
+
+
+def set_default_revalidator(revalidator):
+    global _default
+    with _default_lock:
+        _default = revalidator
@@ -0,0 +1,188 @@
+import email.utils, random, threading, time
+
+import requests
+
+
+# statuses worth another attempt, 429 is handled separately (Retry-After)
+RETRY_STATUSES = {500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class TokenBucket:
+    """
+    Token bucket limiter, `rate` requests per second with bursts of up to `capacity`
+    Callers reserve a token and sleep for however long that reservation needs,
+    so waiting threads are served in arrival order
+    """
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+
+    # Returns how long the caller has to wait before sending
+    def reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.blocked_until - now)
+
+
+    # Retry-After: nobody sends until the server said we may
+    def block_for(self, seconds):
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class RequestScheduler:
+    """
+    Central gate for every outgoing api call (SpotifySession sends through it)
+        - token bucket rate limit shared by every thread using the scheduler
+        - 429: honours Retry-After (pauses the whole bucket) and retries
+        - 5xx / connection errors: idempotent requests are retried with jittered exponential backoff
+        - stats(): queue depth, throttles, retries
+    """
+    def __init__(self, rate=10.0, burst=20, max_retries=4, backoff_base=0.5, max_backoff=30.0, max_retry_after=60.0):
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.sent = 0
+        self.throttled = 0
+        self.retries = 0
+        self.gave_up = 0
+        self.waited_seconds = 0.0
+        self._lock = threading.Lock()
+
+
+    """
+    Function: send a request under the rate limit, retrying where it is safe
+    Returns: the final requests.Response (or raises the last connection error)
+    Params:
+            @method: http method, decides whether 5xx/connection errors are retried
+            @send: zero argument callable that performs the request
+            @retry: False for callers with their own backoff (the now playing poller), the
+                    first 429 / 5xx / connection error goes straight back to them
+    """
+    def execute(self, method, send, retry=True):
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            self._wait_for_slot()
+            try:
+                response = send()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if not retry or not idempotent or attempt >= self.max_retries:
+                    raise
+                self._backoff(attempt)
+                attempt += 1
+                continue
+
+            if response.status_code == 429:
+                with self._lock:
+                    self.throttled += 1
+                if not retry:
+                    return response
+                retry_after = self.parse_retry_after(response.headers.get("Retry-After"))
+                if attempt >= self.max_retries or (retry_after or 0) > self.max_retry_after:
+                    with self._lock:
+                        self.gave_up += 1
+                    return response
+                # a 429 was never processed, so it is safe to resend whatever the method
+                if retry_after is None:
+                    self._backoff(attempt)
+                else:
+                    self.bucket.block_for(retry_after)
+                    with self._lock:
+                        self.retries += 1
+                attempt += 1
+                continue
+
+            if response.status_code in RETRY_STATUSES and retry and idempotent and attempt < self.max_retries:
+                self._backoff(attempt)
+                attempt += 1
+                continue
+            return response
+
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sent": self.sent,
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "throttled": self.throttled,
+                "retries": self.retries,
+                "gave_up": self.gave_up,
+                "waited_seconds": self.waited_seconds
+            }
+
+
+    # Retry-After is either delta seconds or an http date, None when missing/garbage
+    @staticmethod
+    def parse_retry_after(value):
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            when = email.utils.parsedate_to_datetime(value)
+            return max(0.0, when.timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+    def _wait_for_slot(self):
+        wait = self.bucket.reserve()
+        if wait > 0:
+            with self._lock:
+                self.queue_depth += 1
+                self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+                self.waited_seconds += wait
+            try:
+                time.sleep(wait)
+            finally:
+                with self._lock:
+                    self.queue_depth -= 1
+        with self._lock:
+            self.sent += 1
+
+
+    # full jitter: sleep a random time in [0, base * 2^attempt], capped
+    def _backoff(self, attempt):
+        delay = random.uniform(0, min(self.max_backoff, self.backoff_base * (2 ** attempt)))
+        with self._lock:
+            self.retries += 1
+            self.waited_seconds += delay
+        time.sleep(delay)
+
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+
+# one scheduler per process unless a session is given its own
+def default_scheduler():
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = RequestScheduler()
+        return _default_scheduler
+
+
+# swap the process wide scheduler (tests, or a daemon with its own limits)
+def set_default_scheduler(scheduler):
+    global _default_scheduler
+    with _default_lock:
+        _default_scheduler = scheduler
@@ -0,0 +1,169 @@
+import threading, time
+
+import requests
+from requests.adapters import HTTPAdapter
+from backend.endpoints import api_url, endpoint_template
+from backend import metrics
+from backend.profiler import span
+from backend.transport.scheduler import default_scheduler
+from backend.transport.single_flight import SingleFlight
+
+
+class SpotifySession:
+    """
+    One keep-alive, connection pooled transport shared by Auth, Search, SearchManager and Player
+        - relative urls ("/search") are resolved against the api base url
+        - the bearer token is injected centrally for api calls (never for the accounts service)
+        - with an Auth attached, a 401 triggers one refresh + retry (Auth.handle_unauthorized)
+        - every request goes through the (process wide by default) RequestScheduler:
+          rate limit, Retry-After, backoff retries
+        - identical GETs in flight at the same time are coalesced into one http request
+        - every http call is a profiler span (tmfy --profile): endpoint, status, bytes
+          and a sample in the metrics registry (tmfy stats)
+    """
+    def __init__(self, token=None, auth=None, pool_connections=4, pool_maxsize=10, headers=None, timeout=None,
+                 scheduler=None):
+        self.auth = auth
+        self.scheduler = scheduler if scheduler is not None else default_scheduler()
+        self._token = token
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.adapter = adapter
+        if headers:
+            self.session.headers.update(headers)
+        self.requests_sent = 0
+        self.unauthorized_retries = 0
+        self.inflight = SingleFlight()
+        self._lock = threading.Lock()
+
+
+    @property
+    def token(self):
+        if self.auth is not None:
+            return self.auth.token
+        return self._token
+
+
+    @token.setter
+    def token(self, value):
+        self._token = value
+
+
+    """
+    Function: send one request through the shared pool
+    Returns: requests.Response
+    Params:
+            @url: absolute url or a path relative to the api base ("/me/player/devices")
+            @authorize: inject the bearer token, defaults to True for urls under the api base
+            @retry_unauthorized: on 401 let the attached Auth refresh the token and retry once
+            @coalesce: share the response of an identical GET that is already in flight
+            @retry: let the scheduler retry 429 / 5xx / connection errors (RequestScheduler.execute)
+    """
+    def request(self, method, url, headers=None, authorize=None, retry_unauthorized=True, coalesce=True, retry=True,
+                **kwargs):
+        if url.startswith("/"):
+            url = api_url(url)
+        if authorize is None:
+            authorize = url.startswith(api_url())
+        kwargs.setdefault("timeout", self.timeout)
+
+        key = self._flight_key(method, url, headers, authorize, retry, kwargs) if coalesce else None
+        if key is None:
+            return self._request(method, url, headers, authorize, retry_unauthorized, retry, **kwargs)
+        return self.inflight.do(key, lambda: self._request(method, url, headers, authorize, retry_unauthorized, retry,
+                                                           **kwargs))
+
+
+    def _request(self, method, url, headers, authorize, retry_unauthorized, retry, **kwargs):
+        sent_token = self.token
+        response = self._send(method, url, headers, authorize, retry, **kwargs)
+        if response.status_code == 401 and authorize and retry_unauthorized and self.auth is not None:
+            if self.auth.handle_unauthorized(sent_token):
+                with self._lock:
+                    self.unauthorized_retries += 1
+                response = self._send(method, url, headers, authorize, retry, **kwargs)
+        return response
+
+
+    # normalized description of a GET, None for anything that must not be shared
+    # (writes, request bodies, streamed responses)
+    def _flight_key(self, method, url, headers, authorize, retry, kwargs):
+        if method.upper() != "GET" or set(kwargs) - {"params", "timeout"}:
+            return None
+        params = kwargs.get("params") or {}
+        params = tuple(sorted((str(k), str(v)) for k, v in dict(params).items()))
+        header_items = tuple(sorted((headers or {}).items()))
+        return (url, params, header_items, self.token if authorize else None, retry)
+
+
+    def _send(self, method, url, headers, authorize, retry, **kwargs):
+        request_headers = dict(headers or {})
+        if authorize:
+            request_headers["Authorization"] = f"Bearer {self.token}"
+
+        def send():
+            with self._lock:
+                self.requests_sent += 1
+            return self.session.request(method, url, headers=request_headers, **kwargs)
+
+        # wall time includes rate limit waits and 429 / 5xx retries
+        method, endpoint = method.upper(), endpoint_template(url)
+        started = time.perf_counter()
+        with span(f"{method} {endpoint}", "http") as attrs:
+            try:
+                response = self.scheduler.execute(method, send, retry=retry)
+            except requests.exceptions.RequestException:
+                metrics.registry().record_request(method, endpoint, "error", time.perf_counter() - started)
+                raise
+            attrs["status"] = response.status_code
+            attrs["bytes"] = len(response.content or b"")
+        metrics.registry().record_request(method, endpoint, response.status_code, time.perf_counter() - started,
+                                          attrs["bytes"])
+        return response
+
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+
+    """
+    Function: connection pool statistics
+    Returns: dict with requests sent, connections opened and how many requests reused a warm connection
+    """
+    def pool_stats(self):
+        pools = self.adapter.poolmanager.pools
+        connections = 0
+        pool_requests = 0
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            connections += pool.num_connections
+            pool_requests += pool.num_requests
+        return {
+            "requests": self.requests_sent,
+            "hosts": len(pools),
+            "connections_opened": connections,
+            "reused_connections": max(0, pool_requests - connections),
+            "unauthorized_retries": self.unauthorized_retries,
+            "deduplicated": self.inflight.deduplicated
+        }
+
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,62 @@
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """
+    Request coalescing: while a call for `key` is in flight, every other caller asking
+    for the same key waits for that call and gets its result (or its exception)
+    instead of doing the work again. Nothing is remembered once the call finished,
+    caching stays the job of SearchCache / IdIndex
+    """
+    def __init__(self):
+        self.calls = 0
+        self.executed = 0
+        self.deduplicated = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+
+    """
+    Function: run fn() once per key among concurrent callers
+    Returns: fn()'s return value, shared by every caller that joined the flight
+    Params:
+            @key: hashable description of the call (normalized request)
+            @fn: zero argument callable doing the actual work
+    """
+    def do(self, key, fn):
+        with self._lock:
+            self.calls += 1
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self.executed += 1
+            else:
+                self.deduplicated += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executed": self.executed,
+                "deduplicated": self.deduplicated,
+                "in_flight": len(self._inflight)
+            }
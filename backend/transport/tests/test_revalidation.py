@@ -0,0 +1,107 @@
+import json, os, time
+from types import SimpleNamespace
+
+import pytest
+import backend
+from backend import metrics
+from backend.search import search_cache
+from backend.search.search_cache import SearchCache
+from backend.search.search_manager import SearchManager
+from backend.search.search_wrapper import Search as SearchWrapper
+from backend.testing.fake_spotify import FakeSpotify
+from backend.transport.revalidation import Revalidator, make_key
+from backend.transport.session import SpotifySession
+
+
+@pytest.fixture
+def revalidator(tmp_path):
+    return Revalidator(SearchCache(cache_dir=str(tmp_path / "validators")))
+
+
+def test_expired_search_is_revalidated_not_downloaded(fake, tmp_path, revalidator):
+    session = SpotifySession("fake-token")
+    wrapper = SearchWrapper("fake-token", session=session, revalidator=revalidator)
+    # ttl=0: every run finds its SearchManager entry expired
+    manager = SearchManager("fake-token", cache=SearchCache(cache_dir=str(tmp_path / "search"), ttl=0), session=session)
+    manager.search_wrapper_api = wrapper
+    first = manager.run("Eminem", "artists")
+    second = manager.run("Eminem", "artists")
+
+    assert first["success"] is True
+    assert second["result"] == first["result"]
+    assert fake.request_counts["GET /v1/search"] == 2
+    stats = revalidator.stats()
+    assert stats["stored"] == 1 and stats["revalidated"] == 1
+    assert stats["bytes_saved"] > 0
+    assert metrics.registry().summary()["bytes_saved"] == stats["bytes_saved"]
+
+
+def test_304_restarts_the_ttl_without_rewriting(fake, tmp_path, revalidator, monkeypatch):
+    session = SpotifySession("fake-token")
+    cache = SearchCache(cache_dir=str(tmp_path / "search"), ttl=60)
+    manager = SearchManager("fake-token", cache=cache, session=session)
+    manager.search_wrapper_api = SearchWrapper("fake-token", session=session, revalidator=revalidator)
+    first = manager.run("Eminem", "artists")
+
+    # validators only, the value is read back from the SearchManager cache
+    validators = [name for name in os.listdir(revalidator.store.cache_dir) if name.endswith(".json")]
+    assert len(validators) == 1
+    with open(os.path.join(revalidator.store.cache_dir, validators[0])) as file:
+        assert set(json.load(file)["value"]) == {"etag", "last_modified", "bytes", "cache_key"}
+
+    writes = []
+    write_disk = cache._write_disk
+    monkeypatch.setattr(cache, "_write_disk", lambda key, entry: writes.append(key) or write_disk(key, entry))
+    later = time.time() + 120
+    monkeypatch.setattr(search_cache, "time", SimpleNamespace(time=lambda: later))
+    second = manager.run("Eminem", "artists")
+
+    assert second["result"] == first["result"]
+    assert revalidator.stats()["revalidated"] == 1
+    assert writes == []
+    # fresh again, in memory and on disk (mtime)
+    key = cache.make_key("Eminem", "artists", 5, 0, None)
+    assert cache.is_fresh(key)
+    assert SearchCache(cache_dir=cache.cache_dir, ttl=60).get(key) is not None
+
+
+def test_catalogue_reads_reuse_the_stored_value(fake, revalidator):
+    search = backend.Search("fake-token", revalidator=revalidator)
+    artist_id = search.get_artist_id("Jay-Z")
+    tracks = search.get_artist_top_tracks_by_id(artist_id)
+    album_id = search.get_artist_album_page(artist_id)["items"][0]["id"]
+    album_tracks = search.get_album_tracks(album_id)
+
+    assert search.get_artist_top_tracks_by_id(artist_id) == tracks
+    assert search.get_album_tracks(album_id) == album_tracks
+    assert revalidator.stats()["revalidated"] == 2
+
+
+def test_nothing_stored_without_validators(tmp_path, monkeypatch, revalidator):
+    monkeypatch.chdir(tmp_path)
+    with FakeSpotify(etags=False) as fake:
+        search = backend.Search("fake-token", revalidator=revalidator)
+        artist_id = search.get_artist_id("Jay-Z")
+        assert search.get_artist_top_tracks_by_id(artist_id) == search.get_artist_top_tracks_by_id(artist_id)
+        assert fake.request_counts[f"GET /v1/artists/{artist_id}/top-tracks"] == 2
+    assert revalidator.stats() == {"revalidated": 0, "stored": 0, "bytes_saved": 0}
+
+
+def test_errors_and_error_results_are_not_stored(fake, revalidator):
+    response, value = revalidator.get(SpotifySession(None), "/search", {"q": "Eminem", "type": "artist"})
+    assert response.status_code == 401 and value is None
+
+    session = SpotifySession("fake-token")
+
+    url = "/search"
+    params = {"q": "Eminem", "type": "artist"}
+    response, value = revalidator.get(session, url, params, normalize=lambda res: {"success": False})
+    assert response.status_code == 200 and value == {"success": False}
+    assert revalidator.store.get(make_key(url, params)) is None
+    assert revalidator.stats()["stored"] == 0
+
+
+def test_key_ignores_param_order_but_not_case():
+    assert make_key("/search", {"q": "a", "type": "artist"}) == make_key("/search", {"type": "artist", "q": "a"})
+    # ids are case sensitive
+    assert make_key("/albums/AbC") != make_key("/albums/abc")
@@ -0,0 +1,114 @@
+import email.utils, time
+
+import pytest
+import requests
+from backend.search.search_wrapper import Search
+from backend.testing.fake_spotify import FakeSpotify
+from backend.transport.scheduler import RequestScheduler, TokenBucket
+from backend.transport.session import SpotifySession
+
+
+class StubResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def scripted(*outcomes):
+    outcomes = list(outcomes)
+    calls = []
+
+    def send():
+        calls.append(1)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    return send, calls
+
+
+@pytest.fixture
+def scheduler():
+    return RequestScheduler(rate=1000, burst=1000, backoff_base=0.001)
+
+
+def test_bucket_spaces_requests_after_burst():
+    bucket = TokenBucket(rate=100, capacity=2)
+    assert bucket.reserve() == 0 and bucket.reserve() == 0
+    assert 0.005 < bucket.reserve() <= 0.011
+
+
+def test_retry_after_is_honoured(scheduler):
+    send, calls = scripted(StubResponse(429, {"Retry-After": "0.05"}), StubResponse(200))
+    start = time.monotonic()
+    assert scheduler.execute("GET", send).status_code == 200
+    assert time.monotonic() - start >= 0.05
+    assert len(calls) == 2
+    assert scheduler.stats()["throttled"] == 1
+
+
+def test_retry_after_too_long_gives_up(scheduler):
+    send, calls = scripted(StubResponse(429, {"Retry-After": "3600"}))
+    assert scheduler.execute("GET", send).status_code == 429
+    assert scheduler.stats()["gave_up"] == 1
+
+
+def test_server_errors_retried_only_for_idempotent(scheduler):
+    send, calls = scripted(StubResponse(503), StubResponse(502), StubResponse(200))
+    assert scheduler.execute("GET", send).status_code == 200
+    assert len(calls) == 3
+    send, calls = scripted(StubResponse(503), StubResponse(200))
+    assert scheduler.execute("POST", send).status_code == 503
+    assert len(calls) == 1
+
+
+def test_connection_errors_retried_for_get(scheduler):
+    send, calls = scripted(requests.exceptions.ConnectionError("reset"), StubResponse(200))
+    assert scheduler.execute("GET", send).status_code == 200
+    send, calls = scripted(requests.exceptions.ConnectionError("reset"))
+    with pytest.raises(requests.exceptions.ConnectionError):
+        scheduler.execute("PUT", send)
+
+
+def test_retries_are_bounded(scheduler):
+    send, calls = scripted(*[StubResponse(500)] * 10)
+    assert scheduler.execute("GET", send).status_code == 500
+    assert len(calls) == scheduler.max_retries + 1
+
+
+def test_no_retry_returns_the_first_failure(scheduler):
+    for outcome in (StubResponse(429, {"Retry-After": "0"}), StubResponse(503)):
+        send, calls = scripted(outcome, StubResponse(200))
+        assert scheduler.execute("GET", send, retry=False) is outcome
+        assert len(calls) == 1
+    send, calls = scripted(requests.exceptions.ConnectionError("reset"), StubResponse(200))
+    with pytest.raises(requests.exceptions.ConnectionError):
+        scheduler.execute("GET", send, retry=False)
+    assert scheduler.stats()["retries"] == 0 and scheduler.stats()["gave_up"] == 0
+
+
+def test_parse_retry_after():
+    assert RequestScheduler.parse_retry_after("3") == 3.0
+    assert RequestScheduler.parse_retry_after(None) is None
+    assert RequestScheduler.parse_retry_after("soon") is None
+    http_date = email.utils.formatdate(time.time() + 30, usegmt=True)
+    assert 25 < RequestScheduler.parse_retry_after(http_date) <= 30
+
+
+def test_bulk_lookups_survive_throttling(scheduler):
+    with FakeSpotify(rate_limit_rate=0.3, retry_after=0, seed=3) as fake:
+        search = Search("fake-token", session=SpotifySession("fake-token", scheduler=scheduler))
+        results = [search.search(f"artist {n}", "artists", limit=1) for n in range(30)]
+    assert all(res["success"] for res in results)
+    assert fake.status_counts[429] > 0
+    assert scheduler.stats()["throttled"] == fake.status_counts[429]
+
+
+def test_rate_limit_queues_callers():
+    scheduler = RequestScheduler(rate=50, burst=1)
+    send, calls = scripted(*[StubResponse(200)] * 5)
+    start = time.monotonic()
+    for _ in range(5):
+        scheduler.execute("GET", send)
+    assert time.monotonic() - start >= 0.07
+    assert scheduler.stats()["waited_seconds"] > 0
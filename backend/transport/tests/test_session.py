@@ -0,0 +1,47 @@
+import json
+
+import backend
+from backend.Auth import Auth
+from backend.search.search_manager import SearchManager
+from backend.search.search_cache import SearchCache
+from backend.transport.session import SpotifySession
+
+
+def test_chained_calls_reuse_one_connection(fake):
+    session = SpotifySession("fake-token")
+    search = backend.Search("fake-token", session=session)
+    assert search.get_artist_descography("Jay-Z")
+    assert search.get_artist_top_tracks("Jay-Z")
+    stats = session.pool_stats()
+    # the second name lookup is served by the id index
+    assert stats["requests"] == 3
+    assert stats["connections_opened"] == 1
+    assert stats["reused_connections"] == 2
+
+
+def test_bearer_token_injected_centrally(fake):
+    session = SpotifySession("fake-token")
+    assert session.get("/me/player/devices").status_code == 200
+    assert SpotifySession(None).get("/me/player/devices").status_code == 401
+
+
+def test_default_headers_and_pool_size(fake):
+    session = SpotifySession("fake-token", pool_maxsize=2, headers={"Accept-Language": "en"})
+    assert session.adapter._pool_maxsize == 2
+    assert session.session.headers["Accept-Language"] == "en"
+
+
+def test_unauthorized_refreshes_through_auth(fake):
+    with open("tokens.json", "w") as file:
+        json.dump({"access_token": "revoked", "refresh_token": "r"}, file)
+    fake.revoked_tokens.add("revoked")
+    auth = Auth()
+    manager = SearchManager(auth.token, cache=SearchCache(cache_dir="cache"), session=auth.session)
+    res = manager.run("Eminem", "artists")
+    assert res["success"] is True
+    assert auth.token != "revoked"
+    assert auth.session.pool_stats()["unauthorized_retries"] == 1
+    # auth, search and player all ride on the same pool
+    player = backend.Player(auth.token, session=auth.session)
+    assert player.get_devices()
+    assert auth.session.pool_stats()["hosts"] == 1
@@ -0,0 +1,99 @@
+import threading, time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import backend
+from backend.search.id_index import IdIndex
+from backend.search.search_cache import SearchCache
+from backend.search.search_manager import SearchManager
+from backend.testing.fake_spotify import FakeSpotify
+from backend.transport.session import SpotifySession
+from backend.transport.single_flight import SingleFlight
+
+
+def fan_out(fn, count=8):
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        return list(pool.map(lambda _: fn(), range(count)))
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    runs = []
+
+    def slow():
+        runs.append(1)
+        started.set()
+        release.wait(2)
+        return "done"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        leader = pool.submit(flight.do, "k", slow)
+        started.wait(2)
+        followers = [pool.submit(flight.do, "k", slow) for _ in range(3)]
+        while flight.stats()["deduplicated"] < 3:
+            time.sleep(0.001)
+        release.set()
+        assert [f.result() for f in [leader] + followers] == ["done"] * 4
+
+    assert len(runs) == 1
+    assert flight.stats() == {"calls": 4, "executed": 1, "deduplicated": 3, "in_flight": 0}
+    # finished flights are not remembered
+    assert flight.do("k", lambda: "again") == "again"
+
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def boom():
+        started.set()
+        time.sleep(0.05)
+        raise ValueError("nope")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, "k", boom)
+        started.wait(2)
+        follower = pool.submit(flight.do, "k", boom)
+        for future in (leader, follower):
+            with pytest.raises(ValueError):
+                future.result()
+    assert flight.stats()["in_flight"] == 0
+
+
+@pytest.fixture
+def fake(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with FakeSpotify(latency=0.05) as fake:
+        yield fake
+
+
+def test_session_coalesces_identical_gets(fake):
+    session = SpotifySession("fake-token")
+    params = {"q": "Eminem", "type": "artist", "limit": 1}
+    responses = fan_out(lambda: session.get("/search", params=params))
+    assert all(r.status_code == 200 for r in responses)
+    assert fake.request_counts["GET /v1/search"] == 1
+    assert session.pool_stats()["deduplicated"] == 7
+
+
+def test_session_never_coalesces_writes(fake):
+    session = SpotifySession("fake-token")
+    fan_out(lambda: session.put("/me/player/pause"), count=3)
+    assert fake.request_counts["PUT /v1/me/player/pause"] == 3
+
+
+def test_search_manager_fan_out(fake, tmp_path):
+    manager = SearchManager("fake-token", cache=SearchCache(cache_dir=str(tmp_path / "cache")))
+    results = fan_out(lambda: manager.run("Lose Yourself", "tracks"))
+    assert all(r["success"] for r in results)
+    assert fake.request_counts["GET /v1/search"] == 1
+    assert manager.inflight.stats()["deduplicated"] + manager.cached_result.stats()["hits"] >= 7
+
+
+def test_artist_id_resolution_fan_out(fake, tmp_path):
+    search = backend.Search("fake-token", id_index=IdIndex(path=str(tmp_path / "ids.json")))
+    ids = fan_out(lambda: search.get_artist_id("Jay-Z"))
+    assert len(set(ids)) == 1 and ids[0]
+    assert fake.request_counts["GET /v1/search"] == 1
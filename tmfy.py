@@ -1,60 +1,58 @@
 #!/usr/bin/env python3
-import argparse
-
-from backend import Auth, Search, Player
-
-def main():
-    
-    auth = Auth()
-    token = auth.token
-    search = Search(token)
-    play = Player(token)
-    
-    
-    parser = argparse.ArgumentParser(
-        prog="Tmfy",
-        description="Get an artist's discography",
-        epilog="source code: git@github.com:Jonathan03ant/TermTify.git")
-    
-    # Defining the CLI Structure
-    # Example: Tmfy search "Ariana Grande" "Albums"
-             # Tmfy search "Ariana Grande" "Recently_Played"
-               
-    parser.add_argument('action', type=str, help="The action to perform: searhc")
-    parser.add_argument('artist_name', type=str, help="The name of artist to search for")
-    parser.add_argument('explanation', type=str, help="The explanation of the action (Search Artist Albums, Search Artist recently...)")
-    
-
-    arguments = parser.parse_args()
-    
-    if arguments.action == "search" or arguments.action == "sc":
-        if arguments.explanation == "Albums" or arguments.explanation == "dsc":
-            # @Returns a dictionary of the artists discography
-            albums = search.get_artist_descography(arguments.artist_name)
-            for album in albums:
-                print(f"Album Namee: {album['name']} | Release Date: {album['release_date']}")
-                
-        elif arguments.explanation == "Recently_Played" or arguments.explanation == "rp":
-            pass
-        
-        elif arguments.explanation == "Top" or arguments.explanation == "tt":
-            top_track = search.get_artist_top_tracks(arguments.artist_name)
-            for track in top_track:
-                print(f"Track Name: {track['name']} | Artist: {track['artists'][0]['name']} | Album: {track['album']['name']} ")
-                
-        elif arguments.explanation == "latest" or arguments.explanation == "lts":
-            pass
-        
-        else:
-            parser.error("Invalid Explanation")
-    elif arguments.action == "play" or arguments.action == "pl":
-        if arguments.explanation:
-            track_id = search.get_track_id(arguments.artist_name, arguments.explanation)
-            play.play_track(track_id)
-        else:
-            parser.error("Please specify a track name using --track.")
-    else:
-        parser.print_help()
-        
+import os, sys
+
+from backend.daemon import client
+
+"""
+tmfy <action> <artist_name> <explanation>      (tmfy shell for an interactive session)
+    with a `tmfy daemon` running (same directory) the command is handed to it over
+    its unix socket and answers from warm state, otherwise it runs in this process
+    TMFY_NO_DAEMON=1 always runs locally, so does --profile (the spans are this process')
+"""
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+
+    if argv[:1] == ["daemon"]:
+        return daemon(argv[1:])
+
+    # the shell is its own long lived session, no daemon round trips
+    if argv[:1] == ["shell"]:
+        from backend.shell import TmfyShell
+        return TmfyShell().run()
+
+    profiling = "--profile" in argv or any(arg == "--trace" or arg.startswith("--trace=") for arg in argv)
+    if not os.getenv("TMFY_NO_DAEMON") and not profiling:
+        status = client.send_command(argv, sys.stdout)
+        if status is not None:
+            return status
+
+    # imported here, a command answered by the daemon never needs them
+    from backend.commands import CommandContext, run_command
+    context = CommandContext()
+    try:
+        return run_command(argv, context, sys.stdout)
+    finally:
+        context.close()
+
+
+# `tmfy daemon` runs it in the foreground, `tmfy daemon stop|status` talk to a running one
+def daemon(argv):
+    if argv:
+        status = client.send_command(["daemon"] + argv, sys.stdout)
+        if status is None:
+            print("tmfy daemon is not running")
+            return 1
+        return status
+
+    from backend.daemon.server import TmfyDaemon
+    server = TmfyDaemon().start()
+    print(f"tmfy daemon listening on {server.path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
 if __name__ == "__main__":
-    main()
+    sys.exit(main())